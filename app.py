@@ -2,20 +2,35 @@
 Sistem Rekomendasi Promosi PT. Natura Boga
 Market Basket Analysis + Segmentasi Pelanggan (RFM + K-Means)
 """
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, send_from_directory
 from config import Config
 from models import db
-from models.transaksi import Transaksi, AturanAsosiasi, SegmentasiPelanggan
+from models.schema import upgrade_schema
+from models.transaksi import AturanAsosiasi, SegmentasiPelanggan
 from controllers.data_controller import (
-    upload_data, get_all_transactions, get_transactions_dataframe,
-    delete_transaction, delete_all_transactions, get_statistics
+    upload_data, get_transactions_page, delete_transaction,
+    delete_all_transactions, get_data_fingerprint, backfill_dictionary_keys, DEFAULT_PAGE_SIZE
 )
-from utils.apriori import run_apriori, format_itemset
-from utils.clustering import calculate_rfm, kmeans_clustering
-from utils.visualization import (
-    create_association_heatmap, create_simple_bar_chart,
-    create_3d_cluster_plot, create_cluster_summary_chart
+from controllers.statistics_controller import get_statistics, check_statistics
+from controllers.result_controller import (
+    active_results, clear_results, get_run, get_active_run_id, list_runs, rules_for_product, backfill_rule_items,
+    RULE_SIDES
 )
+from controllers.scoring_controller import score_rfm, score_customers, segment_trend
+from controllers.rfm_controller import check_rfm_summary
+from controllers.migration_controller import (
+    segment_migration, migration_customers, DEFAULT_MIGRATION_CUSTOMERS
+)
+from controllers.recommendation_controller import recommend_for_basket, DEFAULT_RECOMMENDATIONS
+from controllers.analysis_controller import ANALYSIS_JOBS
+from controllers.job_controller import JobStore
+from utils.frequent_itemsets import ALGORITHMS as MINING_ALGORITHMS
+from utils.apriori import RULE_METRICS
+from utils.clustering import CLUSTERING_BACKENDS
+from utils.jobs import JobManager, FAILED
+from utils.visualization import PLOTLY_JS_DIR, PLOTLY_VERSION
+from datetime import date
+import click
 import os
 
 app = Flask(__name__)
@@ -27,9 +42,19 @@ db.init_app(app)
 # Create upload folder if not exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Create database tables
+# Create database tables (serta kolom dan index yang belum ada), lalu
+# lengkapi kode kamus transaksi dan item_aturan untuk data yang tersimpan
+# sebelum tabel-tabel itu ada
 with app.app_context():
-    db.create_all()
+    upgrade_schema()
+    backfill_dictionary_keys()
+    backfill_rule_items()
+
+# Antrian job analisis (process pool lokal, status job di database)
+job_manager = JobManager(JobStore(app), app.config['JOB_WORKERS'])
+
+# Versi plotly.js untuk URL di template (lihat route plotly_js)
+app.jinja_env.globals['plotly_version'] = PLOTLY_VERSION
 
 @app.route('/')
 def index():
@@ -37,12 +62,57 @@ def index():
     stats = get_statistics()
     return render_template('dashboard.html', stats=stats)
 
+# Masa cache browser untuk plotly.js (1 tahun)
+PLOTLY_JS_MAX_AGE = 365 * 24 * 60 * 60
+
+# Filter halaman data transaksi (query string)
+TRANSAKSI_FILTERS = ('start_date', 'end_date', 'customer_id', 'product', 'transaction_id')
+
+def _transaksi_page_params(source):
+    """Ambil filter, urutan, dan cursor halaman data transaksi dari query string"""
+    filters = {name: source.get(name, '').strip() for name in TRANSAKSI_FILTERS}
+    for name in ('start_date', 'end_date'):
+        if filters[name]:
+            date.fromisoformat(filters[name])
+    
+    return {
+        'filters': {name: value for name, value in filters.items() if value},
+        'sort': source.get('sort', 'date'),
+        'direction': source.get('direction', 'desc'),
+        'after': source.get('after') or None,
+        'before': source.get('before') or None,
+        'limit': int(source.get('limit', DEFAULT_PAGE_SIZE))
+    }
+
 @app.route('/data_transaksi')
 def data_transaksi():
     """Halaman data transaksi"""
-    transactions = get_all_transactions()
+    try:
+        params = _transaksi_page_params(request.args)
+        page = get_transactions_page(**params)
+    except (TypeError, ValueError) as e:
+        flash(f'Parameter tidak valid: {str(e)}', 'error')
+        params = {'filters': {}, 'sort': 'date', 'direction': 'desc'}
+        page = get_transactions_page()
+    
     stats = get_statistics()
-    return render_template('data_transaksi.html', transactions=transactions, stats=stats)
+    return render_template('data_transaksi.html', transactions=page['transactions'], stats=stats,
+                           next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'],
+                           filters=params['filters'], sort=params['sort'], direction=params['direction'])
+
+@app.route('/api/transaksi')
+def api_transaksi():
+    """Daftar transaksi per halaman (keyset) dalam format JSON"""
+    try:
+        page = get_transactions_page(**_transaksi_page_params(request.args))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'data': [t.to_dict() for t in page['transactions']],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor']
+    })
 
 @app.route('/upload', methods=['POST'])
 def upload():
@@ -52,12 +122,16 @@ def upload():
         return redirect(url_for('data_transaksi'))
     
     file = request.files['file']
-    result = upload_data(file, app.config['UPLOAD_FOLDER'], app.config['ALLOWED_EXTENSIONS'])
+    result = upload_data(file, app.config['UPLOAD_FOLDER'], app.config['ALLOWED_EXTENSIONS'],
+                         chunk_size=app.config['INGEST_CHUNK_SIZE'])
     
     if 'error' in result:
         flash(result['error'], 'error')
     else:
         flash(result['success'], 'success')
+        if result.get('errors'):
+            detail = '; '.join(f"baris {e['row']}: {e['error']}" for e in result['errors'])
+            flash(f'Baris yang dilewati - {detail}', 'warning')
     
     return redirect(url_for('data_transaksi'))
 
@@ -79,8 +153,7 @@ def delete_all():
     result = delete_all_transactions()
     
     # Hapus juga hasil analisis
-    AturanAsosiasi.query.delete()
-    SegmentasiPelanggan.query.delete()
+    clear_results()
     db.session.commit()
     
     if 'error' in result:
@@ -90,194 +163,553 @@ def delete_all():
     
     return redirect(url_for('data_transaksi'))
 
+# Batas jumlah pelanggan pada cakupan MBA per daftar pelanggan
+MAX_SCOPE_CUSTOMERS = 10000
+
+def _date_range(source):
+    """Rentang tanggal opsional (YYYY-MM-DD) dari form/JSON"""
+    start_date = source.get('start_date') or None
+    end_date = source.get('end_date') or None
+    for value in (start_date, end_date):
+        if value is not None:
+            date.fromisoformat(value)
+    if start_date and end_date and start_date > end_date:
+        raise ValueError('Tanggal awal tidak boleh setelah tanggal akhir')
+    return start_date, end_date
+
+def _rule_params(source):
+    """Ambil parameter mining, batas rules, dan rentang tanggal MBA dari form/JSON"""
+    algorithm = source.get('algorithm', app.config['MBA_ALGORITHM'])
+    if algorithm not in MINING_ALGORITHMS:
+        raise ValueError(f'Algoritma tidak dikenal: {algorithm}')
+    
+    metric = source.get('metric') or app.config['MBA_RULE_METRIC']
+    if metric not in RULE_METRICS:
+        raise ValueError(f'Metric tidak dikenal: {metric}')
+    
+    # Batas rules: kosong = default config, 0 = tanpa batas
+    limits = {}
+    for name, default in (('top_k', 'MBA_TOP_K'), ('max_per_antecedent', 'MBA_MAX_PER_ANTECEDENT'), ('max_len', 'MBA_MAX_LEN')):
+        value = source.get(name)
+        value = int(value) if value not in (None, '') else app.config[default]
+        if value < 0:
+            raise ValueError(f'{name} tidak boleh negatif')
+        if name == 'max_len' and value == 1:
+            raise ValueError('max_len minimal 2 (rule butuh antecedent dan consequent)')
+        limits[name] = value or None
+    
+    start_date, end_date = _date_range(source)
+    
+    return {
+        'min_support': float(source.get('min_support', 0.01)),
+        'min_confidence': float(source.get('min_confidence', 0.3)),
+        'algorithm': algorithm,
+        'metric': metric,
+        **limits,
+        'start_date': start_date,
+        'end_date': end_date
+    }
+
+def _mba_params(source):
+    """Ambil parameter MBA dari form/JSON, termasuk cakupan segmen/pelanggan opsional"""
+    params = _rule_params(source)
+    
+    params['segment'] = (source.get('segment') or '').strip() or None
+    
+    # Daftar pelanggan: list (JSON) atau teks dipisah koma/baris baru (form)
+    customer_ids = source.get('customer_ids') or []
+    if isinstance(customer_ids, str):
+        customer_ids = customer_ids.replace('\n', ',').split(',')
+    customer_ids = {str(customer_id).strip() for customer_id in customer_ids} - {''}
+    if len(customer_ids) > MAX_SCOPE_CUSTOMERS:
+        raise ValueError(f'Maksimal {MAX_SCOPE_CUSTOMERS} pelanggan per analisis')
+    params['customer_ids'] = sorted(customer_ids) or None
+    
+    return params
+
+# Batas atas K pada pencarian K otomatis
+MAX_SWEEP_K = 20
+
+def _segmentasi_params(source):
+    """Ambil parameter segmentasi dari form/JSON"""
+    n_clusters = int(source.get('n_clusters', 3))
+    
+    # Validasi K
+    if n_clusters < 2:
+        raise ValueError('Jumlah cluster minimal adalah 2')
+    
+    # Rentang tanggal opsional (YYYY-MM-DD)
+    start_date, end_date = _date_range(source)
+    
+    backend = source.get('backend', app.config['CLUSTERING_BACKEND'])
+    if backend not in CLUSTERING_BACKENDS:
+        raise ValueError(f'Backend clustering tidak dikenal: {backend}')
+    
+    return {'n_clusters': n_clusters, 'start_date': start_date, 'end_date': end_date, 'backend': backend}
+
+def _k_sweep_params(source):
+    """Ambil parameter pencarian K otomatis dari form/JSON"""
+    params = _segmentasi_params(source)
+    del params['n_clusters']
+    
+    k_min = int(source.get('k_min', 2))
+    k_max = int(source.get('k_max', 10))
+    if k_min < 2 or k_max < k_min or k_max > MAX_SWEEP_K:
+        raise ValueError(f'Rentang K harus di antara 2 dan {MAX_SWEEP_K}')
+    
+    return {'k_min': k_min, 'k_max': k_max, **params}
+
+JOB_PARAMS = {
+    'analisis_mba': _mba_params,
+    'analisis_mba_segmen': _rule_params,
+    'segmentasi': _segmentasi_params,
+    'k_sweep': _k_sweep_params
+}
+
+def _mba_page(**context):
+    """Render analisis_mba.html beserta pilihan segmen dari run segmentasi aktif"""
+    segment_run_id = get_active_run_id('segmentasi')
+    segment_labels = []
+    if segment_run_id is not None:
+        segment_labels = [label for (label,) in db.session.query(SegmentasiPelanggan.cluster_label).filter(
+            SegmentasiPelanggan.run_id == segment_run_id
+        ).distinct().order_by(SegmentasiPelanggan.cluster_label)]
+    
+    for name in ('rules', 'heatmap', 'bar_chart'):
+        context.setdefault(name, None)
+    return render_template('analisis_mba.html', segment_labels=segment_labels, **context)
+
+def _render_mba(result):
+    """Render halaman MBA dari hasil run_mba_analysis atau run_segment_mba"""
+    if 'error' in result:
+        flash(result['error'], 'error')
+        if result.get('empty'):
+            return redirect(url_for('data_transaksi'))
+        return _mba_page()
+    
+    if 'warning' in result:
+        flash(result['warning'], 'warning')
+        return _mba_page()
+    
+    flash(result['success'], 'success')
+    
+    if 'segments' in result:
+        return _mba_page(segments=result['segments'])
+    
+    return _mba_page(rules=result['rules'],
+                     heatmap=result['heatmap'],
+                     bar_chart=result['bar_chart'],
+                     total_rules=result['total_rules'],
+                     scope=result['scope'],
+                     run_id=result['run_id'])
+
+def _render_segmentasi(result):
+    """Render halaman segmentasi dari hasil run_segmentation_analysis"""
+    if 'error' in result:
+        flash(result['error'], 'error')
+        if result.get('empty'):
+            return redirect(url_for('data_transaksi'))
+        return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None)
+    
+    flash(result['success'], 'success')
+    
+    if 'sweep' in result:
+        # Hasil pencarian K otomatis: tampilkan grafik, K rekomendasi diisi ke form
+        return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None,
+                             sweep=result['sweep'], sweep_chart=result['sweep_chart'],
+                             sweep_params=result['params'])
+    
+    return render_template('segmentasi.html', 
+                         rfm_data=result['rfm_data'],
+                         plot_3d=result['plot_3d'],
+                         pie_chart=result['pie_chart'],
+                         cluster_stats=result['cluster_stats'],
+                         total_customers=result['total_customers'])
+
+def _submit_job(kind, source):
+    """Masukkan analisis ke antrian job dengan parameter dari form/JSON (ValueError jika tidak valid)"""
+    params = JOB_PARAMS[kind](source)
+    return job_manager.submit(kind, params, get_data_fingerprint(), ANALYSIS_JOBS[kind], **params)
+
+def _finished_job_result(kinds):
+    """Ambil hasil job yang sudah selesai dari parameter ?job=<id>, jika ada"""
+    job = job_manager.get(request.args.get('job', ''))
+    if job is None or job.kind not in kinds:
+        return None
+    
+    if not job.finished:
+        flash(f'Analisis masih berjalan ({job.progress}%: {job.message}). Muat ulang halaman ini untuk melihat hasilnya.', 'info')
+        return None
+    
+    if job.status == FAILED:
+        return {'error': f'Error saat analisis: {job.error.strip().splitlines()[-1]}'}
+    
+    return job.result
+
 @app.route('/analisis_mba', methods=['GET', 'POST'])
 def analisis_mba():
     """Halaman analisis Market Basket Analysis"""
     if request.method == 'POST':
+        # Tanpa JavaScript: analisis tetap lewat antrian job, lalu halaman hasil job
+        kind = 'analisis_mba_segmen' if request.form.get('mode') == 'segmen' else 'analisis_mba'
         try:
-            min_support = float(request.form.get('min_support', 0.01))
-            min_confidence = float(request.form.get('min_confidence', 0.3))
-            
-            # Ambil data transaksi
-            df = get_transactions_dataframe()
-            
-            if df.empty:
-                flash('Data transaksi kosong. Silakan upload data terlebih dahulu.', 'error')
-                return redirect(url_for('data_transaksi'))
-            
-            # Group produk per transaksi
-            transactions = df.groupby('transaction_id')['product'].apply(list).values.tolist()
-            
-            # Jalankan Apriori
-            rules = run_apriori(transactions, min_support, min_confidence)
-            
-            if rules.empty:
-                flash(f'Tidak ada aturan asosiasi yang ditemukan dengan parameter min_support={min_support} dan min_confidence={min_confidence}. Coba gunakan nilai yang lebih rendah.', 'warning')
-                return render_template('analisis_mba.html', rules=None, heatmap=None, bar_chart=None)
-            
-            # Hapus rules lama
-            AturanAsosiasi.query.delete()
-            
-            # Simpan rules ke database
-            for _, row in rules.iterrows():
-                rule = AturanAsosiasi(
-                    antecedents=format_itemset(row['antecedents']),
-                    consequents=format_itemset(row['consequents']),
-                    support=float(row['support']),
-                    confidence=float(row['confidence']),
-                    lift=float(row['lift'])
-                )
-                db.session.add(rule)
-            
-            db.session.commit()
-            
-            # Buat visualisasi
-            heatmap = create_association_heatmap(rules)
-            bar_chart = create_simple_bar_chart(rules)
-            
-            # Format rules untuk tampilan
-            rules_display = []
-            for _, row in rules.head(20).iterrows():
-                rules_display.append({
-                    'antecedents': format_itemset(row['antecedents']),
-                    'consequents': format_itemset(row['consequents']),
-                    'support': round(row['support'], 4),
-                    'confidence': round(row['confidence'], 4),
-                    'lift': round(row['lift'], 4)
-                })
-            
-            flash(f'Analisis berhasil! Ditemukan {len(rules)} aturan asosiasi.', 'success')
-            
-            return render_template('analisis_mba.html', 
-                                 rules=rules_display, 
-                                 heatmap=heatmap,
-                                 bar_chart=bar_chart,
-                                 total_rules=len(rules))
-            
-        except Exception as e:
+            job = _submit_job(kind, request.form)
+        except (TypeError, ValueError) as e:
             flash(f'Error saat analisis: {str(e)}', 'error')
-            return render_template('analisis_mba.html', rules=None, heatmap=None, bar_chart=None)
+            return _mba_page()
+        return redirect(url_for('analisis_mba', job=job.id))
+    
+    # Tampilkan hasil job latar belakang yang sudah selesai (satu cakupan atau per segmen)
+    result = _finished_job_result(('analisis_mba', 'analisis_mba_segmen'))
+    if result is not None:
+        return _render_mba(result)
     
-    return render_template('analisis_mba.html', rules=None, heatmap=None, bar_chart=None)
+    return _mba_page()
 
 @app.route('/segmentasi', methods=['GET', 'POST'])
 def segmentasi():
     """Halaman analisis segmentasi pelanggan"""
     if request.method == 'POST':
+        # Tanpa JavaScript: analisis tetap lewat antrian job, lalu halaman hasil job
+        kind = 'k_sweep' if request.form.get('mode') == 'sweep' else 'segmentasi'
         try:
-            n_clusters = int(request.form.get('n_clusters', 3))
-            
-            # Validasi K
-            if n_clusters < 2:
-                flash('Jumlah cluster minimal adalah 2', 'error')
-                return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None)
-            
-            # Ambil data transaksi
-            df = get_transactions_dataframe()
-            
-            if df.empty:
-                flash('Data transaksi kosong. Silakan upload data terlebih dahulu.', 'error')
-                return redirect(url_for('data_transaksi'))
-            
-            # Validasi jumlah customer
-            n_customers = df['customer_id'].nunique()
-            if n_clusters > n_customers:
-                flash(f'Jumlah cluster ({n_clusters}) tidak boleh lebih dari jumlah pelanggan ({n_customers})', 'error')
-                return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None)
-            
-            # Hitung RFM
-            rfm_df = calculate_rfm(df)
-            
-            # K-Means clustering
-            rfm_clustered, kmeans_model = kmeans_clustering(rfm_df, n_clusters)
-            
-            # Hapus segmentasi lama
-            SegmentasiPelanggan.query.delete()
-            
-            # Simpan hasil segmentasi ke database
-            for _, row in rfm_clustered.iterrows():
-                segmentasi = SegmentasiPelanggan(
-                    customer_id=row['customer_id'],
-                    recency=int(row['Recency']),
-                    frequency=int(row['Frequency']),
-                    monetary=float(row['Monetary']),
-                    cluster=int(row['Cluster']),
-                    cluster_label=row['Cluster_Label']
-                )
-                db.session.add(segmentasi)
-            
-            db.session.commit()
-            
-            # Buat visualisasi
-            plot_3d = create_3d_cluster_plot(rfm_clustered)
-            pie_chart = create_cluster_summary_chart(rfm_clustered)
-            
-            # Urutkan data berdasarkan label kategori pelanggan
-            # Best Customers -> Potential Customers -> Lost Customers
-            label_order = {'Best Customers': 0, 'Potential Customers': 1, 'Lost Customers': 2}
-            rfm_clustered['label_sort'] = rfm_clustered['Cluster_Label'].map(label_order)
-            rfm_clustered_sorted = rfm_clustered.sort_values(['label_sort', 'customer_id'])
-            rfm_clustered_sorted = rfm_clustered_sorted.drop('label_sort', axis=1)
-
-            # Format data untuk tampilan
-            rfm_display = rfm_clustered_sorted.to_dict('records')
-            
-            # Statistik per cluster
-            cluster_stats = rfm_clustered.groupby('Cluster_Label').agg({
-                'Recency': 'mean',
-                'Frequency': 'mean',
-                'Monetary': 'mean',
-                'customer_id': 'count'
-            }).round(2).to_dict('index')
-            
-            flash(f'Analisis berhasil! Pelanggan dikelompokkan menjadi {n_clusters} cluster.', 'success')
-            
-            return render_template('segmentasi.html', 
-                                 rfm_data=rfm_display,
-                                 plot_3d=plot_3d,
-                                 pie_chart=pie_chart,
-                                 cluster_stats=cluster_stats,
-                                 total_customers=len(rfm_clustered))
-            
-        except Exception as e:
+            job = _submit_job(kind, request.form)
+        except (TypeError, ValueError) as e:
             flash(f'Error saat analisis: {str(e)}', 'error')
             return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None)
+        return redirect(url_for('segmentasi', job=job.id))
+    
+    # Tampilkan hasil job latar belakang yang sudah selesai (segmentasi atau pencarian K)
+    result = _finished_job_result(('segmentasi', 'k_sweep'))
+    if result is not None:
+        return _render_segmentasi(result)
     
     return render_template('segmentasi.html', rfm_data=None, plot_3d=None, pie_chart=None)
 
+@app.route('/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    """Jalankan analisis sebagai job latar belakang, kembalikan job id"""
+    if kind not in ANALYSIS_JOBS:
+        return jsonify({'error': f'Jenis job tidak dikenal: {kind}'}), 404
+    
+    try:
+        job = _submit_job(kind, request.get_json(silent=True) or request.form)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(job.to_dict()), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status dan progres job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Hasil job yang sudah selesai"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    if not job.finished:
+        return jsonify(job.to_dict()), 409
+    if job.status == FAILED:
+        return jsonify(job.to_dict()), 500
+    return jsonify(job.result)
+
+@app.route('/api/segmentasi/skor', methods=['GET', 'POST'])
+def api_skor_segmentasi():
+    """Segmen pelanggan dari model segmentasi tersimpan, tanpa clustering ulang"""
+    # GET ?customer_id=... (boleh berulang) atau ?recency=&frequency=&monetary=
+    # POST {"customer_ids": [...]} atau {"rfm": {...} / [{...}, ...]}; 'run' opsional
+    if request.method == 'POST':
+        source = request.get_json(silent=True)
+        if not isinstance(source, dict):
+            return jsonify({'error': 'Body harus berupa objek JSON'}), 400
+        customer_ids = source.get('customer_ids')
+        records = source.get('rfm')
+    else:
+        source = request.args
+        customer_ids = request.args.getlist('customer_id') or None
+        records = {key: request.args.get(key) for key in ('recency', 'frequency', 'monetary')} \
+            if 'recency' in request.args else None
+    
+    try:
+        run_id = int(source['run']) if source.get('run') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parameter run tidak valid'}), 400
+    
+    if customer_ids is not None:
+        if not isinstance(customer_ids, list):
+            return jsonify({'error': 'customer_ids harus berupa list'}), 400
+        result = score_customers(customer_ids, run_id)
+    elif records is not None:
+        result = score_rfm(records if isinstance(records, list) else [records], run_id)
+    else:
+        return jsonify({'error': 'Isi customer_ids atau rfm (recency, frequency, monetary)'}), 400
+    
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@app.route('/api/segmentasi/tren')
+def api_tren_segmentasi():
+    """Jumlah pelanggan per segmen pada setiap snapshot RFM harian (?start_date=&end_date=&run=)"""
+    try:
+        start_date, end_date = _date_range(request.args)
+        run_id = request.args.get('run', type=int)
+    except ValueError as e:
+        return jsonify({'error': f'Parameter tidak valid: {e}'}), 400
+    
+    result = segment_trend(start_date, end_date, run_id)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+def _migration_params(source):
+    """
+    Ambil parameter laporan perpindahan segmen dari query string
+    
+    Args:
+        source: request.args (dari, ke, dari_segmen, ke_segmen, limit, after)
+    
+    Returns:
+        Tuple (run, customers): argumen segment_migration dan argumen
+        migration_customers (None jika dari_segmen/ke_segmen tidak diisi);
+        segmen kosong berarti pelanggan baru/hilang
+    """
+    run = {
+        'from_run_id': int(source['dari']) if source.get('dari') else None,
+        'to_run_id': int(source['ke']) if source.get('ke') else None
+    }
+    if 'dari_segmen' not in source and 'ke_segmen' not in source:
+        return run, None
+    
+    customers = dict(
+        run,
+        from_label=source.get('dari_segmen') or None,
+        to_label=source.get('ke_segmen') or None,
+        limit=int(source.get('limit') or DEFAULT_MIGRATION_CUSTOMERS),
+        after=source.get('after') or None
+    )
+    return run, customers
+
+@app.route('/api/segmentasi/migrasi')
+def api_migrasi_segmentasi():
+    """Matriks perpindahan segmen antara dua run segmentasi (?dari=&ke=)"""
+    try:
+        run, _ = _migration_params(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parameter dari/ke tidak valid'}), 400
+    
+    result = segment_migration(**run)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@app.route('/api/segmentasi/migrasi/pelanggan')
+def api_migrasi_pelanggan():
+    """Daftar pelanggan satu perpindahan segmen (?dari=&ke=&dari_segmen=&ke_segmen=&limit=&after=)"""
+    try:
+        _, customers = _migration_params(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parameter dari/ke/limit tidak valid'}), 400
+    if customers is None:
+        return jsonify({'error': 'Isi segmen asal dan/atau segmen tujuan'}), 400
+    
+    result = migration_customers(**customers)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@app.route('/api/rekomendasi', methods=['GET', 'POST'])
+def api_rekomendasi():
+    """Produk yang direkomendasikan untuk isi keranjang (integrasi POS)"""
+    # GET ?product=A&product=B[&customer_id=..][&limit=..][&run=..]
+    # POST {"basket": ["A", "B"], "customer_id": "..", "limit": 10, "run": 1}
+    if request.method == 'POST':
+        source = request.get_json(silent=True)
+        if not isinstance(source, dict):
+            return jsonify({'error': 'Body harus berupa objek JSON'}), 400
+        basket = source.get('basket')
+    else:
+        source = request.args
+        basket = request.args.getlist('product')
+    
+    try:
+        limit = int(source.get('limit') or DEFAULT_RECOMMENDATIONS)
+        run_id = int(source['run']) if source.get('run') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parameter limit/run tidak valid'}), 400
+    
+    result = recommend_for_basket(basket, source.get('customer_id'), limit, run_id)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@app.route('/api/aturan')
+def api_aturan():
+    """Rules yang melibatkan satu produk (?product=..&side=antecedent|consequent&limit=..&run=..)"""
+    product = request.args.get('product', '').strip()
+    side = request.args.get('side') or None
+    if not product:
+        return jsonify({'error': 'Parameter product wajib diisi'}), 400
+    if side is not None and side not in RULE_SIDES:
+        return jsonify({'error': 'side harus antecedent atau consequent'}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 100))
+        run_id = int(request.args['run']) if request.args.get('run') else get_active_run_id('mba')
+    except ValueError:
+        return jsonify({'error': 'Parameter limit/run tidak valid'}), 400
+    
+    if run_id is None or get_run('mba', run_id) is None:
+        return jsonify({'error': 'Hasil analisis MBA tidak ditemukan'}), 404
+    
+    return jsonify({'run_id': run_id, 'rules': rules_for_product(product, run_id, side, limit)})
+
+@app.route('/assets/plotly-<version>.min.js')
+def plotly_js(version):
+    """plotly.js dari paket plotly terpasang, bisa di-cache browser tanpa batas karena URL memuat versi"""
+    if version != PLOTLY_VERSION:
+        abort(404)
+    
+    response = send_from_directory(PLOTLY_JS_DIR, 'plotly.min.js', max_age=PLOTLY_JS_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/segmentasi/migrasi')
+def segmentasi_migrasi():
+    """Halaman perpindahan segmen pelanggan antara dua run segmentasi"""
+    try:
+        run, customers = _migration_params(request.args)
+    except ValueError:
+        flash('Parameter laporan perpindahan tidak valid', 'error')
+        return redirect(url_for('segmentasi_migrasi'))
+    
+    migration = segment_migration(**run)
+    if 'error' in migration:
+        flash(migration['error'], 'warning')
+        migration = None
+    
+    # Daftar pelanggan untuk sel matriks yang dipilih
+    detail = None
+    if migration and customers is not None:
+        customers.update(from_run_id=migration['from_run'], to_run_id=migration['to_run'])
+        detail = migration_customers(**customers)
+        if 'error' in detail:
+            flash(detail['error'], 'warning')
+            detail = None
+        else:
+            detail.update(from_label=customers['from_label'], to_label=customers['to_label'])
+    
+    return render_template('segmentasi_migrasi.html',
+                         migration=migration,
+                         detail=detail,
+                         segment_runs=list_runs('segmentasi'))
+
 @app.route('/rekomendasi')
 def rekomendasi():
     """Halaman rekomendasi promosi"""
-    # Ambil association rules
-    rules = AturanAsosiasi.query.order_by(AturanAsosiasi.lift.desc()).limit(10).all()
+    # Run yang dipilih (?run=<id>, boleh satu per jenis); default run aktif
+    selected = _selected_runs(request.args.getlist('run', type=int))
     
-    # Ambil segmentasi pelanggan
-    segmentasi = SegmentasiPelanggan.query.all()
+    # Ambil association rules (opsional hanya yang melibatkan satu produk, ?produk=<nama>)
+    produk = request.args.get('produk', '').strip()
+    if produk:
+        rules = [{
+            'antecedents': ', '.join(rule['antecedents']),
+            'consequents': ', '.join(rule['consequents']),
+            'lift': rule['lift'],
+            'confidence': rule['confidence']
+        } for rule in rules_for_product(produk, selected['mba'], limit=10)]
+    else:
+        rules = [{
+            'antecedents': rule.antecedents,
+            'consequents': rule.consequents,
+            'lift': rule.lift,
+            'confidence': rule.confidence
+        } for rule in active_results('mba', selected['mba']).order_by(AturanAsosiasi.lift.desc()).limit(10)]
     
     # Generate rekomendasi bundling
     bundling_recommendations = []
     for rule in rules:
         bundling_recommendations.append({
-            'produk_utama': rule.antecedents,
-            'produk_bundling': rule.consequents,
-            'lift': round(rule.lift, 2),
-            'confidence': round(rule.confidence * 100, 1)
+            'produk_utama': rule['antecedents'],
+            'produk_bundling': rule['consequents'],
+            'lift': round(rule['lift'], 2),
+            'confidence': round(rule['confidence'] * 100, 1)
         })
     
     # Generate rekomendasi target pelanggan
     # Urutkan pelanggan berdasarkan ID dalam setiap kategori
-    best_customers = sorted([s for s in segmentasi if s.cluster_label == 'Best Customers'], key=lambda x: x.customer_id)
-    potential_customers = sorted([s for s in segmentasi if s.cluster_label == 'Potential Customers'], key=lambda x: x.customer_id)
-    lost_customers = sorted([s for s in segmentasi if s.cluster_label == 'Lost Customers'], key=lambda x: x.customer_id)
+    best_customers, total_best = _segment_preview('Best Customers', selected['segmentasi'])
+    potential_customers, total_potential = _segment_preview('Potential Customers', selected['segmentasi'])
+    lost_customers, total_lost = _segment_preview('Lost Customers', selected['segmentasi'])
     
     return render_template('rekomendasi.html',
                          bundling_recommendations=bundling_recommendations,
-                         best_customers=best_customers[:10],
-                         potential_customers=potential_customers[:10],
-                         lost_customers=lost_customers[:10],
-                         total_best=len(best_customers),
-                         total_potential=len(potential_customers),
-                         total_lost=len(lost_customers))
+                         best_customers=best_customers,
+                         potential_customers=potential_customers,
+                         lost_customers=lost_customers,
+                         total_best=total_best,
+                         total_potential=total_potential,
+                         total_lost=total_lost,
+                         mba_runs=list_runs('mba'),
+                         segment_runs=list_runs('segmentasi'),
+                         selected_runs=selected,
+                         produk=produk)
+
+def _selected_runs(run_ids):
+    """
+    Petakan id run dari query string ke jenisnya
+    
+    Args:
+        run_ids: List id AnalisisRun (id yang tidak dikenal diabaikan)
+    
+    Returns:
+        Dictionary jenis -> id run yang dibaca (run aktif jika tidak dipilih)
+    """
+    selected = {'mba': None, 'segmentasi': None}
+    for run_id in run_ids:
+        for jenis in selected:
+            if get_run(jenis, run_id) is not None:
+                selected[jenis] = run_id
+    
+    for jenis in selected:
+        if selected[jenis] is None:
+            selected[jenis] = get_active_run_id(jenis)
+    return selected
+
+def _segment_preview(label, run_id=None, limit=10):
+    """Pelanggan pertama (urut customer_id) dan jumlah total untuk satu label segmen"""
+    query = active_results('segmentasi', run_id).filter(SegmentasiPelanggan.cluster_label == label)
+    customers = query.order_by(SegmentasiPelanggan.customer_id).limit(limit).all()
+    return customers, query.count()
+
+@app.cli.command('cek-statistik')
+@click.option('--perbaiki', is_flag=True, help='Bangun ulang ringkasan jika tidak konsisten')
+def cek_statistik(perbaiki):
+    """Bandingkan statistik dashboard dan ringkasan RFM tersimpan dengan hitung ulang dari tabel transaksi"""
+    mismatches = check_statistics(fix=perbaiki)
+    rfm_mismatches = check_rfm_summary(fix=perbaiki)
+    
+    if not mismatches and not rfm_mismatches:
+        click.echo('Statistik konsisten.')
+        return
+    
+    for field, (stored, expected) in mismatches.items():
+        click.echo(f'{field}: tersimpan={stored}, seharusnya={expected}')
+    if rfm_mismatches:
+        click.echo(f'ringkasan_rfm: {rfm_mismatches} pelanggan berbeda')
+    
+    if perbaiki:
+        click.echo('Statistik sudah dibangun ulang.')
+    else:
+        raise SystemExit(1)
 
 # Hanya dijalankan saat di lokal, tidak untuk production di Vercel
 if __name__ == '__main__':
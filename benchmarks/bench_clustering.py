@@ -0,0 +1,95 @@
+"""
+Benchmark backend clustering: KMeans penuh dibandingkan MiniBatchKMeans
+
+Untuk setiap konfigurasi dicatat waktu fitting, inertia relatif terhadap
+KMeans penuh (1.000 = sama baiknya, lebih besar = lebih buruk), adjusted
+Rand index label cluster, dan persentase pelanggan yang mendapat segmen
+(Cluster_Label) yang sama dengan KMeans penuh. Juga mengukur update
+inkremental MiniBatchKMeans (partial_fit) setelah 10% pelanggan baru masuk.
+
+Contoh:
+    python benchmarks/bench_clustering.py --customers 100000 1000000 --clusters 3 5
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+
+import common  # noqa: F401 - sys.path untuk modul aplikasi
+import utils.clustering as clustering
+from utils.clustering import kmeans_clustering, update_clustering, SegmentModel, RFM_COLUMNS
+
+def make_rfm(n_customers, seed=42):
+    """RFM sintetis: campuran beberapa kelompok pelanggan dengan sebaran miring"""
+    rng = np.random.default_rng(seed)
+    # (proporsi, rata-rata recency, rata-rata frequency, median monetary)
+    groups = [(0.15, 10, 25, 4e6), (0.35, 45, 8, 1e6), (0.50, 200, 2, 2e5)]
+    sizes = rng.multinomial(n_customers, [g[0] for g in groups])
+    
+    parts = []
+    for size, (_, recency, frequency, monetary) in zip(sizes, groups):
+        parts.append(pd.DataFrame({
+            'Recency': rng.exponential(recency, size).astype(int),
+            'Frequency': rng.poisson(frequency, size) + 1,
+            'Monetary': rng.lognormal(np.log(monetary), 0.6, size).round()
+        }))
+    rfm = pd.concat(parts, ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+    rfm.insert(0, 'customer_id', [f'C{i}' for i in range(n_customers)])
+    return rfm
+
+def fit(rfm, n_clusters, backend, n_threads, batch_size=None):
+    if batch_size is not None:
+        clustering.MINIBATCH_SIZE = batch_size
+    start = time.perf_counter()
+    result, model = kmeans_clustering(rfm, n_clusters, backend=backend, n_threads=n_threads)
+    return result, model, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--clusters', type=int, nargs='+', default=[3, 5])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1024, 4096, 16384])
+    args = parser.parse_args()
+    
+    cores = os.cpu_count()
+    default_batch = clustering.MINIBATCH_SIZE
+    
+    print(f"{'pelanggan':>10} {'K':>2} {'konfigurasi':<28} {'waktu (s)':>10} {'inertia':>8} {'ARI':>6} {'segmen sama':>12}")
+    for n_customers in args.customers:
+        rfm = make_rfm(n_customers)
+        values = rfm[RFM_COLUMNS].values
+        
+        for n_clusters in args.clusters:
+            # Acuan: KMeans penuh dengan semua core
+            exact, exact_model, _ = fit(rfm, n_clusters, 'kmeans', None)
+            exact_inertia = -exact_model.score(values)
+            
+            configs = [(f'kmeans threads={threads}', 'kmeans', threads, None) for threads in sorted({1, cores})]
+            configs += [(f'minibatch batch={size}', 'minibatch', None, size) for size in args.batch_sizes]
+            
+            for label, backend, threads, batch_size in configs:
+                result, model, elapsed = fit(rfm, n_clusters, backend, threads, batch_size)
+                inertia = -model.score(values) / exact_inertia
+                ari = adjusted_rand_score(exact['Cluster'], result['Cluster'])
+                same = (exact['Cluster_Label'] == result['Cluster_Label']).mean() * 100
+                print(f'{n_customers:>10} {n_clusters:>2} {label:<28} {elapsed:>10.2f} {inertia:>8.3f} {ari:>6.3f} {same:>11.1f}%')
+            
+            # Update inkremental: model dari 90% pelanggan, lalu partial_fit dengan data lengkap,
+            # dari Pipeline di memori dan dari artefak tersimpan (alur run_segmentation_analysis)
+            clustering.MINIBATCH_SIZE = default_batch
+            _, base_model, _ = fit(rfm.iloc[:int(n_customers * 0.9)], n_clusters, 'minibatch', None)
+            saved = SegmentModel.from_artifact(SegmentModel.from_pipeline(base_model).to_artifact())
+            for label, source in (('minibatch update +10%', base_model), ('update model tersimpan +10%', None)):
+                start = time.perf_counter()
+                result, model = update_clustering(source if source is not None else saved.to_pipeline(), rfm)
+                elapsed = time.perf_counter() - start
+                inertia = -model.score(values) / exact_inertia
+                ari = adjusted_rand_score(exact['Cluster'], result['Cluster'])
+                same = (exact['Cluster_Label'] == result['Cluster_Label']).mean() * 100
+                print(f'{n_customers:>10} {n_clusters:>2} {label:<28} {elapsed:>10.2f} {inertia:>8.3f} {ari:>6.3f} {same:>11.1f}%')
+
+if __name__ == '__main__':
+    main()
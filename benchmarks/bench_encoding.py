@@ -0,0 +1,116 @@
+"""
+Benchmark kode kamus produk/pelanggan (integer) dibandingkan kolom teks
+
+Dibandingkan dua tahap yang paling sering memproses seluruh tabel transaksi:
+- Input mining: muat kolom + bentuk matriks transaksi x produk lalu Eclat,
+  dari nama produk (list per transaksi) vs dari produk_id (encode_codes)
+- RFM: GROUP BY customer_id (teks) vs GROUP BY pelanggan_id (integer)
+
+Setiap varian dijalankan di subprocess terpisah agar peak RSS tidak tercampur.
+
+Contoh:
+    python benchmarks/bench_encoding.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from common import make_app, fill_database, peak_rss_mb
+
+MIN_SUPPORT = 0.01
+
+def mining_by_name():
+    """Jalur lama run_mba_analysis: list nama produk per transaksi"""
+    from controllers.data_controller import get_transactions_dataframe
+    from utils.frequent_itemsets import mine_frequent_itemsets
+    
+    df = get_transactions_dataframe(columns=['transaction_id', 'product'])
+    transactions = df.groupby('transaction_id', sort=False)['product'].apply(list).values.tolist()
+    del df
+    return len(mine_frequent_itemsets(transactions, MIN_SUPPORT, 'eclat'))
+
+def mining_by_code():
+    from controllers.data_controller import get_transactions_dataframe, get_product_names
+    from utils.frequent_itemsets import encode_codes, mine_encoded_itemsets
+    
+    df = get_transactions_dataframe(columns=['transaction_id', 'produk_id'])
+    matrix, items = encode_codes(df['transaction_id'].values, df['produk_id'].values, get_product_names())
+    del df
+    return len(mine_encoded_itemsets(matrix, items, MIN_SUPPORT, 'eclat'))
+
+def rfm_by_text():
+    """Salinan query RFM lama (GROUP BY customer_id) sebagai pembanding"""
+    from sqlalchemy import func, distinct, type_coerce
+    from models import db
+    from models.transaksi import Transaksi
+    from utils.clustering import rfm_from_summary
+    
+    rows = db.session.query(
+        Transaksi.customer_id,
+        type_coerce(func.max(Transaksi.date), db.String),
+        func.count(distinct(Transaksi.transaction_id)),
+        func.sum(Transaksi.total)
+    ).group_by(Transaksi.customer_id).all()
+    summary = pd.DataFrame(rows, columns=['customer_id', 'last_date', 'Frequency', 'Monetary'])
+    return len(rfm_from_summary(summary, None))
+
+def rfm_by_code():
+    from controllers.data_controller import get_rfm_dataframe
+    return len(get_rfm_dataframe())
+
+VARIANTS = {
+    'mining (nama)': mining_by_name,
+    'mining (kode)': mining_by_code,
+    'rfm (customer_id)': rfm_by_text,
+    'rfm (pelanggan_id)': rfm_by_code
+}
+
+def run_child(db_path, variant):
+    """Jalankan satu varian di proses ini lalu cetak hasil sebagai JSON"""
+    app = make_app(db_path)
+    # Import modul aplikasi di luar pengukuran
+    import controllers.data_controller  # noqa: F401
+    import utils.frequent_itemsets  # noqa: F401
+    
+    with app.app_context():
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        count = VARIANTS[variant]()
+        elapsed = time.perf_counter() - start
+    
+    print(json.dumps({'count': count, 'seconds': elapsed, 'delta_rss_mb': peak_rss_mb() - baseline}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.variant)
+        return
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='natura_encoding_'), 'bench.db')
+    fill_database(db_path, args.rows)
+    
+    print(f"{'varian':<20} {'hasil':>10} {'waktu (s)':>10} {'+RSS (MB)':>10}")
+    for variant in args.variants:
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', db_path, '--variant', variant],
+            check=True, capture_output=True, text=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{variant:<20} {stats['count']:>10} {stats['seconds']:>10.2f} {stats['delta_rss_mb']:>10.1f}")
+    
+    os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark upload data transaksi: jalur lama (iterrows + ORM per baris)
+dibandingkan bulk ingest (konversi per kolom + executemany per batch)
+
+Contoh:
+    python benchmarks/bench_ingest.py --rows 500000 --legacy-rows 50000
+
+Jalur lama sangat lambat, sehingga secara default diukur pada subset
+(--legacy-rows) dan dibandingkan dalam satuan baris per detik.
+"""
+import argparse
+
+import pandas as pd
+
+from common import make_app, generate_transactions, timer
+from models import db
+from models.transaksi import Transaksi
+from controllers.data_controller import prepare_transactions, bulk_insert_transactions
+
+def legacy_insert(df):
+    """Salinan jalur upload lama sebagai pembanding"""
+    for _, row in df.iterrows():
+        db.session.add(Transaksi(
+            transaction_id=str(row['transaction_id']),
+            date=pd.to_datetime(row['date']),
+            customer_id=str(row['customer_id']),
+            product=str(row['product']),
+            quantity=int(row['quantity']),
+            price=float(row['price']),
+            total=float(row['total'])
+        ))
+    db.session.commit()
+
+def bulk_insert(df, chunk_size):
+    clean_df, errors = prepare_transactions(df)
+    bulk_insert_transactions(clean_df, chunk_size)
+    db.session.commit()
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--legacy-rows', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    df = generate_transactions(args.rows)
+    results = {}
+    
+    app = make_app()
+    with app.app_context():
+        with timer(f'legacy ({args.legacy_rows} baris)', results):
+            legacy_insert(df.head(args.legacy_rows))
+    
+    app = make_app()
+    with app.app_context():
+        with timer(f'bulk ({args.rows} baris)', results):
+            bulk_insert(df, args.chunk_size)
+        assert Transaksi.query.count() == args.rows
+    
+    legacy_rate = args.legacy_rows / results[f'legacy ({args.legacy_rows} baris)']
+    bulk_rate = args.rows / results[f'bulk ({args.rows} baris)']
+    print(f'\nlegacy: {legacy_rate:,.0f} baris/s')
+    print(f'bulk  : {bulk_rate:,.0f} baris/s')
+    print(f'speedup: {bulk_rate / legacy_rate:.1f}x')
+
+if __name__ == '__main__':
+    main()
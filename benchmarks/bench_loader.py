@@ -0,0 +1,98 @@
+"""
+Benchmark memuat tabel transaksi ke DataFrame: jalur lama (objek ORM ->
+list of dict -> DataFrame) dibandingkan loader kolumnar
+
+Database diisi sekali, lalu setiap loader dijalankan di subprocess terpisah
+agar peak RSS tidak tercampur.
+
+Contoh:
+    python benchmarks/bench_loader.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from common import make_app, fill_database, peak_rss_mb
+
+def legacy_loader():
+    """Salinan get_transactions_dataframe lama sebagai pembanding"""
+    from models.transaksi import Transaksi
+    
+    transactions = Transaksi.query.all()
+    data = [{
+        'id': t.id,
+        'transaction_id': t.transaction_id,
+        'date': t.date,
+        'customer_id': t.customer_id,
+        'product': t.product,
+        'quantity': t.quantity,
+        'price': t.price,
+        'total': t.total
+    } for t in transactions]
+    return pd.DataFrame(data)
+
+def columnar_loader():
+    from controllers.data_controller import get_transactions_dataframe
+    return get_transactions_dataframe()
+
+def projected_loader():
+    from controllers.data_controller import get_transactions_dataframe
+    return get_transactions_dataframe(columns=['transaction_id', 'product'])
+
+LOADERS = {
+    'legacy': legacy_loader,
+    'columnar': columnar_loader,
+    'columnar (2 kolom)': projected_loader
+}
+
+def run_child(db_path, loader):
+    """Jalankan satu loader di proses ini lalu cetak hasil sebagai JSON"""
+    app = make_app(db_path)
+    # Import modul aplikasi di luar pengukuran
+    import controllers.data_controller  # noqa: F401
+    
+    with app.app_context():
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        df = LOADERS[loader]()
+        elapsed = time.perf_counter() - start
+    
+    print(json.dumps({'rows': len(df), 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(),
+                      'delta_rss_mb': peak_rss_mb() - baseline,
+                      'frame_mb': df.memory_usage(deep=True).sum() / (1024 * 1024)}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--loaders', nargs='+', choices=list(LOADERS), default=list(LOADERS))
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--loader', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.loader)
+        return
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='natura_loader_'), 'bench.db')
+    fill_database(db_path, args.rows)
+    
+    print(f"{'loader':<20} {'baris':>10} {'waktu (s)':>10} {'peak RSS (MB)':>14} {'+RSS (MB)':>10} {'DataFrame (MB)':>15}")
+    for loader in args.loaders:
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', db_path, '--loader', loader],
+            check=True, capture_output=True, text=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{loader:<20} {stats['rows']:>10} {stats['seconds']:>10.2f} {stats['peak_rss_mb']:>14.1f} "
+              f"{stats['delta_rss_mb']:>10.1f} {stats['frame_mb']:>15.1f}")
+    
+    os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
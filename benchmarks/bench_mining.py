@@ -0,0 +1,78 @@
+"""
+Benchmark engine frequent itemset: Apriori dense (mlxtend + TransactionEncoder,
+cara lama) dibandingkan FP-Growth sparse dan Eclat bitset
+
+Mengukur waktu dan peak memori (tracemalloc, termasuk alokasi NumPy) untuk
+beberapa nilai min_support, sekaligus memastikan semua engine menghasilkan
+itemset yang sama.
+
+Contoh:
+    python benchmarks/bench_mining.py --rows 300000 --products 5000 --min-support 0.01 0.005 0.002
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import warnings
+
+from common import generate_transactions
+from utils.frequent_itemsets import mine_frequent_itemsets
+
+def legacy_apriori(transactions, min_support):
+    """Jalur lama run_apriori: one-hot dense lewat TransactionEncoder"""
+    import pandas as pd
+    from mlxtend.frequent_patterns import apriori
+    from mlxtend.preprocessing import TransactionEncoder
+    
+    te = TransactionEncoder()
+    te_ary = te.fit(transactions).transform(transactions)
+    df = pd.DataFrame(te_ary, columns=te.columns_)
+    return apriori(df, min_support=min_support, use_colnames=True)
+
+def measure(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--min-support', type=float, nargs='+', default=[0.01, 0.005, 0.002])
+    parser.add_argument('--skip-legacy', action='store_true', help='Lewati Apriori dense jika memori tidak cukup')
+    args = parser.parse_args()
+    
+    warnings.simplefilter('ignore', DeprecationWarning)
+    
+    df = generate_transactions(args.rows, n_products=args.products)
+    transactions = df.groupby('transaction_id')['product'].apply(list).tolist()
+    print(f'{len(transactions)} transaksi, {df["product"].nunique()} produk\n')
+    
+    engines = {
+        'fpgrowth (sparse)': lambda t, s: mine_frequent_itemsets(t, s, 'fpgrowth'),
+        'eclat (bitset)': lambda t, s: mine_frequent_itemsets(t, s, 'eclat')
+    }
+    if not args.skip_legacy:
+        engines = {'apriori (dense, lama)': legacy_apriori, **engines}
+    
+    print(f"{'min_support':>11} {'engine':<22} {'itemset':>8} {'waktu (s)':>10} {'peak (MB)':>10}")
+    for min_support in args.min_support:
+        reference = None
+        for name, fn in engines.items():
+            itemsets, elapsed, peak = measure(fn, transactions, min_support)
+            print(f'{min_support:>11} {name:<22} {len(itemsets):>8} {elapsed:>10.2f} {peak:>10.1f}')
+            
+            found = set(itemsets['itemsets'])
+            if reference is None:
+                reference = found
+            elif found != reference:
+                print('  PERINGATAN: itemset berbeda dari engine pertama')
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark halaman data transaksi: load semua baris (cara lama), OFFSET,
+dan keyset pagination pada berbagai ukuran tabel
+
+Keyset seharusnya konstan baik di halaman pertama maupun halaman jauh,
+sedangkan OFFSET melambat seiring kedalaman halaman.
+
+Contoh:
+    python benchmarks/bench_pagination.py --rows 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import fill_database
+from models.transaksi import Transaksi
+from controllers.data_controller import get_transactions_page, _encode_cursor
+
+def best_of(fn, repeat):
+    """Waktu tercepat (ms) dari beberapa kali pemanggilan"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--skip-legacy', action='store_true', help='Lewati load semua baris')
+    args = parser.parse_args()
+    
+    print(f"{'baris':>10} {'metode':<28} {'waktu (ms)':>12}")
+    for n_rows in args.rows:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='natura_page_'), 'bench.db')
+        app = fill_database(db_path, n_rows)
+        
+        with app.app_context():
+            # Baris di tengah tabel (urut tanggal terbaru) sebagai posisi halaman jauh
+            depth = n_rows // 2
+            middle = Transaksi.query.order_by(Transaksi.date.desc(), Transaksi.id.desc()).offset(depth).first()
+            cursor = _encode_cursor(middle, 'date')
+            
+            def offset_page():
+                Transaksi.query.order_by(Transaksi.date.desc(), Transaksi.id.desc()).offset(depth).limit(args.page_size).all()
+            
+            timings = {
+                'keyset halaman pertama': lambda: get_transactions_page(limit=args.page_size),
+                f'keyset halaman ke-{depth // args.page_size}': lambda: get_transactions_page(after=cursor, limit=args.page_size),
+                'keyset filter customer': lambda: get_transactions_page({'customer_id': middle.customer_id}, limit=args.page_size),
+                f'OFFSET halaman ke-{depth // args.page_size}': offset_page
+            }
+            if not args.skip_legacy:
+                timings['load semua (lama)'] = lambda: Transaksi.query.all()
+            
+            for label, fn in timings.items():
+                repeat = 1 if label == 'load semua (lama)' else args.repeat
+                print(f'{n_rows:>10} {label:<28} {best_of(fn, repeat):>12.2f}')
+        
+        os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark skalabilitas mining frequent itemset terpartisi (SON) terhadap
+jumlah proses
+
+Transaksi sintetis di-encode sekali, lalu ditambang secara serial dan
+dengan beberapa jumlah proses. Dilaporkan waktu, speedup terhadap serial,
+dan dipastikan itemset serta support-nya sama persis dengan hasil serial.
+Waktu paralel sudah termasuk start process pool (spawn).
+
+Contoh:
+    python benchmarks/bench_parallel_mining.py --rows 1000000 --workers 1 4 16
+"""
+import argparse
+import time
+import warnings
+
+from common import generate_transactions
+from utils.frequent_itemsets import encode_transactions, mine_encoded_itemsets, PARALLEL_MIN_TRANSACTIONS
+
+def itemset_key(frequent_itemsets):
+    return sorted((tuple(sorted(itemset)), support)
+                  for itemset, support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support']))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--min-support', type=float, nargs='+', default=[0.005, 0.001])
+    parser.add_argument('--algorithm', default='eclat')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+    
+    warnings.simplefilter('ignore', DeprecationWarning)
+    
+    df = generate_transactions(args.rows, n_products=args.products)
+    transactions = df.groupby('transaction_id')['product'].apply(list).tolist()
+    matrix, items = encode_transactions(transactions)
+    print(f'{matrix.shape[0]} transaksi, {matrix.shape[1]} produk, algoritma {args.algorithm}')
+    if matrix.shape[0] < PARALLEL_MIN_TRANSACTIONS:
+        print(f'Catatan: di bawah {PARALLEL_MIN_TRANSACTIONS} transaksi mining selalu serial\n')
+    
+    print(f"{'min_support':>12} {'proses':>7} {'itemset':>9} {'waktu (s)':>10} {'speedup':>8} {'sama':>5}")
+    for min_support in args.min_support:
+        start = time.perf_counter()
+        serial = mine_encoded_itemsets(matrix, items, min_support, args.algorithm)
+        serial_time = time.perf_counter() - start
+        expected = itemset_key(serial)
+        print(f'{min_support:>12} {"serial":>7} {len(serial):>9} {serial_time:>10.2f} {1:>8.2f} {"-":>5}')
+        
+        for n_jobs in args.workers:
+            start = time.perf_counter()
+            result = mine_encoded_itemsets(matrix, items, min_support, args.algorithm, n_jobs=n_jobs)
+            elapsed = time.perf_counter() - start
+            same = itemset_key(result) == expected
+            print(f'{min_support:>12} {n_jobs:>7} {len(result):>9} {elapsed:>10.2f} {serial_time / elapsed:>8.2f} {str(same):>5}')
+
+if __name__ == '__main__':
+    main()
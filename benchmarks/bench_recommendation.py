@@ -0,0 +1,138 @@
+"""
+Load test API rekomendasi keranjang (/api/rekomendasi)
+
+Rules sintetis disimpan sebagai run MBA di database sementara, lalu server
+HTTP lokal (threaded) menerima permintaan dari beberapa klien dengan laju
+tetap. Dilaporkan throughput dan latensi p50/p95/p99 dari sisi klien dan
+di dalam handler, latensi RuleIndex.recommend saja, serta waktu membangun
+index. Klien dan server berjalan di proses yang sama, sehingga latensi sisi
+klien juga memuat waktu tunggu GIL.
+
+Contoh:
+    python benchmarks/bench_recommendation.py --rules 20000 --rate 300 --duration 10
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+from werkzeug.serving import make_server
+
+from common import make_app
+from controllers.recommendation_controller import recommend_for_basket, get_rule_index
+from controllers.result_controller import save_rules
+
+def make_rules(n_rules, n_products=300, seed=0):
+    """Rules sintetis: antecedent 1-3 item dan consequent 1 item, popularitas produk Zipf"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_products + 1)
+    weights /= weights.sum()
+    
+    antecedents, consequents = [], []
+    for size in rng.integers(1, 4, n_rules):
+        items = rng.choice(n_products, size=size + 1, replace=False, p=weights)
+        antecedents.append(frozenset(f'Produk {i}' for i in items[:-1]))
+        consequents.append(frozenset({f'Produk {items[-1]}'}))
+    
+    return pd.DataFrame({
+        'antecedents': antecedents,
+        'consequents': consequents,
+        'support': rng.random(n_rules) * 0.05,
+        'confidence': rng.random(n_rules),
+        'lift': 1 + rng.random(n_rules) * 4
+    }), weights
+
+def make_baskets(n_baskets, weights, seed=1):
+    """Keranjang acak 1-6 produk dengan popularitas yang sama seperti rules"""
+    rng = np.random.default_rng(seed)
+    return [
+        [f'Produk {i}' for i in rng.choice(len(weights), size=size, replace=False, p=weights)]
+        for size in rng.integers(1, 7, n_baskets)
+    ]
+
+def percentiles(latencies):
+    values = np.array(latencies) * 1e3
+    return {name: np.percentile(values, q) for name, q in (('p50', 50), ('p95', 95), ('p99', 99))} | {'max': values.max()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, default=20000)
+    parser.add_argument('--rate', type=int, default=300, help='Permintaan per detik (total)')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+    
+    app = make_app()
+    
+    # Waktu di dalam handler (tanpa antrian dan overhead HTTP klien/server)
+    handler_latencies = []
+    
+    @app.route('/api/rekomendasi', methods=['POST'])
+    def api_rekomendasi():
+        start = time.perf_counter()
+        source = request.get_json()
+        response = jsonify(recommend_for_basket(source['basket'], source.get('customer_id')))
+        handler_latencies.append(time.perf_counter() - start)
+        return response
+    
+    rules, weights = make_rules(args.rules)
+    baskets = make_baskets(10000, weights)
+    
+    with app.app_context():
+        save_rules(rules, {'bench': True})
+        start = time.perf_counter()
+        _, index = get_rule_index()
+        print(f'Index {len(index)} rules dibangun dalam {(time.perf_counter() - start) * 1e3:.1f} ms')
+    
+    latencies = []
+    for basket in baskets:
+        start = time.perf_counter()
+        index.recommend(basket)
+        latencies.append(time.perf_counter() - start)
+    stats = percentiles(latencies)
+    print('RuleIndex.recommend  ' + '  '.join(f'{name}={value:.3f} ms' for name, value in stats.items()))
+    
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/api/rekomendasi'
+    
+    def client(number):
+        # Laju tetap per klien: permintaan ke-i dijadwalkan pada start + i * interval
+        interval = args.clients / args.rate
+        results = []
+        start = time.perf_counter()
+        i = 0
+        while time.perf_counter() - start < args.duration:
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            body = json.dumps({'basket': baskets[(number * 7919 + i) % len(baskets)]}).encode()
+            req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+            sent = time.perf_counter()
+            with urllib.request.urlopen(req) as response:
+                response.read()
+            results.append(time.perf_counter() - sent)
+            i += 1
+        return results
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        latencies = [latency for results in pool.map(client, range(args.clients)) for latency in results]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    
+    stats = percentiles(latencies)
+    print(f'HTTP {len(latencies)} permintaan, {len(latencies) / elapsed:.0f} req/s (target {args.rate})')
+    print('HTTP latensi         ' + '  '.join(f'{name}={value:.3f} ms' for name, value in stats.items()))
+    stats = percentiles(handler_latencies)
+    print('Handler              ' + '  '.join(f'{name}={value:.3f} ms' for name, value in stats.items()))
+
+if __name__ == '__main__':
+    main()
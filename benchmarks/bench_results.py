@@ -0,0 +1,101 @@
+"""
+Benchmark penyimpanan hasil analisis: jalur lama (hapus tabel lalu
+session.add per baris) dibandingkan result writer (insert batch ke run
+staging lalu flip)
+
+Contoh:
+    python benchmarks/bench_results.py --rules 50000 --customers 300000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import make_app, timer
+from models import db
+from models.transaksi import AturanAsosiasi, SegmentasiPelanggan
+from controllers.result_controller import save_rules, save_segments, active_results
+from utils.apriori import format_itemset
+
+def make_rules(n_rules, seed=0):
+    """DataFrame rules sintetis dengan format hasil generate_rules"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'antecedents': [frozenset({f'Produk {i % 300}', f'Produk {(i * 3) % 300}'}) for i in range(n_rules)],
+        'consequents': [frozenset({f'Produk {(i * 7) % 300}'}) for i in range(n_rules)],
+        'support': rng.random(n_rules),
+        'confidence': rng.random(n_rules),
+        'lift': rng.random(n_rules) * 5
+    })
+
+def make_segments(n_customers, seed=0):
+    """DataFrame segmentasi sintetis dengan format hasil kmeans_clustering"""
+    rng = np.random.default_rng(seed)
+    labels = np.array(['Best Customers', 'Potential Customers', 'Lost Customers'])
+    clusters = rng.integers(0, 3, n_customers)
+    return pd.DataFrame({
+        'customer_id': [f'C{i}' for i in range(n_customers)],
+        'Recency': rng.integers(0, 365, n_customers),
+        'Frequency': rng.integers(1, 50, n_customers),
+        'Monetary': rng.random(n_customers) * 1e6,
+        'Cluster': clusters,
+        'Cluster_Label': labels[clusters]
+    })
+
+def legacy_save_rules(rules):
+    """Salinan jalur simpan rules lama sebagai pembanding"""
+    AturanAsosiasi.query.delete()
+    for _, row in rules.iterrows():
+        db.session.add(AturanAsosiasi(
+            antecedents=format_itemset(row['antecedents']),
+            consequents=format_itemset(row['consequents']),
+            support=float(row['support']),
+            confidence=float(row['confidence']),
+            lift=float(row['lift'])
+        ))
+    db.session.commit()
+
+def legacy_save_segments(rfm_clustered):
+    """Salinan jalur simpan segmentasi lama sebagai pembanding"""
+    SegmentasiPelanggan.query.delete()
+    for _, row in rfm_clustered.iterrows():
+        db.session.add(SegmentasiPelanggan(
+            customer_id=row['customer_id'],
+            recency=int(row['Recency']),
+            frequency=int(row['Frequency']),
+            monetary=float(row['Monetary']),
+            cluster=int(row['Cluster']),
+            cluster_label=row['Cluster_Label']
+        ))
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, default=50000)
+    parser.add_argument('--customers', type=int, default=300000)
+    args = parser.parse_args()
+    
+    rules = make_rules(args.rules)
+    segments = make_segments(args.customers)
+    
+    app = make_app()
+    with app.app_context():
+        with timer(f'lama: rules ({args.rules})'):
+            legacy_save_rules(rules)
+        with timer(f'lama: segmentasi ({args.customers})'):
+            legacy_save_segments(segments)
+    
+    app = make_app()
+    with app.app_context():
+        # Dua kali: run kedua juga mencakup penghapusan run sebelumnya
+        for attempt in (1, 2):
+            with timer(f'writer: rules ({args.rules}) #{attempt}'):
+                save_rules(rules)
+            with timer(f'writer: segmentasi ({args.customers}) #{attempt}'):
+                save_segments(segments)
+        
+        assert active_results('mba').count() == args.rules
+        assert active_results('segmentasi').count() == args.customers
+
+if __name__ == '__main__':
+    main()
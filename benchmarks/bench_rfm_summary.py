@@ -0,0 +1,90 @@
+"""
+Benchmark ringkasan RFM tersimpan dibandingkan GROUP BY tabel transaksi
+
+Diukur:
+- RFM seluruh pelanggan: GROUP BY transaksi vs membaca ringkasan_rfm
+- Biaya tambahan per batch upload untuk memperbarui ringkasan (agregat berjalan)
+- Snapshot harian: snapshot dasar (semua pelanggan) vs snapshot hari
+  berikutnya yang hanya menyimpan pelanggan berubah, serta menyusun kondisi
+  satu tanggal dari baris snapshot
+
+Contoh:
+    python benchmarks/bench_rfm_summary.py --rows 1000000 --batch 20000
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+from common import fill_database, generate_transactions, timer
+from models import db
+from models.transaksi import SnapshotRfm
+from controllers.data_controller import get_rfm_dataframe, prepare_transactions, bulk_insert_transactions
+from controllers.rfm_controller import (
+    rebuild_rfm_summary, get_rfm_summary, get_rfm_snapshot, maintain_rfm_summary, take_rfm_snapshot,
+    check_rfm_summary
+)
+
+def insert_batch(batch, changed=None, maintain=True):
+    if maintain:
+        with maintain_rfm_summary(batch, changed):
+            bulk_insert_transactions(batch, 5000)
+    else:
+        bulk_insert_transactions(batch, 5000)
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=20000, help='Jumlah baris per batch upload')
+    args = parser.parse_args()
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='natura_rfm_'), 'bench.db')
+    app = fill_database(db_path, args.rows)
+    
+    # Batch upload baru: pelanggan sama dengan data awal, transaction_id baru
+    batches = []
+    for seed in (101, 102):
+        part = generate_transactions(args.batch, n_customers=max(10, args.rows // 20), seed=seed)
+        part['transaction_id'] = part['transaction_id'] + f'-{seed}'
+        batches.append(prepare_transactions(part)[0])
+    
+    with app.app_context():
+        with timer('RFM: GROUP BY tabel transaksi'):
+            raw = get_rfm_dataframe(start_date='1900-01-01')
+        with timer('ringkasan: bangun ulang (sekali)'):
+            rebuild_rfm_summary()
+            db.session.commit()
+        with timer('RFM: baca ringkasan_rfm'):
+            summary = get_rfm_summary()
+        print(f'{len(raw)} pelanggan, hasil sama: {raw.drop(columns="Recency").equals(summary.drop(columns="Recency"))}')
+        
+        with timer(f'upload {args.batch} baris tanpa ringkasan'):
+            insert_batch(batches[0], maintain=False)
+        rebuild_rfm_summary()
+        db.session.commit()
+        
+        today = date.today()
+        with timer('snapshot dasar (semua pelanggan)'):
+            take_rfm_snapshot(tanggal=today - timedelta(days=1))
+            db.session.commit()
+        
+        changed = set()
+        with timer(f'upload {args.batch} baris + ringkasan inkremental'):
+            insert_batch(batches[1], changed)
+        with timer(f'snapshot: {len(changed)} pelanggan berubah'):
+            take_rfm_snapshot(changed, tanggal=today)
+            db.session.commit()
+        print(f'baris snapshot hari ini: {SnapshotRfm.query.filter(SnapshotRfm.tanggal == today).count()}')
+        
+        with timer('susun kondisi hari ini dari snapshot'):
+            snapshot = get_rfm_snapshot(today)
+        reference = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        print(f'snapshot sama dengan ringkasan: {snapshot.equals(get_rfm_summary(reference))}')
+        
+        print(f'ringkasan konsisten: {check_rfm_summary() == 0}')
+    
+    os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
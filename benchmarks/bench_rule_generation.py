@@ -0,0 +1,96 @@
+"""
+Benchmark pembentukan association rules: association_rules mlxtend (semua
+rules dibuat lalu difilter, cara lama) dibandingkan generate_rules dengan
+batas top-K, rules per antecedent, dan panjang rule
+
+Transaksi sintetis memuat beberapa "paket" produk yang sering dibeli
+bersama, sehingga pada min_support rendah jumlah kandidat rules meledak.
+Dilaporkan waktu dan peak memori (tracemalloc, diukur pada jalan terpisah).
+
+Contoh:
+    python benchmarks/bench_rule_generation.py --transactions 100000 --min-support 0.002 --top-k 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+import common  # noqa: F401 - path modul aplikasi
+from utils.apriori import generate_rules
+from utils.frequent_itemsets import mine_frequent_itemsets
+
+def make_transactions(n_transactions, n_products=500, n_bundles=20, bundle_size=8, seed=0):
+    """Keranjang acak ditambah potongan paket produk (sumber itemset panjang)"""
+    rng = np.random.default_rng(seed)
+    bundles = [rng.choice(n_products, size=bundle_size, replace=False) for _ in range(n_bundles)]
+    transactions = []
+    for _ in range(n_transactions):
+        basket = set(rng.choice(n_products, size=rng.integers(1, 4)).tolist())
+        if rng.random() < 0.3:
+            bundle = bundles[rng.integers(n_bundles)]
+            basket.update(bundle[rng.random(bundle_size) < 0.7].tolist())
+        transactions.append([f'Produk {item}' for item in basket])
+    return transactions
+
+def legacy_rules(frequent_itemsets, min_confidence):
+    """Salinan generate_rules lama (mlxtend association_rules)"""
+    from mlxtend.frequent_patterns import association_rules
+    
+    rules = association_rules(frequent_itemsets, metric='confidence', min_threshold=min_confidence)
+    rules = rules[rules['lift'] > 1.0].sort_values('confidence', ascending=False)
+    return rules[['antecedents', 'consequents', 'support', 'confidence', 'lift']].copy()
+
+def measure(fn):
+    """Waktu (tanpa tracemalloc, yang memperlambat alokasi objek Python) dan peak memori, dua kali jalan"""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    del result
+    
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=100000)
+    parser.add_argument('--min-support', type=float, default=0.002)
+    parser.add_argument('--min-confidence', type=float, default=0.1)
+    parser.add_argument('--top-k', type=int, default=1000)
+    parser.add_argument('--max-per-antecedent', type=int, default=5)
+    parser.add_argument('--max-len', type=int, default=4)
+    parser.add_argument('--skip-legacy', action='store_true', help='Lewati mlxtend jika memori tidak cukup')
+    args = parser.parse_args()
+    
+    warnings.simplefilter('ignore', DeprecationWarning)
+    
+    transactions = make_transactions(args.transactions)
+    frequent_itemsets = mine_frequent_itemsets(transactions, args.min_support)
+    print(f'{len(transactions)} transaksi, {len(frequent_itemsets)} frequent itemset '
+          f'(terpanjang {frequent_itemsets["itemsets"].map(len).max()})\n')
+    
+    variants = {
+        'generate_rules (semua)': lambda: generate_rules(frequent_itemsets, args.min_confidence),
+        f'top_k={args.top_k}': lambda: generate_rules(frequent_itemsets, args.min_confidence, top_k=args.top_k),
+        f'top_k + {args.max_per_antecedent}/antecedent': lambda: generate_rules(
+            frequent_itemsets, args.min_confidence, top_k=args.top_k, max_per_antecedent=args.max_per_antecedent),
+        f'top_k + max_len={args.max_len}': lambda: generate_rules(
+            frequent_itemsets, args.min_confidence, top_k=args.top_k, max_len=args.max_len)
+    }
+    if not args.skip_legacy:
+        variants = {'mlxtend association_rules': lambda: legacy_rules(frequent_itemsets, args.min_confidence), **variants}
+    
+    print(f"{'varian':<32} {'rules':>10} {'waktu (s)':>10} {'peak (MB)':>10}")
+    for name, fn in variants.items():
+        rules, elapsed, peak = measure(fn)
+        print(f'{name:<32} {len(rules):>10} {elapsed:>10.2f} {peak:>10.1f}')
+
+if __name__ == '__main__':
+    main()
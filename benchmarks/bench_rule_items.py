@@ -0,0 +1,53 @@
+"""
+Benchmark pencarian "semua rules yang melibatkan produk X": LIKE atas string
+antecedents/consequents (jalur lama) dibandingkan tabel item_aturan ber-index
+
+Contoh:
+    python benchmarks/bench_rule_items.py --rules 50000 100000
+"""
+import argparse
+import time
+
+from common import make_app, timer
+from bench_recommendation import make_rules
+from models import db
+from models.transaksi import AturanAsosiasi
+from controllers.result_controller import save_rules, rules_for_product
+from utils.apriori import parse_itemset
+
+def legacy_rules_for_product(product, run_id):
+    """Jalur lama: LIKE lalu pisahkan string untuk membuang kecocokan sebagian (mis. 'Produk 4' di 'Produk 42')"""
+    pattern = f'%{product}%'
+    rows = AturanAsosiasi.query.filter(
+        AturanAsosiasi.run_id == run_id,
+        db.or_(AturanAsosiasi.antecedents.like(pattern), AturanAsosiasi.consequents.like(pattern))
+    ).order_by(AturanAsosiasi.lift.desc()).all()
+    return [row for row in rows if product in parse_itemset(row.antecedents) | parse_itemset(row.consequents)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, nargs='+', default=[50000, 100000])
+    parser.add_argument('--queries', type=int, default=100)
+    args = parser.parse_args()
+    
+    for n_rules in args.rules:
+        app = make_app()
+        rules, _ = make_rules(n_rules)
+        products = [f'Produk {i}' for i in range(0, 300, 300 // args.queries or 1)][:args.queries]
+        
+        with app.app_context():
+            print(f'--- {n_rules} rules ---')
+            with timer('save_rules (rules + item_aturan)'):
+                run_id = save_rules(rules)
+            
+            results = {}
+            for label, lookup in (('LIKE + split string', legacy_rules_for_product), ('item_aturan (index)', rules_for_product)):
+                start = time.perf_counter()
+                results[label] = [len(lookup(product, run_id)) for product in products]
+                elapsed = (time.perf_counter() - start) / len(products)
+                print(f'{label:<45} {elapsed * 1e3:10.2f} ms/produk')
+            
+            assert results['LIKE + split string'] == results['item_aturan (index)']
+
+if __name__ == '__main__':
+    main()
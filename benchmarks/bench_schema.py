@@ -0,0 +1,140 @@
+"""
+Benchmark query tiap halaman sebelum dan sesudah tuning skema
+
+Mode 'lama' menghapus semua index selain primary key dan memakai pragma
+SQLite bawaan (journal DELETE). Mode 'baru' menjalankan upgrade_schema()
+dengan index dan pragma dari models/schema.py. Setiap mode dijalankan di
+subprocess terpisah pada database yang sama.
+
+Contoh:
+    python benchmarks/bench_schema.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import fill_database, make_app
+from models import db
+from models.schema import SQLITE_PRAGMAS, upgrade_schema
+from models.transaksi import Transaksi, AturanAsosiasi, SegmentasiPelanggan
+
+LABELS = ['Best Customers', 'Potential Customers', 'Lost Customers']
+
+def seed_results(n_rules, seed=0):
+    """Isi tabel aturan_asosiasi dan segmentasi_pelanggan dengan data sintetis"""
+    rng = np.random.default_rng(seed)
+    customers = [c for (c,) in db.session.query(Transaksi.customer_id).distinct()]
+    
+    db.session.execute(AturanAsosiasi.__table__.insert(), [{
+        'antecedents': f'Produk {i % 200}', 'consequents': f'Produk {(i * 7) % 200}',
+        'support': float(rng.random()), 'confidence': float(rng.random()), 'lift': float(rng.random() * 5)
+    } for i in range(n_rules)])
+    
+    db.session.execute(SegmentasiPelanggan.__table__.insert(), [{
+        'customer_id': customer, 'recency': int(rng.integers(0, 365)), 'frequency': int(rng.integers(1, 50)),
+        'monetary': float(rng.random() * 1e6), 'cluster': i % 3, 'cluster_label': LABELS[i % 3]
+    } for i, customer in enumerate(customers)])
+    db.session.commit()
+
+def page_queries():
+    """Query yang dijalankan oleh setiap halaman / proses"""
+    from controllers.data_controller import get_transactions_page, get_rfm_dataframe, get_transactions_dataframe
+    from controllers.mining_controller import load_baskets
+    from controllers.statistics_controller import compute_statistics
+    
+    sample = Transaksi.query.filter(Transaksi.id % 997 == 0).limit(1000).all()
+    customer_id = sample[0].customer_id
+    product = sample[0].product
+    transaction_ids = [t.transaction_id for t in sample]
+    
+    def segment_preview():
+        for label in LABELS:
+            query = SegmentasiPelanggan.query.filter_by(cluster_label=label)
+            query.order_by(SegmentasiPelanggan.customer_id).limit(10).all()
+            query.count()
+    
+    # (label, fungsi, jumlah pengulangan)
+    return [
+        ('dashboard: hitung ulang statistik', compute_statistics, 1),
+        ('data_transaksi: filter customer', lambda: get_transactions_page({'customer_id': customer_id}), 10),
+        ('data_transaksi: filter produk', lambda: get_transactions_page({'product': product}), 10),
+        ('upload/hapus: 1000 keranjang', lambda: load_baskets(transaction_ids), 3),
+        ('segmentasi: RFM GROUP BY', get_rfm_dataframe, 1),
+        ('analisis_mba: muat keranjang', lambda: get_transactions_dataframe(['transaction_id', 'product']), 1),
+        ('rekomendasi: 10 rules (lift)', lambda: AturanAsosiasi.query.order_by(AturanAsosiasi.lift.desc()).limit(10).all(), 10),
+        ('rekomendasi: preview segmen', segment_preview, 10)
+    ]
+
+def run_child(db_path, mode):
+    """Ukur semua query pada satu mode lalu cetak hasil sebagai JSON"""
+    if mode == 'lama':
+        SQLITE_PRAGMAS.clear()
+        SQLITE_PRAGMAS['journal_mode'] = 'DELETE'
+    
+    app = make_app(db_path)
+    results = {}
+    with app.app_context():
+        if mode == 'lama':
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    db.session.execute(db.text(f'DROP INDEX IF EXISTS {index.name}'))
+            db.session.commit()
+        else:
+            upgrade_schema()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        
+        for label, fn, repeat in page_queries():
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            results[label] = best * 1000
+    
+    print(json.dumps(results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--rules', type=int, default=20000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.mode)
+        return
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='natura_schema_'), 'bench.db')
+    app = fill_database(db_path, args.rows)
+    with app.app_context():
+        seed_results(args.rules)
+        # Tutup koneksi agar subprocess bisa mengganti journal_mode
+        db.engine.dispose()
+    
+    timings = {}
+    for mode in ('lama', 'baru'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', db_path, '--mode', mode],
+            check=True, capture_output=True, text=True
+        ).stdout
+        timings[mode] = json.loads(output.strip().splitlines()[-1])
+    
+    print(f"{'query':<36} {'lama (ms)':>12} {'baru (ms)':>12} {'speedup':>9}")
+    for label, old in timings['lama'].items():
+        new = timings['baru'][label]
+        print(f'{label:<36} {old:>12.1f} {new:>12.1f} {old / new:>8.1f}x')
+    
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark MBA bercakupan: filter di database vs memuat seluruh transaksi
+
+Dibandingkan dua pola:
+- Satu segmen: muat hanya transaksi segmen (JOIN segmentasi di SQL) vs
+  muat seluruh transaksi lalu saring di pandas, keduanya lalu Eclat
+- Semua segmen: satu pembacaan tabel + satu encoding lalu mining per baris
+  segmen (run_segment_mba) vs satu query JOIN + encoding per segmen
+
+Segmentasi K-Means dijalankan sekali sebelum pengukuran. Setiap varian
+dijalankan di subprocess terpisah agar peak RSS tidak tercampur.
+
+Contoh:
+    python benchmarks/bench_scoped_mining.py --rows 1000000 --clusters 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import make_app, fill_database, peak_rss_mb
+
+MIN_SUPPORT = 0.01
+
+def _segment_labels():
+    from models import db
+    from models.transaksi import SegmentasiPelanggan
+    from controllers.result_controller import get_active_run_id
+    
+    run_id = get_active_run_id('segmentasi')
+    labels = db.session.query(SegmentasiPelanggan.cluster_label).filter(
+        SegmentasiPelanggan.run_id == run_id
+    ).distinct().order_by(SegmentasiPelanggan.cluster_label)
+    return run_id, [label for (label,) in labels]
+
+def _mine(df):
+    from controllers.data_controller import get_product_names
+    from utils.frequent_itemsets import encode_codes, mine_encoded_itemsets
+    
+    matrix, items = encode_codes(df['transaction_id'].values, df['produk_id'].values, get_product_names())
+    return len(mine_encoded_itemsets(matrix, items, MIN_SUPPORT, 'eclat'))
+
+def one_segment_sql():
+    from controllers.data_controller import get_transactions_dataframe
+    
+    run_id, labels = _segment_labels()
+    df = get_transactions_dataframe(columns=['transaction_id', 'produk_id'], segment_run_id=run_id,
+                                    segments=[labels[0]])
+    return _mine(df)
+
+def one_segment_pandas():
+    """Muat seluruh transaksi beserta customer_id, lalu saring pelanggan segmen di pandas"""
+    from models import db
+    from models.transaksi import SegmentasiPelanggan
+    from controllers.data_controller import get_transactions_dataframe
+    
+    run_id, labels = _segment_labels()
+    customers = [customer_id for (customer_id,) in db.session.query(SegmentasiPelanggan.customer_id).filter(
+        SegmentasiPelanggan.run_id == run_id, SegmentasiPelanggan.cluster_label == labels[0]
+    )]
+    df = get_transactions_dataframe(columns=['transaction_id', 'customer_id', 'produk_id'])
+    return _mine(df[df['customer_id'].isin(customers)])
+
+def all_segments_batch():
+    """Pola run_segment_mba: segmen dipetakan dari pelanggan_id, satu encoding"""
+    from controllers.data_controller import get_transactions_dataframe, get_product_names, get_customer_segments
+    from utils.frequent_itemsets import encode_codes, mine_encoded_itemsets
+    
+    run_id, _ = _segment_labels()
+    labels, customer_segments = get_customer_segments(run_id)
+    df = get_transactions_dataframe(columns=['transaction_id', 'produk_id', 'pelanggan_id'])
+    segments = customer_segments[df['pelanggan_id'].values]
+    df = df[segments >= 0]
+    rows, _ = pd.factorize(df['transaction_id'])
+    matrix, items = encode_codes(rows, df['produk_id'].values, get_product_names())
+    row_segments = np.empty(matrix.shape[0], dtype=np.int32)
+    row_segments[rows] = segments[segments >= 0]
+    del df, rows
+    
+    return sum(len(mine_encoded_itemsets(matrix[row_segments == number], items, MIN_SUPPORT, 'eclat'))
+               for number in range(len(labels)))
+
+def all_segments_loop():
+    from controllers.data_controller import get_transactions_dataframe
+    
+    run_id, labels = _segment_labels()
+    return sum(_mine(get_transactions_dataframe(columns=['transaction_id', 'produk_id'], segment_run_id=run_id,
+                                                segments=[label]))
+               for label in labels)
+
+VARIANTS = {
+    'segmen (filter SQL)': one_segment_sql,
+    'segmen (muat semua)': one_segment_pandas,
+    'semua (batch)': all_segments_batch,
+    'semua (per segmen)': all_segments_loop
+}
+
+def run_child(db_path, variant):
+    """Jalankan satu varian di proses ini lalu cetak hasil sebagai JSON"""
+    app = make_app(db_path)
+    # Import modul aplikasi di luar pengukuran
+    import controllers.data_controller  # noqa: F401
+    import utils.frequent_itemsets  # noqa: F401
+    
+    with app.app_context():
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        count = VARIANTS[variant]()
+        elapsed = time.perf_counter() - start
+    
+    print(json.dumps({'count': count, 'seconds': elapsed, 'delta_rss_mb': peak_rss_mb() - baseline}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--clusters', type=int, default=4)
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.variant)
+        return
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='natura_scoped_'), 'bench.db')
+    fill_database(db_path, args.rows)
+    
+    from controllers.analysis_controller import run_segmentation_analysis
+    with make_app(db_path).app_context():
+        result = run_segmentation_analysis(args.clusters)
+    if 'error' in result:
+        sys.exit(result['error'])
+    
+    print(f"{'varian':<22} {'itemset':>10} {'waktu (s)':>10} {'+RSS (MB)':>10}")
+    for variant in args.variants:
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', db_path, '--variant', variant],
+            check=True, capture_output=True, text=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{variant:<22} {stats['count']:>10} {stats['seconds']:>10.2f} {stats['delta_rss_mb']:>10.1f}")
+    
+    os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
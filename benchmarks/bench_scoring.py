@@ -0,0 +1,56 @@
+"""
+Benchmark skor segmen dengan model tersimpan (SegmentModel)
+
+Membandingkan skor satu pelanggan dengan SegmentModel.score terhadap
+Pipeline.predict scikit-learn, serta skor batch dengan score_batch.
+Juga memeriksa bahwa segmen hasil skor sama dengan hasil clustering.
+
+Contoh:
+    python benchmarks/bench_scoring.py --customers 100000 --clusters 3 5
+"""
+import argparse
+import json
+import time
+
+import common  # noqa: F401 - sys.path untuk modul aplikasi
+from bench_clustering import make_rfm
+from utils.clustering import kmeans_clustering, SegmentModel, RFM_COLUMNS
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--clusters', type=int, nargs='+', default=[3, 5])
+    parser.add_argument('--singles', type=int, default=2000)
+    args = parser.parse_args()
+    
+    rfm = make_rfm(args.customers)
+    rows = rfm[RFM_COLUMNS].head(args.singles).values.tolist()
+    
+    print(f"{'K':>2} {'backend':<10} {'sklearn (us)':>13} {'score (us)':>11} {'batch (ms)':>11} {'segmen sama':>12}")
+    for n_clusters in args.clusters:
+        for backend in ('kmeans', 'minibatch'):
+            result, pipeline = kmeans_clustering(rfm, n_clusters, backend=backend)
+            # Lewat JSON seperti artefak yang disimpan di database
+            model = SegmentModel.from_artifact(json.loads(json.dumps(
+                SegmentModel.from_pipeline(pipeline).to_artifact()
+            )))
+            
+            start = time.perf_counter()
+            for row in rows[:200]:
+                pipeline.predict([row])
+            sklearn_us = (time.perf_counter() - start) / min(len(rows), 200) * 1e6
+            
+            start = time.perf_counter()
+            for row in rows:
+                model.score(*row)
+            score_us = (time.perf_counter() - start) / len(rows) * 1e6
+            
+            start = time.perf_counter()
+            scored = model.score_batch(rfm)
+            batch_ms = (time.perf_counter() - start) * 1e3
+            
+            same = (scored['Cluster_Label'] == result['Cluster_Label']).mean() * 100
+            print(f'{n_clusters:>2} {backend:<10} {sklearn_us:>13.1f} {score_us:>11.1f} {batch_ms:>11.1f} {same:>11.1f}%')
+
+if __name__ == '__main__':
+    main()
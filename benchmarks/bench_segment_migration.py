@@ -0,0 +1,99 @@
+"""
+Benchmark laporan perpindahan segmen antara dua run segmentasi
+
+Dibandingkan:
+- JOIN + GROUP BY di database (segment_migration)
+- Muat kedua run ke pandas lalu merge + crosstab
+- Query segmen run tujuan per pelanggan (loop Python), diukur pada sampel
+  lalu diekstrapolasi ke seluruh pelanggan
+
+Contoh:
+    python benchmarks/bench_segment_migration.py --customers 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import make_app, timer
+from models import db
+from models.transaksi import SegmentasiPelanggan
+from controllers.result_controller import save_segments
+from controllers.migration_controller import segment_migration, migration_customers
+
+LABELS = np.array(['Best Customers', 'Potential Customers', 'Lost Customers'])
+LOOP_SAMPLE = 2000
+
+def make_run(customer_numbers, rng):
+    clusters = rng.integers(0, len(LABELS), len(customer_numbers))
+    n = len(customer_numbers)
+    return pd.DataFrame({
+        'customer_id': [f'C{i:07d}' for i in customer_numbers],
+        'Recency': rng.integers(0, 365, n),
+        'Frequency': rng.integers(1, 50, n),
+        'Monetary': rng.random(n) * 1e6,
+        'Cluster': clusters,
+        'Cluster_Label': LABELS[clusters]
+    })
+
+def pandas_migration(from_run, to_run):
+    frames = [
+        pd.read_sql(
+            db.session.query(SegmentasiPelanggan.customer_id, SegmentasiPelanggan.cluster_label)
+            .filter(SegmentasiPelanggan.run_id == run_id).statement,
+            db.session.connection()
+        )
+        for run_id in (from_run, to_run)
+    ]
+    merged = frames[0].merge(frames[1], on='customer_id', suffixes=('_asal', '_tujuan'))
+    return pd.crosstab(merged['cluster_label_asal'], merged['cluster_label_tujuan'])
+
+def loop_migration(from_run, to_run, limit):
+    counts = {}
+    rows = db.session.query(SegmentasiPelanggan.customer_id, SegmentasiPelanggan.cluster_label).filter(
+        SegmentasiPelanggan.run_id == from_run
+    ).limit(limit).all()
+    for customer_id, label in rows:
+        target = db.session.query(SegmentasiPelanggan.cluster_label).filter(
+            SegmentasiPelanggan.run_id == to_run, SegmentasiPelanggan.customer_id == customer_id
+        ).scalar()
+        if target is not None:
+            counts[(label, target)] = counts.get((label, target), 0) + 1
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    n = args.customers
+    app = make_app()
+    with app.app_context():
+        # Run kedua: 95% pelanggan lama (sebagian pindah segmen) + 5% pelanggan baru
+        from_run = save_segments(make_run(np.arange(n), rng), {'bench': 1})
+        to_run = save_segments(make_run(np.arange(n // 20, n + n // 20), rng), {'bench': 2})
+        
+        with timer('JOIN + GROUP BY di database'):
+            result = segment_migration(from_run, to_run)
+        print(f"  tetap {result['stayed']}, pindah {result['moved']}, baru {sum(result['new'].values())}, "
+              f"hilang {sum(result['lost'].values())}")
+        
+        with timer('pandas merge + crosstab'):
+            matrix = pandas_migration(from_run, to_run)
+        same = all(int(matrix.loc[a, b]) == result['matrix'][a][b] for a in matrix.index for b in matrix.columns)
+        print(f'  matriks sama: {same}')
+        
+        start = time.perf_counter()
+        loop_migration(from_run, to_run, LOOP_SAMPLE)
+        elapsed = (time.perf_counter() - start) * n / LOOP_SAMPLE
+        print(f"{'query per pelanggan (ekstrapolasi)':<45} {elapsed:10.3f} s")
+        
+        with timer('daftar pelanggan Best -> Lost (100 pertama)'):
+            migration_customers('Best Customers', 'Lost Customers', from_run, to_run)
+        with timer('daftar pelanggan baru (100 pertama)'):
+            migration_customers(None, 'Best Customers', from_run, to_run)
+
+if __name__ == '__main__':
+    main()
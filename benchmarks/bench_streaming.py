@@ -0,0 +1,78 @@
+"""
+Benchmark peak memory (RSS) upload streaming untuk berbagai ukuran file
+
+Setiap ukuran file diimport di subprocess terpisah agar peak RSS tidak
+tercampur. Peak RSS seharusnya relatif konstan walaupun jumlah baris naik.
+
+Contoh:
+    python benchmarks/bench_streaming.py --rows 250000 1000000 2000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import generate_transactions
+
+def write_csv(path, n_rows, part_size=250000):
+    """Tulis CSV sintetis bertahap agar proses induk juga hemat memori"""
+    written = 0
+    seed = 0
+    with open(path, 'w') as f:
+        while written < n_rows:
+            part = generate_transactions(min(part_size, n_rows - written), seed=seed)
+            # Buat transaction_id unik antar bagian
+            part['transaction_id'] = part['transaction_id'] + f'-{seed}'
+            part.to_csv(f, index=False, header=(written == 0))
+            written += len(part)
+            seed += 1
+
+def run_child(csv_path, chunk_size):
+    """Import satu file di proses ini lalu cetak hasil sebagai JSON"""
+    from werkzeug.datastructures import FileStorage
+    from common import make_app, peak_rss_mb
+    from controllers.data_controller import upload_data
+    
+    app = make_app()
+    upload_folder = tempfile.mkdtemp(prefix='natura_upload_')
+    
+    with app.app_context(), open(csv_path, 'rb') as stream:
+        start = time.perf_counter()
+        result = upload_data(FileStorage(stream=stream, filename='data.csv'), upload_folder,
+                             {'csv', 'xlsx'}, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+    
+    print(json.dumps({'result': result.get('success', result.get('error')),
+                      'seconds': elapsed, 'peak_rss_mb': peak_rss_mb()}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[250000, 1000000, 2000000])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.chunk_size)
+        return
+    
+    workdir = tempfile.mkdtemp(prefix='natura_stream_')
+    print(f"{'baris':>10} {'ukuran (MB)':>12} {'waktu (s)':>10} {'peak RSS (MB)':>14}")
+    for n_rows in args.rows:
+        csv_path = os.path.join(workdir, f'data_{n_rows}.csv')
+        write_csv(csv_path, n_rows)
+        size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', csv_path, '--chunk-size', str(args.chunk_size)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{n_rows:>10} {size_mb:>12.1f} {stats['seconds']:>10.2f} {stats['peak_rss_mb']:>14.1f}")
+        os.remove(csv_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Utilitas bersama untuk skrip benchmark
+
+Semua benchmark memakai database SQLite sementara dan data transaksi sintetis,
+sehingga tidak menyentuh database aplikasi (natura_boga.db).
+"""
+import os
+import sys
+import time
+import tempfile
+import resource
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Agar modul aplikasi (models, controllers, utils) bisa diimport
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from models import db
+import models.transaksi  # noqa: F401 - daftarkan tabel ke metadata
+
+def make_app(db_path=None):
+    """
+    Buat aplikasi Flask minimal dengan database SQLite sementara
+    
+    Args:
+        db_path: Path file database (default: file baru di direktori temp)
+    
+    Returns:
+        Flask app yang tabelnya sudah dibuat
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='natura_bench_'), 'bench.db')
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+    
+    return app
+
+def generate_transactions(n_rows, n_products=200, n_customers=None, seed=42):
+    """
+    Buat DataFrame transaksi sintetis dengan pola keranjang belanja sederhana
+    
+    Args:
+        n_rows: Jumlah baris (item) transaksi
+        n_products: Jumlah produk berbeda
+        n_customers: Jumlah pelanggan berbeda (default: n_rows // 20)
+        seed: Random seed
+    
+    Returns:
+        DataFrame dengan kolom format upload
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(10, n_rows // 20)
+    
+    # Rata-rata 3 item per keranjang
+    basket_sizes = rng.integers(1, 6, size=n_rows)
+    basket_ids = np.repeat(np.arange(len(basket_sizes)), basket_sizes)[:n_rows]
+    n_baskets = basket_ids.max() + 1
+    
+    # Popularitas produk mengikuti distribusi Zipf agar ada itemset yang sering muncul
+    weights = 1.0 / np.arange(1, n_products + 1)
+    weights /= weights.sum()
+    products = rng.choice(n_products, size=n_rows, p=weights)
+    
+    basket_customer = rng.integers(0, n_customers, size=n_baskets)
+    basket_date = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 86400, size=n_baskets), unit='s')
+    quantity = rng.integers(1, 4, size=n_rows)
+    price = rng.choice([5000.0, 7500.0, 10000.0, 15000.0], size=n_rows)
+    
+    return pd.DataFrame({
+        'transaction_id': np.char.add('T', basket_ids.astype(str)),
+        'date': basket_date[basket_ids].strftime('%Y-%m-%d %H:%M:%S'),
+        'customer_id': np.char.add('C', basket_customer[basket_ids].astype(str)),
+        'product': np.char.add('Produk ', products.astype(str)),
+        'quantity': quantity,
+        'price': price,
+        'total': quantity * price
+    })
+
+def fill_database(db_path, n_rows, part_size=250000):
+    """
+    Isi database dengan n_rows transaksi sintetis secara bertahap
+    
+    Args:
+        db_path: Path file database SQLite
+        n_rows: Jumlah baris transaksi
+        part_size: Jumlah baris yang dibuat per bagian
+    
+    Returns:
+        Flask app yang terhubung ke database tersebut
+    """
+    from controllers.data_controller import prepare_transactions, bulk_insert_transactions
+    
+    app = make_app(db_path)
+    written = 0
+    seed = 0
+    with app.app_context():
+        while written < n_rows:
+            part = generate_transactions(min(part_size, n_rows - written), seed=seed)
+            part['transaction_id'] = part['transaction_id'] + f'-{seed}'
+            clean_df, _ = prepare_transactions(part)
+            bulk_insert_transactions(clean_df, 5000)
+            db.session.commit()
+            written += len(part)
+            seed += 1
+    
+    return app
+
+def peak_rss_mb():
+    """Peak resident set size proses ini (MB)"""
+    # VmHWM direset saat exec, berbeda dengan ru_maxrss yang mewarisi
+    # high-water mark proses induk
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return usage / 1024 if sys.platform != 'darwin' else usage / (1024 * 1024)
+
+@contextmanager
+def timer(label, results=None):
+    """Context manager untuk mengukur durasi blok kode"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f'{label:<45} {elapsed:10.3f} s')
+    if results is not None:
+        results[label] = elapsed
@@ -20,5 +20,46 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + get_db_path()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = get_upload_folder()
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # File diimport per chunk, jadi batas ukuran hanya untuk melindungi disk
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 4096)) * 1024 * 1024
     ALLOWED_EXTENSIONS = {'csv', 'xlsx'}
+    # Proses worker untuk job analisis; 0 = jalankan inline (Vercel tidak mendukung proses latar)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 0 if os.environ.get('VERCEL') else 2))
+    # Status job disimpan di database; job aktif yang tidak diperbarui selama ini dianggap gagal (menit)
+    JOB_STALE_MINUTES = int(os.environ.get('JOB_STALE_MINUTES', 60))
+    JOB_HISTORY = int(os.environ.get('JOB_HISTORY', 100))  # Jumlah job selesai yang hasilnya disimpan
+    MBA_ALGORITHM = os.environ.get('MBA_ALGORITHM', 'eclat')  # eclat, fpgrowth, atau apriori
+    # Batas rules MBA: jumlah rules terbaik (0 = semua) menurut metric (lift, confidence, leverage),
+    # rules per antecedent dan jumlah produk per rule (0 = tanpa batas)
+    MBA_TOP_K = int(os.environ.get('MBA_TOP_K', 0))
+    MBA_RULE_METRIC = os.environ.get('MBA_RULE_METRIC', 'lift')
+    MBA_MAX_PER_ANTECEDENT = int(os.environ.get('MBA_MAX_PER_ANTECEDENT', 0))
+    MBA_MAX_LEN = int(os.environ.get('MBA_MAX_LEN', 0))
+    # Support itemset disimpan pada min_support x rasio ini. Rasio < 1 (mis. 0.5) memberi ruang agar rules
+    # tetap bisa dibentuk dari count tersimpan setelah beberapa upload, dengan biaya mining dan jumlah
+    # itemset tersimpan yang bisa jauh lebih besar; default 1 = mining tepat pada min_support
+    ITEMSET_STORE_RATIO = float(os.environ.get('ITEMSET_STORE_RATIO', 1.0))
+    INGEST_CHUNK_SIZE = int(os.environ.get('INGEST_CHUNK_SIZE', 5000))  # Baris per batch insert
+    # Jumlah run hasil analisis yang disimpan per jenis (run lama dibuang secara LRU)
+    ANALYSIS_RUN_HISTORY = int(os.environ.get('ANALYSIS_RUN_HISTORY', 5))
+    # Jumlah run segmentasi yang disimpan (riwayat untuk laporan perpindahan segmen)
+    SEGMENT_RUN_HISTORY = int(os.environ.get('SEGMENT_RUN_HISTORY', 12))
+    # Jumlah run bercakupan (MBA per segmen/tanggal/pelanggan) yang disimpan per jenis
+    SCOPED_RUN_HISTORY = int(os.environ.get('SCOPED_RUN_HISTORY', 20))
+    # Grafik 3D segmentasi: auto, sample, density, atau full; dan batas jumlah titik pelanggan
+    PLOT_3D_MODE = os.environ.get('PLOT_3D_MODE', 'auto')
+    PLOT_3D_MAX_POINTS = int(os.environ.get('PLOT_3D_MAX_POINTS', 5000))
+    # Lama penyimpanan snapshot RFM harian (hari)
+    RFM_SNAPSHOT_DAYS = int(os.environ.get('RFM_SNAPSHOT_DAYS', 400))
+    SEGMENT_TABLE_ROWS = int(os.environ.get('SEGMENT_TABLE_ROWS', 1000))  # Baris tabel hasil segmentasi di halaman
+    CLUSTERING_BACKEND = os.environ.get('CLUSTERING_BACKEND', 'kmeans')  # kmeans atau minibatch
+    # Backend minibatch: perbarui model run segmentasi aktif (partial_fit) jika parameternya sama; 0 = selalu fit ulang
+    CLUSTERING_INCREMENTAL = os.environ.get('CLUSTERING_INCREMENTAL', '1') != '0'
+    # Batas thread OpenMP/BLAS saat clustering; kosong = semua core
+    CLUSTERING_THREADS = int(os.environ['CLUSTERING_THREADS']) if os.environ.get('CLUSTERING_THREADS') else None
+    # Proses paralel untuk pencarian K otomatis; kosong = jumlah core (Vercel: 1)
+    CLUSTERING_SWEEP_WORKERS = int(os.environ.get('CLUSTERING_SWEEP_WORKERS', 1 if os.environ.get('VERCEL') else 0)) or None
+    # Proses paralel untuk mining frequent itemset terpartisi; kosong = jumlah core (Vercel: 1)
+    MINING_WORKERS = int(os.environ.get('MINING_WORKERS', 1 if os.environ.get('VERCEL') else 0)) or None
+    # Selang pemeriksaan run MBA aktif oleh API rekomendasi (detik)
+    RECOMMENDATION_REFRESH_SECONDS = float(os.environ.get('RECOMMENDATION_REFRESH_SECONDS', 1.0))
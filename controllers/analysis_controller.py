@@ -0,0 +1,510 @@
+"""
+Controller untuk menjalankan analisis MBA dan segmentasi pelanggan
+
+Fungsi di modul ini dipakai secara sinkron oleh route maupun sebagai job di
+proses worker (utils.jobs), sehingga hanya menerima dan mengembalikan data
+sederhana yang bisa di-pickle.
+"""
+import json
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from flask import Flask, current_app, has_app_context
+from models import db
+from controllers.data_controller import (
+    get_transactions_dataframe, get_data_fingerprint, get_rfm_dataframe, get_product_names,
+    get_customer_segments
+)
+from controllers.mining_controller import can_derive_rules, derive_rules, promote_border, save_itemset_store
+from controllers.rfm_controller import summary_reference_date
+from controllers.result_controller import (
+    save_rules, save_segments, find_run, activate_run, touch_run, get_active_run_id, load_rules, load_segments,
+    get_figures
+)
+from utils.apriori import generate_rules, format_itemset, DEFAULT_RULE_METRIC
+from utils.frequent_itemsets import encode_codes, mine_encoded_itemsets, DEFAULT_ALGORITHM
+from controllers.scoring_controller import get_segment_model
+from utils.clustering import kmeans_clustering, update_clustering, sweep_k, SegmentModel, DEFAULT_BACKEND
+from utils.jobs import report_progress
+from utils.visualization import (
+    create_association_heatmap, create_simple_bar_chart,
+    create_3d_cluster_plot, create_cluster_summary_chart, create_k_sweep_chart, PLOT_3D_MAX_POINTS
+)
+
+EMPTY_DATA_MESSAGE = 'Data transaksi kosong. Silakan upload data terlebih dahulu.'
+
+# Batas baris tabel hasil segmentasi di halaman (dibagi rata per segmen)
+SEGMENT_TABLE_ROWS = 1000
+
+_worker_app = None
+
+def _app_context():
+    """
+    App context untuk akses database
+    
+    Di dalam request context yang sudah ada tidak membuat apa-apa; di proses
+    worker dibuat aplikasi Flask minimal dengan konfigurasi yang sama.
+    """
+    global _worker_app
+    
+    if has_app_context():
+        return nullcontext()
+    
+    if _worker_app is None:
+        from config import Config
+        _worker_app = Flask(__name__)
+        _worker_app.config.from_object(Config)
+        db.init_app(_worker_app)
+    
+    return _worker_app.app_context()
+
+def _mba_scope(start_date=None, end_date=None, segment=None, customer_ids=None):
+    """
+    Cakupan data run MBA
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'params' (bagian kunci cache, kosong
+        untuk seluruh transaksi), 'filters' (argumen get_transactions_dataframe)
+        dan 'label' (None untuk seluruh transaksi)
+    """
+    params, labels = {}, []
+    filters = {'start_date': start_date, 'end_date': end_date}
+    
+    if segment is not None:
+        # Label segmen hanya bermakna terhadap run segmentasi tertentu
+        segment_run_id = get_active_run_id('segmentasi')
+        if segment_run_id is None:
+            return {'error': 'Belum ada hasil segmentasi. Jalankan segmentasi terlebih dahulu.'}
+        params.update(segment=segment, segment_run=segment_run_id)
+        filters.update(segment_run_id=segment_run_id, segments=[segment])
+        labels.append(f'Segmen {segment}')
+    
+    if customer_ids is not None:
+        customer_ids = sorted(set(customer_ids))
+        params['customer_ids'] = customer_ids
+        filters['customer_ids'] = customer_ids
+        labels.append(f'{len(customer_ids)} pelanggan')
+    
+    if start_date is not None or end_date is not None:
+        params.update(start_date=start_date, end_date=end_date)
+        labels.append(f"{start_date or '...'} s/d {end_date or '...'}")
+    
+    return {'params': params, 'filters': filters, 'label': ', '.join(labels) or None}
+
+def _load_basket_matrix(filters):
+    """Matriks transaksi x produk (dari kode kamus) untuk transaksi yang lolos filter, atau None"""
+    df = get_transactions_dataframe(columns=['transaction_id', 'produk_id'], **filters)
+    if df.empty:
+        return None
+    return encode_codes(df['transaction_id'].values, df['produk_id'].values, get_product_names())
+
+def run_mba_analysis(min_support, min_confidence, algorithm=DEFAULT_ALGORITHM, max_len=None, top_k=None,
+                     metric=DEFAULT_RULE_METRIC, max_per_antecedent=None, start_date=None, end_date=None,
+                     segment=None, customer_ids=None):
+    """
+    Jalankan Market Basket Analysis lengkap: muat data, Apriori, simpan, visualisasi
+    
+    Jika run dengan parameter yang sama pada data yang sama masih tersimpan,
+    hasilnya dipakai ulang tanpa mining. Dengan cakupan (rentang tanggal,
+    segmen, atau daftar pelanggan) hanya keranjang yang relevan yang dimuat;
+    run bercakupan disimpan tanpa menggantikan run MBA aktif.
+    
+    Args:
+        min_support: Minimum support threshold
+        min_confidence: Minimum confidence threshold
+        algorithm: Engine frequent itemset ('eclat', 'fpgrowth', 'apriori')
+        max_len: Jumlah produk maksimal per rule (None = tanpa batas)
+        top_k: Jumlah rules terbaik yang disimpan menurut metric (None = semua)
+        metric: 'lift', 'confidence', atau 'leverage'
+        max_per_antecedent: Jumlah rules maksimal per antecedent (None = tanpa batas)
+        start_date: Awal rentang tanggal transaksi, string 'YYYY-MM-DD' (opsional)
+        end_date: Akhir rentang tanggal transaksi, string 'YYYY-MM-DD' (opsional)
+        segment: cluster_label pada run segmentasi aktif (opsional)
+        customer_ids: List ID pelanggan (opsional)
+    
+    Returns:
+        Dictionary dengan key 'error', 'warning', atau 'success' beserta
+        data untuk template analisis_mba.html
+    """
+    with _app_context():
+        scope = _mba_scope(start_date, end_date, segment, customer_ids)
+        if 'error' in scope:
+            return scope
+        
+        params = {'min_support': min_support, 'min_confidence': min_confidence, 'algorithm': algorithm,
+                  'max_len': max_len, 'top_k': top_k, 'metric': metric, 'max_per_antecedent': max_per_antecedent}
+        if scope['params']:
+            params['scope'] = scope['params']
+        limits = {'top_k': top_k, 'metric': metric, 'max_per_antecedent': max_per_antecedent}
+        fingerprint = get_data_fingerprint()
+        
+        cached = find_run('mba', params, fingerprint)
+        if cached is not None:
+            report_progress(50, 'Memakai hasil analisis tersimpan')
+            if scope['label'] is None:
+                activate_run('mba', cached.id)
+            else:
+                touch_run('mba', cached.id)
+            return _mba_result(load_rules(cached.id), cached.id, cached=True, scope=scope['label'])
+        
+        if scope['label'] is None:
+            # Itemset border yang kini mencapai min_support dihitung dari keranjangnya saja
+            promote_border(min_support)
+        if scope['label'] is None and can_derive_rules(min_support, max_len):
+            # Count support tersimpan masih mencakup min_support ini: tanpa mining ulang
+            report_progress(20, 'Membentuk rules dari support itemset tersimpan')
+            rules = derive_rules(min_support, min_confidence, max_len, **limits)
+        else:
+            report_progress(5, 'Memuat data transaksi')
+            encoded = _load_basket_matrix(scope['filters'])
+            
+            if encoded is None:
+                if scope['label'] is not None:
+                    return {'error': f"Tidak ada transaksi pada cakupan yang dipilih ({scope['label']})."}
+                return {'error': EMPTY_DATA_MESSAGE, 'empty': True}
+            matrix, items = encoded
+            
+            # Support itemset tersimpan hanya untuk seluruh transaksi. Dengan
+            # ITEMSET_STORE_RATIO < 1 mining memakai support lebih rendah agar
+            # count itemset border lebih jauh di bawah min_support, sehingga
+            # lebih banyak upload berikutnya masih bisa diproses inkremental
+            report_progress(20, f'Menjalankan {algorithm}')
+            store_min_support = min_support
+            if scope['label'] is None:
+                store_min_support *= current_app.config.get('ITEMSET_STORE_RATIO', 1.0)
+            frequent_itemsets = mine_encoded_itemsets(matrix, items, store_min_support, algorithm, max_len,
+                                                      n_jobs=current_app.config.get('MINING_WORKERS'))
+            
+            # Simpan hanya jika data tidak berubah selama mining
+            if scope['label'] is None and get_data_fingerprint() == fingerprint:
+                save_itemset_store(frequent_itemsets, matrix, items, store_min_support, max_len)
+            
+            frequent_itemsets = frequent_itemsets[frequent_itemsets['support'] >= min_support]
+            report_progress(40, 'Membentuk association rules')
+            rules = generate_rules(frequent_itemsets, min_confidence, max_len=max_len, **limits)
+        
+        if rules.empty:
+            return {'warning': f'Tidak ada aturan asosiasi yang ditemukan dengan parameter min_support={min_support} dan min_confidence={min_confidence}. Coba gunakan nilai yang lebih rendah.'}
+        
+        report_progress(60, 'Menyimpan aturan asosiasi')
+        
+        # Simpan rules sebagai run baru (insert batch, lalu diaktifkan sekaligus)
+        run_id = save_rules(rules, params, fingerprint, cakupan=scope['label'])
+        
+        return _mba_result(rules, run_id, scope=scope['label'])
+
+def _display_rules(rules, limit=20):
+    """Format rules teratas untuk tampilan"""
+    return [{
+        'antecedents': format_itemset(row['antecedents']),
+        'consequents': format_itemset(row['consequents']),
+        'support': round(float(row['support']), 4),
+        'confidence': round(float(row['confidence']), 4),
+        'lift': round(float(row['lift']), 4)
+    } for _, row in rules.head(limit).iterrows()]
+
+def _mba_result(rules, run_id, cached=False, scope=None):
+    """Visualisasi dan data tampilan dari rules (hasil baru maupun tersimpan)"""
+    # Figure dibuat sekali per run, lalu diambil dari cache
+    report_progress(80, 'Membuat visualisasi')
+    figures = get_figures(run_id, {
+        'heatmap': lambda: create_association_heatmap(rules),
+        'bar_chart': lambda: create_simple_bar_chart(rules)
+    })
+    
+    message = f'Ditemukan {len(rules)} aturan asosiasi'
+    message += f' untuk cakupan {scope} (run #{run_id}).' if scope else '.'
+    return {
+        'success': ('Hasil tersimpan dipakai ulang (data dan parameter sama). ' if cached else 'Analisis berhasil! ') + message,
+        'rules': _display_rules(rules),
+        'heatmap': figures['heatmap'],
+        'bar_chart': figures['bar_chart'],
+        'total_rules': len(rules),
+        'run_id': run_id,
+        'scope': scope,
+        'cached': cached
+    }
+
+def run_segment_mba(min_support, min_confidence, algorithm=DEFAULT_ALGORITHM, max_len=None, top_k=None,
+                    metric=DEFAULT_RULE_METRIC, max_per_antecedent=None, start_date=None, end_date=None):
+    """
+    Jalankan MBA untuk setiap segmen run segmentasi aktif dalam satu job
+    
+    Transaksi semua segmen dimuat dan di-encode sekali menjadi satu matriks;
+    setiap segmen lalu ditambang dari baris matriks miliknya. Setiap segmen
+    disimpan sebagai run bercakupan dengan parameter yang sama seperti
+    run_mba_analysis(segment=...), sehingga hasilnya saling dipakai ulang.
+    
+    Args:
+        min_support, min_confidence, algorithm, max_len, top_k, metric,
+        max_per_antecedent, start_date, end_date: Lihat run_mba_analysis
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'success' dan 'segments' (list
+        dictionary segment, run_id, transactions, total_rules, rules, cached)
+    """
+    with _app_context():
+        segment_run_id = get_active_run_id('segmentasi')
+        if segment_run_id is None:
+            return {'error': 'Belum ada hasil segmentasi. Jalankan segmentasi terlebih dahulu.'}
+        
+        limits = {'top_k': top_k, 'metric': metric, 'max_per_antecedent': max_per_antecedent}
+        base_params = {'min_support': min_support, 'min_confidence': min_confidence, 'algorithm': algorithm,
+                       'max_len': max_len, **limits}
+        fingerprint = get_data_fingerprint()
+        
+        # Segmen dipetakan lewat kode pelanggan: satu pembacaan tabel transaksi
+        # berurutan, lebih murah daripada JOIN ke tabel segmentasi per baris
+        report_progress(5, 'Memuat transaksi per segmen')
+        labels, customer_segments = get_customer_segments(segment_run_id)
+        df = get_transactions_dataframe(columns=['transaction_id', 'produk_id', 'pelanggan_id'],
+                                        start_date=start_date, end_date=end_date)
+        if not df.empty:
+            # Pelanggan yang belum ada di run segmentasi (-1) dilewati
+            customers = df['pelanggan_id'].values
+            segments = np.full(len(customers), -1, dtype=np.int32)
+            known = customers < len(customer_segments)
+            segments[known] = customer_segments[customers[known]]
+            df = df[segments >= 0]
+            segments = segments[segments >= 0]
+        if df.empty:
+            return {'error': 'Tidak ada transaksi pelanggan tersegmentasi pada rentang tanggal yang dipilih.'}
+        
+        # Satu encoding untuk semua segmen; setiap transaksi milik satu pelanggan (satu segmen)
+        rows, _ = pd.factorize(df['transaction_id'])
+        matrix, items = encode_codes(rows, df['produk_id'].values, get_product_names())
+        row_segments = np.empty(matrix.shape[0], dtype=np.int32)
+        row_segments[rows] = segments
+        del df, rows, segments
+        
+        results = []
+        for number, label in enumerate(labels):
+            report_progress(10 + 80 * number // len(labels), f'Segmen {label}')
+            scope = _mba_scope(start_date, end_date, label)
+            params = {**base_params, 'scope': scope['params']}
+            segment_matrix = matrix[row_segments == number]
+            
+            cached = find_run('mba', params, fingerprint)
+            if cached is not None:
+                touch_run('mba', cached.id)
+                rules, run_id = load_rules(cached.id), cached.id
+            else:
+                frequent_itemsets = mine_encoded_itemsets(segment_matrix, items, min_support, algorithm, max_len,
+                                                          n_jobs=current_app.config.get('MINING_WORKERS'))
+                rules = generate_rules(frequent_itemsets, min_confidence, max_len=max_len, **limits)
+                run_id = save_rules(rules, params, fingerprint, cakupan=scope['label']) if not rules.empty else None
+            
+            results.append({
+                'segment': label,
+                'run_id': run_id,
+                'transactions': segment_matrix.shape[0],
+                'total_rules': len(rules),
+                'rules': _display_rules(rules, 5) if not rules.empty else [],
+                'cached': cached is not None
+            })
+        
+        with_rules = sum(1 for result in results if result['total_rules'])
+        return {
+            'success': f'MBA per segmen selesai: {with_rules} dari {len(results)} segmen memiliki aturan asosiasi.',
+            'segments': results
+        }
+
+def _incremental_base(params):
+    """
+    Model run segmentasi aktif yang bisa dilanjutkan dengan partial_fit
+    
+    Hanya untuk backend minibatch dengan jumlah cluster dan rentang tanggal
+    yang sama (tanggal acuan recency boleh berbeda).
+    
+    Returns:
+        Tuple (run_id, SegmentModel), atau (None, None)
+    """
+    if params['backend'] != 'minibatch' or not current_app.config.get('CLUSTERING_INCREMENTAL', True):
+        return None, None
+    
+    run, model = get_segment_model()
+    if run is None or model is None or len(model.centers) != params['n_clusters']:
+        return None, None
+    
+    previous = json.loads(run.params or '{}')
+    if any(previous.get(name) != params[name] for name in ('n_clusters', 'start_date', 'end_date', 'backend')):
+        return None, None
+    return run.id, model
+
+def run_segmentation_analysis(n_clusters, start_date=None, end_date=None, backend=DEFAULT_BACKEND):
+    """
+    Jalankan segmentasi pelanggan lengkap: RFM, K-Means, simpan, visualisasi
+    
+    Dengan backend minibatch, model run segmentasi aktif yang parameternya
+    sama diperbarui dengan partial_fit (lihat update_clustering) alih-alih
+    fitting dari awal.
+    
+    Args:
+        n_clusters: Jumlah cluster (minimal 2)
+        start_date: Awal rentang tanggal transaksi, string 'YYYY-MM-DD' (opsional)
+        end_date: Akhir rentang tanggal transaksi, string 'YYYY-MM-DD' (opsional);
+            recency dihitung terhadap akhir rentang ini
+        backend: Backend clustering ('kmeans' atau 'minibatch')
+    
+    Returns:
+        Dictionary dengan key 'error' atau 'success' beserta data untuk
+        template segmentasi.html
+    """
+    with _app_context():
+        params = {'n_clusters': n_clusters, 'start_date': start_date, 'end_date': end_date, 'backend': backend}
+        if end_date is None:
+            # Recency dihitung terhadap tanggal acuan ringkasan RFM tersimpan
+            params['reference_date'] = summary_reference_date().isoformat()
+        fingerprint = get_data_fingerprint()
+        
+        cached = find_run('segmentasi', params, fingerprint)
+        if cached is not None:
+            report_progress(50, 'Memakai hasil segmentasi tersimpan')
+            activate_run('segmentasi', cached.id)
+            return _segmentation_result(load_segments(cached.id), n_clusters, cached.id, cached=True)
+        
+        # Hitung RFM langsung di database (satu baris per pelanggan)
+        report_progress(5, 'Menghitung RFM')
+        rfm_df = get_rfm_dataframe(start_date=start_date, end_date=end_date)
+        
+        if rfm_df.empty:
+            if start_date or end_date:
+                return {'error': 'Tidak ada transaksi pada rentang tanggal yang dipilih.'}
+            return {'error': EMPTY_DATA_MESSAGE, 'empty': True}
+        
+        # Validasi jumlah customer
+        n_customers = len(rfm_df)
+        if n_clusters > n_customers:
+            return {'error': f'Jumlah cluster ({n_clusters}) tidak boleh lebih dari jumlah pelanggan ({n_customers})'}
+        
+        # K-Means clustering
+        n_threads = current_app.config.get('CLUSTERING_THREADS')
+        base_run_id, base_model = _incremental_base(params)
+        if base_model is not None:
+            report_progress(40, f'Memperbarui model run #{base_run_id} (partial_fit)')
+            rfm_clustered, kmeans_model = update_clustering(base_model.to_pipeline(), rfm_df, n_threads=n_threads)
+        else:
+            report_progress(40, 'Menjalankan K-Means')
+            rfm_clustered, kmeans_model = kmeans_clustering(rfm_df, n_clusters, backend=backend, n_threads=n_threads)
+        
+        report_progress(60, 'Menyimpan hasil segmentasi')
+        
+        # Simpan segmentasi sebagai run baru (insert batch, lalu diaktifkan sekaligus)
+        # Simpan juga model (scaler + pusat cluster + label) untuk menilai pelanggan baru
+        segment_model = SegmentModel.from_pipeline(kmeans_model)
+        run_id = save_segments(rfm_clustered, params, fingerprint, segment_model.to_artifact())
+        
+        result = _segmentation_result(rfm_clustered, n_clusters, run_id, segment_model=segment_model)
+        if base_model is not None:
+            result['success'] += f' Model diperbarui inkremental dari run #{base_run_id}.'
+        return result
+
+def _run_centroids(run_id, segment_model=None):
+    """Pusat cluster model segmentasi (skala RFM asli), atau None untuk run lama tanpa model"""
+    if segment_model is None:
+        _, segment_model = get_segment_model(run_id)
+    return segment_model.centroids() if segment_model is not None else None
+
+def _segmentation_result(rfm_clustered, n_clusters, run_id, cached=False, segment_model=None):
+    """
+    Visualisasi dan data tampilan dari hasil segmentasi (baru maupun tersimpan)
+    
+    Centroid grafik 3D diambil dari segment_model, atau dari model tersimpan
+    run_id jika tidak diberikan (hanya saat figure belum ada di cache).
+    """
+    # Figure dibuat sekali per run, lalu diambil dari cache
+    report_progress(80, 'Membuat visualisasi')
+    # Mode dan batas titik grafik 3D ikut menjadi nama cache figure
+    plot_mode = current_app.config.get('PLOT_3D_MODE', 'auto')
+    max_points = current_app.config.get('PLOT_3D_MAX_POINTS', PLOT_3D_MAX_POINTS)
+    plot_3d_key = f'plot_3d:{plot_mode}:{max_points}'
+    figures = get_figures(run_id, {
+        plot_3d_key: lambda: create_3d_cluster_plot(rfm_clustered, plot_mode, max_points,
+                                                    _run_centroids(run_id, segment_model)),
+        'pie_chart': lambda: create_cluster_summary_chart(rfm_clustered)
+    })
+    
+    # Urutkan data berdasarkan label kategori pelanggan
+    # Best Customers -> Potential Customers -> Lost Customers
+    label_order = {'Best Customers': 0, 'Potential Customers': 1, 'Lost Customers': 2}
+    rfm_clustered['label_sort'] = rfm_clustered['Cluster_Label'].map(label_order)
+    rfm_clustered_sorted = rfm_clustered.sort_values(['label_sort', 'customer_id'])
+    rfm_clustered_sorted = rfm_clustered_sorted.drop('label_sort', axis=1)
+    
+    # Format data untuk tampilan, dibatasi per segmen agar ukuran halaman tetap kecil
+    table_rows = current_app.config.get('SEGMENT_TABLE_ROWS', SEGMENT_TABLE_ROWS)
+    per_label = max(1, table_rows // rfm_clustered_sorted['Cluster_Label'].nunique())
+    rfm_display = rfm_clustered_sorted.groupby('Cluster_Label', sort=False).head(per_label).to_dict('records')
+    
+    # Statistik per cluster
+    cluster_stats = rfm_clustered.groupby('Cluster_Label').agg({
+        'Recency': 'mean',
+        'Frequency': 'mean',
+        'Monetary': 'mean',
+        'customer_id': 'count'
+    }).round(2).to_dict('index')
+    
+    return {
+        'success': ('Hasil tersimpan dipakai ulang (data dan parameter sama). ' if cached else 'Analisis berhasil! ')
+                   + f'Pelanggan dikelompokkan menjadi {n_clusters} cluster.',
+        'rfm_data': rfm_display,
+        'plot_3d': figures[plot_3d_key],
+        'pie_chart': figures['pie_chart'],
+        'cluster_stats': cluster_stats,
+        'total_customers': len(rfm_clustered),
+        'run_id': run_id,
+        'cached': cached
+    }
+
+def run_k_sweep(k_min=2, k_max=10, start_date=None, end_date=None, backend=DEFAULT_BACKEND):
+    """
+    Coba setiap K dalam rentang sekaligus dan rekomendasikan jumlah cluster
+    
+    Args:
+        k_min: K terkecil yang dicoba (minimal 2)
+        k_max: K terbesar yang dicoba
+        start_date: Awal rentang tanggal transaksi (opsional)
+        end_date: Akhir rentang tanggal transaksi (opsional)
+        backend: Backend clustering ('kmeans' atau 'minibatch')
+    
+    Returns:
+        Dictionary dengan key 'error' atau 'success' beserta 'sweep' (hasil
+        sweep_k) dan 'sweep_chart' untuk template segmentasi.html
+    """
+    with _app_context():
+        report_progress(5, 'Menghitung RFM')
+        rfm_df = get_rfm_dataframe(start_date=start_date, end_date=end_date)
+        
+        if rfm_df.empty:
+            if start_date or end_date:
+                return {'error': 'Tidak ada transaksi pada rentang tanggal yang dipilih.'}
+            return {'error': EMPTY_DATA_MESSAGE, 'empty': True}
+        
+        # K tidak boleh melebihi jumlah pelanggan
+        k_values = list(range(k_min, min(k_max, len(rfm_df) - 1) + 1))
+        if not k_values:
+            return {'error': f'Jumlah pelanggan ({len(rfm_df)}) terlalu sedikit untuk mencoba K={k_min}..{k_max}'}
+        
+        def progress(k, done, total):
+            report_progress(10 + 80 * done // total, f'K={k} selesai ({done}/{total})')
+        
+        report_progress(10, f'Mencoba K={k_values[0]}..{k_values[-1]}')
+        sweep = sweep_k(rfm_df, k_values, backend=backend,
+                        n_jobs=current_app.config.get('CLUSTERING_SWEEP_WORKERS'), on_result=progress)
+        
+        report_progress(90, 'Membuat visualisasi')
+        return {
+            'success': (f"Rekomendasi jumlah cluster: K={sweep['recommended_k']} (silhouette tertinggi). "
+                        f"Titik siku inertia di K={sweep['elbow_k']}."),
+            'sweep': sweep,
+            'sweep_chart': create_k_sweep_chart(sweep),
+            'params': {'start_date': start_date, 'end_date': end_date, 'backend': backend}
+        }
+
+# Fungsi yang bisa dijalankan sebagai job di utils.jobs.JobManager
+ANALYSIS_JOBS = {
+    'analisis_mba': run_mba_analysis,
+    'analisis_mba_segmen': run_segment_mba,
+    'segmentasi': run_segmentation_analysis,
+    'k_sweep': run_k_sweep
+}
@@ -1,16 +1,42 @@
 """
 Controller untuk manajemen data transaksi
 """
+import numpy as np
 import pandas as pd
+from datetime import date, datetime, timedelta
+from pandas.api.types import union_categoricals
+from sqlalchemy import distinct, func, select, tuple_, type_coerce, update
 from werkzeug.utils import secure_filename
 from models import db
-from models.transaksi import Transaksi
+from models.transaksi import Transaksi, Produk, Pelanggan, SegmentasiPelanggan
+from controllers.mining_controller import maintain_itemset_support, reset_itemset_store
+from controllers.statistics_controller import maintain_statistics, reset_statistics
+from controllers.rfm_controller import (
+    maintain_rfm_summary, refresh_rfm_customers, reset_rfm_summary, take_rfm_snapshot, get_rfm_summary
+)
+from utils.clustering import rfm_from_summary
+import base64
+import hashlib
+import json
 import os
 
+REQUIRED_COLUMNS = ['transaction_id', 'date', 'customer_id', 'product']
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+LOADER_BATCH_SIZE = 50000
+TRANSACTION_COLUMNS = ['id', 'transaction_id', 'date', 'customer_id', 'product', 'quantity', 'price', 'total']
+CATEGORICAL_COLUMNS = ('customer_id', 'product')
+CODE_COLUMNS = ('produk_id', 'pelanggan_id')  # Kode kamus, dimuat sebagai int32
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SORT_COLUMNS = ('date', 'total', 'id')
+DICTIONARY_LOOKUP_BATCH = 500  # Nilai kamus per query IN (batas parameter SQLite)
+
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def upload_data(file, upload_folder, allowed_extensions):
+def upload_data(file, upload_folder, allowed_extensions, chunk_size=DEFAULT_CHUNK_SIZE,
+                progress_callback=None):
     """
     Upload dan simpan data transaksi dari file CSV/Excel
     
@@ -18,9 +44,13 @@ def upload_data(file, upload_folder, allowed_extensions):
         file: File object dari request.files
         upload_folder: Path folder untuk upload
         allowed_extensions: Set of allowed extensions
+        chunk_size: Jumlah baris per batch insert
+        progress_callback: Fungsi opsional callback(inserted, None) per chunk;
+            total baris belum diketahui selama file masih dibaca
     
     Returns:
-        Dictionary dengan key 'success' atau 'error'
+        Dictionary dengan key 'success' atau 'error', serta 'errors'
+        berisi daftar baris yang dilewati karena tidak valid
     """
     if not file:
         return {"error": "Tidak ada file yang dipilih"}
@@ -37,91 +67,480 @@ def upload_data(file, upload_folder, allowed_extensions):
     try:
         file.save(filepath)
         
-        # Baca file
-        if filename.endswith('.csv'):
-            df = pd.read_csv(filepath)
-        elif filename.endswith('.xlsx'):
-            df = pd.read_excel(filepath)
-        else:
-            return {"error": "Format file tidak didukung"}
-        
-        # Validasi kolom yang diperlukan
-        required_columns = ['transaction_id', 'date', 'customer_id', 'product']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return {"error": f"Kolom tidak lengkap. Kolom yang hilang: {', '.join(missing_columns)}"}
-        
-        # Tambahkan kolom default jika tidak ada
-        if 'quantity' not in df.columns:
-            df['quantity'] = 1
-        
-        if 'price' not in df.columns:
-            df['price'] = 0.0
-        
-        if 'total' not in df.columns:
-            df['total'] = df['quantity'] * df['price']
-        
-        # Simpan ke database
         count = 0
-        for _, row in df.iterrows():
-            transaksi = Transaksi(
-                transaction_id=str(row['transaction_id']),
-                date=pd.to_datetime(row['date']),
-                customer_id=str(row['customer_id']),
-                product=str(row['product']),
-                quantity=int(row['quantity']),
-                price=float(row['price']) if 'price' in row else 0.0,
-                total=float(row['total']) if 'total' in row else 0.0
-            )
-            db.session.add(transaksi)
-            count += 1
+        error_count = 0
+        errors = []
+        key_cache = {}
+        changed_customers = set()
         
-        db.session.commit()
-        
-        # Hapus file setelah diimport
-        os.remove(filepath)
+        # Baca file per chunk agar memori tetap terbatas berapapun ukuran file
+        for i, chunk in enumerate(iter_file_chunks(filepath, chunk_size)):
+            # Validasi kolom yang diperlukan pada chunk pertama
+            if i == 0:
+                missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+                
+                if missing_columns:
+                    return {"error": f"Kolom tidak lengkap. Kolom yang hilang: {', '.join(missing_columns)}"}
+            
+            # Konversi dan validasi seluruh kolom sekaligus
+            chunk, chunk_errors = prepare_transactions(chunk)
+            error_count += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+            
+            # Simpan ke database secara batch, sekaligus perbarui support itemset,
+            # ringkasan RFM, dan statistik dashboard tersimpan
+            with maintain_itemset_support(chunk['transaction_id'].unique()), \
+                    maintain_rfm_summary(chunk, changed_customers), \
+                    maintain_statistics(chunk):
+                count += bulk_insert_transactions(chunk, chunk_size, key_cache=key_cache)
+            
+            if progress_callback:
+                progress_callback(count, None)
         
-        return {"success": f"Berhasil mengupload {count} data transaksi"}
+        if count:
+            take_rfm_snapshot(changed_customers)
+        db.session.commit()
         
+        return _upload_result(count, errors, error_count)
+    
     except Exception as e:
         db.session.rollback()
         return {"error": f"Error saat mengupload file: {str(e)}"}
+    
+    finally:
+        # Hapus file setelah diimport
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+def iter_file_chunks(filepath, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Baca file CSV/Excel secara bertahap sebagai rangkaian DataFrame
+    
+    CSV dibaca dengan pd.read_csv(chunksize=...), sedangkan XLSX dibaca
+    baris demi baris dengan openpyxl mode read-only, sehingga file tidak
+    pernah dimuat utuh ke memori. Index DataFrame melanjutkan nomor baris
+    dari chunk sebelumnya.
+    
+    Args:
+        filepath: Path file .csv atau .xlsx
+        chunk_size: Jumlah baris per chunk
+    
+    Yields:
+        DataFrame berisi maksimal chunk_size baris
+    """
+    extension = filepath.rsplit('.', 1)[-1].lower()
+    
+    if extension == 'csv':
+        # Kolom teks dibaca sebagai string agar tipe konsisten antar chunk
+        text_columns = {col: str for col in ['transaction_id', 'customer_id', 'product']}
+        yield from pd.read_csv(filepath, chunksize=chunk_size, dtype=text_columns)
+    
+    elif extension == 'xlsx':
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            
+            columns = [str(col) for col in header]
+            offset = 0
+            buffer = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) == chunk_size:
+                    yield pd.DataFrame(buffer, columns=columns, index=range(offset, offset + len(buffer)))
+                    offset += len(buffer)
+                    buffer = []
+            
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns, index=range(offset, offset + len(buffer)))
+        finally:
+            workbook.close()
+    
+    else:
+        raise ValueError("Format file tidak didukung")
 
-def get_all_transactions():
+def prepare_transactions(df):
     """
-    Ambil semua data transaksi dari database
+    Konversi dan validasi kolom transaksi secara vektor (per kolom, bukan per baris)
+    
+    Baris yang tidak valid tidak menggagalkan seluruh file, melainkan
+    dilewati dan dilaporkan.
+    
+    Args:
+        df: DataFrame mentah dengan minimal kolom REQUIRED_COLUMNS
     
     Returns:
-        List of Transaksi objects
+        Tuple (clean_df, errors)
+        - clean_df: DataFrame dengan tipe kolom siap disimpan
+        - errors: List of dict {'row': nomor baris di file, 'error': pesan}
     """
-    return Transaksi.query.all()
+    result = pd.DataFrame(index=df.index)
+    invalid = pd.Series('', index=df.index)
+    
+    # Kolom teks: wajib terisi
+    for col in ['transaction_id', 'customer_id', 'product']:
+        values = df[col]
+        missing = values.isna()
+        result[col] = values.astype(str).str.strip()
+        missing |= result[col] == ''
+        invalid[missing & (invalid == '')] = f'{col} kosong'
+    
+    # Tanggal: coba format ISO (YYYY-MM-DD HH:MM:SS), lalu fallback ke format campuran
+    dates = pd.to_datetime(df['date'], errors='coerce', format='ISO8601')
+    retry = dates.isna() & df['date'].notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(df.loc[retry, 'date'].astype(str), errors='coerce', format='mixed')
+    invalid[dates.isna() & (invalid == '')] = 'date tidak valid'
+    result['date'] = dates
+    
+    # Kolom numerik, dengan nilai default jika kolom tidak ada
+    if 'quantity' in df.columns:
+        quantity = pd.to_numeric(df['quantity'], errors='coerce')
+    else:
+        quantity = pd.Series(1, index=df.index)
+    invalid[quantity.isna() & (invalid == '')] = 'quantity tidak valid'
+    # Quantity disimpan sebagai integer: pecahan ditolak, bukan dibulatkan
+    invalid[quantity.notna() & (quantity % 1 != 0) & (invalid == '')] = 'quantity harus bilangan bulat'
+    
+    if 'price' in df.columns:
+        price = pd.to_numeric(df['price'], errors='coerce')
+    else:
+        price = pd.Series(0.0, index=df.index)
+    invalid[price.isna() & (invalid == '')] = 'price tidak valid'
+    
+    if 'total' in df.columns:
+        total = pd.to_numeric(df['total'], errors='coerce')
+    else:
+        total = quantity * price
+    invalid[total.isna() & (invalid == '')] = 'total tidak valid'
+    
+    valid = invalid == ''
+    result = result[valid]
+    result['quantity'] = quantity[valid].astype('int64')
+    result['price'] = price[valid].astype('float64')
+    result['total'] = total[valid].astype('float64')
+    
+    # Nomor baris di file: index 0 = baris ke-2 (setelah header)
+    errors = [{'row': int(idx) + 2, 'error': msg} for idx, msg in invalid[~valid].items()]
+    
+    return result, errors
+
+def bulk_insert_transactions(df, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None, key_cache=None):
+    """
+    Simpan DataFrame transaksi (hasil prepare_transactions) dengan batch insert
+    
+    Menggunakan executemany melalui Core insert, tanpa membuat objek ORM per
+    baris. Kode kamus produk/pelanggan ikut diisi. Commit dilakukan oleh
+    pemanggil.
+    
+    Args:
+        df: DataFrame hasil prepare_transactions
+        chunk_size: Jumlah baris per batch
+        progress_callback: Fungsi opsional callback(inserted, total) per batch
+        key_cache: Cache kamus untuk encode_keys (opsional, dipakai ulang antar chunk)
+    
+    Returns:
+        Jumlah baris yang disimpan
+    """
+    total_rows = len(df)
+    if total_rows == 0:
+        return 0
+    
+    columns = ['transaction_id', 'date', 'customer_id', 'product', 'quantity', 'price', 'total',
+               'produk_id', 'pelanggan_id']
+    stmt = Transaksi.__table__.insert()
+    inserted = 0
+    produk_ids, pelanggan_ids = encode_keys(df, key_cache)
+    
+    for start in range(0, total_rows, chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        records = [
+            dict(zip(columns, values))
+            for values in zip(
+                chunk['transaction_id'].tolist(),
+                chunk['date'].tolist(),
+                chunk['customer_id'].tolist(),
+                chunk['product'].tolist(),
+                chunk['quantity'].tolist(),
+                chunk['price'].tolist(),
+                chunk['total'].tolist(),
+                produk_ids[start:start + chunk_size].tolist(),
+                pelanggan_ids[start:start + chunk_size].tolist()
+            )
+        ]
+        db.session.execute(stmt, records)
+        inserted += len(records)
+        
+        if progress_callback:
+            progress_callback(inserted, total_rows)
+    
+    return inserted
+
+def _upload_result(count, errors, error_count):
+    """Susun pesan hasil upload beserta ringkasan baris yang dilewati"""
+    result = {"success": f"Berhasil mengupload {count} data transaksi", "errors": errors}
+    if error_count:
+        result["success"] += f" ({error_count} baris dilewati karena tidak valid)"
+    return result
+
+def get_transactions_page(filters=None, sort='date', direction='desc', after=None, before=None,
+                          limit=DEFAULT_PAGE_SIZE):
+    """
+    Ambil satu halaman transaksi dengan keyset pagination
+    
+    Halaman berikutnya/sebelumnya ditentukan oleh cursor (nilai kolom urut
+    dan id baris terakhir/pertama), bukan OFFSET, sehingga waktu respons
+    tidak bergantung pada posisi halaman maupun ukuran tabel.
+    
+    Args:
+        filters: Dictionary opsional dengan key start_date, end_date,
+            customer_id, product, transaction_id
+        sort: Kolom urut ('date', 'total', atau 'id')
+        direction: 'asc' atau 'desc'
+        after: Cursor untuk halaman sesudah baris tersebut
+        before: Cursor untuk halaman sebelum baris tersebut
+        limit: Jumlah baris per halaman (maksimal MAX_PAGE_SIZE)
+    
+    Returns:
+        Dictionary dengan 'transactions' (list Transaksi), 'next_cursor', dan
+        'prev_cursor' (None jika tidak ada halaman berikutnya/sebelumnya)
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Kolom urut tidak dikenal: {sort}. Pilihan: {', '.join(SORT_COLUMNS)}")
+    if direction not in ('asc', 'desc'):
+        raise ValueError("Arah urutan harus 'asc' atau 'desc'")
+    if after and before:
+        raise ValueError('Gunakan salah satu dari after atau before')
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    
+    column = getattr(Transaksi, sort)
+    query = _filter_transactions(Transaksi.query, filters or {})
+    
+    # Halaman sebelumnya = baca mundur dari cursor lalu balik urutannya
+    cursor = after or before
+    ascending = (direction == 'asc') == (before is None)
+    if cursor:
+        key = tuple_(column, Transaksi.id)
+        value = _decode_cursor(cursor, sort)
+        query = query.filter(key > value if ascending else key < value)
+    
+    if ascending:
+        query = query.order_by(column.asc(), Transaksi.id.asc())
+    else:
+        query = query.order_by(column.desc(), Transaksi.id.desc())
+    
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman lanjutan
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before:
+        rows.reverse()
+    
+    if not rows:
+        return {'transactions': [], 'next_cursor': None, 'prev_cursor': None}
+    
+    more_after = has_more if before is None else True
+    more_before = has_more if before else bool(after)
+    
+    return {
+        'transactions': rows,
+        'next_cursor': _encode_cursor(rows[-1], sort) if more_after else None,
+        'prev_cursor': _encode_cursor(rows[0], sort) if more_before else None
+    }
+
+def _filter_transactions(query, filters):
+    """Terapkan filter halaman data transaksi ke query"""
+    if filters.get('start_date'):
+        query = query.filter(Transaksi.date >= _as_datetime(filters['start_date']))
+    if filters.get('end_date'):
+        query = query.filter(Transaksi.date < _as_datetime(filters['end_date']) + timedelta(days=1))
+    for name in ('customer_id', 'product', 'transaction_id'):
+        if filters.get(name):
+            query = query.filter(getattr(Transaksi, name) == filters[name])
+    return query
+
+def _encode_cursor(transaksi, sort):
+    value = getattr(transaksi, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, transaksi.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor, sort):
+    """Ubah cursor menjadi tuple (nilai kolom urut, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if sort == 'date':
+            value = datetime.fromisoformat(value)
+        elif sort == 'total':
+            value = float(value)
+        else:
+            value = int(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor halaman tidak valid')
 
-def get_transactions_dataframe():
+def get_transactions_dataframe(columns=None, start_date=None, end_date=None, customer_ids=None,
+                               segment_run_id=None, segments=None, batch_size=LOADER_BATCH_SIZE):
     """
     Ambil data transaksi dalam format DataFrame
     
+    Data dibaca per batch langsung dari cursor database ke kolom bertipe
+    (tanpa objek ORM): product dan customer_id sebagai categorical,
+    date sebagai datetime64, kode kamus produk_id/pelanggan_id sebagai int32.
+    Filter pelanggan dan segmen memakai index (pelanggan_id, date) dan
+    (run_id, cluster_label, customer_id), bukan memindai seluruh tabel.
+    
+    Args:
+        columns: List kolom yang diambil (default: semua kolom TRANSACTION_COLUMNS;
+            CODE_COLUMNS bisa ditambahkan)
+        start_date: Awal rentang tanggal transaksi (date/string ISO, inklusif)
+        end_date: Akhir rentang tanggal transaksi (date/string ISO, inklusif sampai akhir hari)
+        customer_ids: Batasi ke pelanggan tertentu (opsional)
+        segment_run_id: Run segmentasi untuk filter segmen (opsional);
+            hanya pelanggan yang ada di run ini yang diambil
+        segments: Batasi ke cluster_label tertentu pada segment_run_id (opsional)
+        batch_size: Jumlah baris per fetch dari cursor
+    
     Returns:
-        pandas DataFrame
+        pandas DataFrame (kosong jika tidak ada data)
     """
-    transactions = Transaksi.query.all()
+    if columns is None:
+        columns = TRANSACTION_COLUMNS
+    unknown = [c for c in columns if c not in TRANSACTION_COLUMNS and c not in CODE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Kolom tidak dikenal: {', '.join(unknown)}")
+    
+    table = Transaksi.__table__
+    # Tanggal diambil sebagai string agar diparsing sekaligus oleh pandas
+    selected = [type_coerce(table.c.date, db.String) if c == 'date' else table.c[c] for c in columns]
+    query = select(*selected).order_by(table.c.id)
+    
+    if start_date is not None:
+        query = query.where(table.c.date >= _as_datetime(start_date))
+    if end_date is not None:
+        query = query.where(table.c.date < _as_datetime(end_date) + timedelta(days=1))
+    if customer_ids is not None:
+        query = query.where(table.c.pelanggan_id.in_(
+            select(Pelanggan.__table__.c.id).where(Pelanggan.__table__.c.kode.in_(list(customer_ids)))
+        ))
+    if segment_run_id is not None:
+        segment_table = SegmentasiPelanggan.__table__
+        query = query.join(segment_table, (segment_table.c.run_id == segment_run_id) &
+                           (segment_table.c.customer_id == table.c.customer_id))
+        if segments is not None:
+            query = query.where(segment_table.c.cluster_label.in_(list(segments)))
     
-    if not transactions:
+    # Baca tuple mentah dari cursor DBAPI: semua kolom sudah bertipe dasar
+    # (tanggal di-coerce ke string), jadi tidak perlu objek Row SQLAlchemy.
+    # Tanpa stream_results, SQLAlchemy tidak mem-buffer baris dari cursor.
+    result = db.session.execute(query)
+    cursor = result.cursor
+    
+    parts = {c: [] for c in columns}
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for name, values in zip(columns, zip(*rows)):
+                parts[name].append(_to_column(name, values))
+    finally:
+        result.close()
+    
+    if not parts[columns[0]]:
         return pd.DataFrame()
     
-    data = [{
-        'id': t.id,
-        'transaction_id': t.transaction_id,
-        'date': t.date,
-        'customer_id': t.customer_id,
-        'product': t.product,
-        'quantity': t.quantity,
-        'price': t.price,
-        'total': t.total
-    } for t in transactions]
+    data = {}
+    for name in columns:
+        if name in CATEGORICAL_COLUMNS:
+            # Gabungkan kategori antar batch tanpa mengubahnya ke object
+            data[name] = union_categoricals(parts[name], ignore_order=True)
+        else:
+            data[name] = np.concatenate(parts[name])
+        parts[name] = None
     
     return pd.DataFrame(data)
 
+def _to_column(name, values):
+    """Ubah satu batch nilai kolom menjadi array bertipe"""
+    if name in CATEGORICAL_COLUMNS:
+        return pd.Categorical(values)
+    if name == 'date':
+        return pd.to_datetime(pd.Series(values), format='ISO8601').to_numpy()
+    if name in CODE_COLUMNS:
+        return np.fromiter(values, dtype=np.int32, count=len(values))
+    if name in ('id', 'quantity'):
+        return np.fromiter(values, dtype=np.int64, count=len(values))
+    if name in ('price', 'total'):
+        return np.fromiter(values, dtype=np.float64, count=len(values))
+    return np.array(values, dtype=object)
+
+def get_rfm_dataframe(current_date=None, start_date=None, end_date=None, customer_ids=None):
+    """
+    Hitung RFM per pelanggan
+    
+    Tanpa rentang tanggal, RFM dibaca dari ringkasan RFM tersimpan
+    (ringkasan_rfm). Dengan rentang tanggal, RFM dihitung langsung di
+    database dengan satu GROUP BY per kode integer pelanggan_id; hanya satu
+    baris per pelanggan yang dibaca ke Python, bukan seluruh baris transaksi.
+    
+    Args:
+        current_date: Tanggal referensi recency (default: akhir rentang
+            tanggal jika end_date diisi, selain itu akhir tanggal acuan
+            ringkasan RFM tersimpan)
+        start_date: Awal rentang tanggal transaksi (date/datetime, inklusif)
+        end_date: Akhir rentang tanggal transaksi (date, inklusif sampai akhir hari)
+        customer_ids: Batasi ke pelanggan tertentu (opsional)
+    
+    Returns:
+        DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary']
+    """
+    if start_date is None and end_date is None:
+        return get_rfm_summary(current_date, customer_ids)
+    
+    query = db.session.query(
+        Pelanggan.kode,
+        # Ambil sebagai string agar parsing tanggal dilakukan sekaligus oleh pandas
+        type_coerce(func.max(Transaksi.date), db.String),
+        func.count(distinct(Transaksi.transaction_id)),
+        func.sum(Transaksi.total)
+    ).join(Pelanggan, Pelanggan.id == Transaksi.pelanggan_id)
+    
+    if customer_ids is not None:
+        query = query.filter(Pelanggan.kode.in_(list(customer_ids)))
+    
+    if start_date is not None:
+        query = query.filter(Transaksi.date >= _as_datetime(start_date))
+    
+    if end_date is not None:
+        end_exclusive = _as_datetime(end_date) + timedelta(days=1)
+        query = query.filter(Transaksi.date < end_exclusive)
+        if current_date is None:
+            current_date = end_exclusive
+    
+    # Urut customer_id seperti sebelumnya agar hasil clustering tidak bergantung pada urutan kamus
+    rows = query.group_by(Transaksi.pelanggan_id).order_by(Pelanggan.kode).all()
+    summary = pd.DataFrame(rows, columns=['customer_id', 'last_date', 'Frequency', 'Monetary'])
+    
+    if summary.empty:
+        return pd.DataFrame(columns=['customer_id', 'Recency', 'Frequency', 'Monetary'])
+    
+    return rfm_from_summary(summary, current_date)
+
+def _as_datetime(value):
+    """Ubah date/string ISO menjadi datetime (jam 00:00)"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value
+
 def delete_transaction(transaction_id):
     """
     Hapus transaksi berdasarkan ID
@@ -133,11 +552,21 @@ def delete_transaction(transaction_id):
         Dictionary dengan key 'success' atau 'error'
     """
     try:
-        transaksi = Transaksi.query.get(transaction_id)
+        transaksi = db.session.get(Transaksi, transaction_id)
         if not transaksi:
             return {"error": "Transaksi tidak ditemukan"}
         
-        db.session.delete(transaksi)
+        deleted = pd.DataFrame([{
+            'transaction_id': transaksi.transaction_id,
+            'customer_id': transaksi.customer_id,
+            'product': transaksi.product,
+            'total': transaksi.total
+        }])
+        with maintain_itemset_support([transaksi.transaction_id]), maintain_statistics(deleted, sign=-1):
+            db.session.delete(transaksi)
+            db.session.flush()
+        refresh_rfm_customers([transaksi.pelanggan_id])
+        take_rfm_snapshot([transaksi.pelanggan_id])
         db.session.commit()
         return {"success": "Transaksi berhasil dihapus"}
     except Exception as e:
@@ -153,32 +582,157 @@ def delete_all_transactions():
     """
     try:
         count = Transaksi.query.delete()
+        reset_itemset_store()
+        reset_statistics()
+        reset_rfm_summary()
         db.session.commit()
         return {"success": f"Berhasil menghapus {count} data transaksi"}
     except Exception as e:
         db.session.rollback()
         return {"error": f"Error: {str(e)}"}
 
-def get_statistics():
+def get_data_fingerprint():
     """
-    Dapatkan statistik dasar dari data transaksi
+    Fingerprint ringkas dari isi tabel transaksi
+    
+    Berubah setiap kali data ditambah atau dihapus, dipakai untuk
+    mendeteksi apakah hasil analisis sebelumnya masih berlaku.
     
     Returns:
-        Dictionary dengan statistik
+        String hex pendek
+    """
+    row = db.session.query(
+        func.count(Transaksi.id), func.max(Transaksi.id), func.sum(Transaksi.total)
+    ).one()
+    return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:16]
+
+def get_product_ids(names):
     """
-    df = get_transactions_dataframe()
+    id kamus produk untuk nama-nama produk; nama yang belum ada ditambahkan
     
-    if df.empty:
-        return {
-            'total_transactions': 0,
-            'total_customers': 0,
-            'total_products': 0,
-            'total_revenue': 0
-        }
+    Tidak melakukan commit (ikut transaksi pemanggil).
     
-    return {
-        'total_transactions': df['transaction_id'].nunique(),
-        'total_customers': df['customer_id'].nunique(),
-        'total_products': df['product'].nunique(),
-        'total_revenue': df['total'].sum()
-    }
+    Args:
+        names: Iterable nama produk
+    
+    Returns:
+        Dictionary nama produk -> Produk.id
+    """
+    return _dictionary_ids(Produk, Produk.nama, names)
+
+def get_customer_ids(codes):
+    """
+    id kamus pelanggan untuk customer_id; yang belum ada ditambahkan
+    
+    Tidak melakukan commit (ikut transaksi pemanggil).
+    
+    Args:
+        codes: Iterable customer_id
+    
+    Returns:
+        Dictionary customer_id -> Pelanggan.id
+    """
+    return _dictionary_ids(Pelanggan, Pelanggan.kode, codes)
+
+def _dictionary_ids(model, column, values, cache=None):
+    """Ambil (atau tambahkan) id kamus untuk nilai-nilai unik, memakai cache jika ada"""
+    cache = {} if cache is None else cache
+    values = [value for value in dict.fromkeys(values) if value not in cache]
+    
+    for start in range(0, len(values), DICTIONARY_LOOKUP_BATCH):
+        batch = values[start:start + DICTIONARY_LOOKUP_BATCH]
+        cache.update(db.session.query(column, model.id).filter(column.in_(batch)).all())
+    
+    missing = [value for value in values if value not in cache]
+    if missing:
+        db.session.execute(model.__table__.insert(), [{column.key: value} for value in missing])
+        for start in range(0, len(missing), DICTIONARY_LOOKUP_BATCH):
+            batch = missing[start:start + DICTIONARY_LOOKUP_BATCH]
+            cache.update(db.session.query(column, model.id).filter(column.in_(batch)).all())
+    return cache
+
+def encode_keys(df, cache=None):
+    """
+    Kode integer kamus produk dan pelanggan untuk setiap baris transaksi
+    
+    Setiap nilai unik di-hash sekali (pd.factorize), lalu dicari di kamus
+    (nilai baru ditambahkan). Tidak melakukan commit.
+    
+    Args:
+        df: DataFrame dengan kolom product dan customer_id
+        cache: Dictionary {'product': {...}, 'customer_id': {...}} yang
+            dipakai ulang antar chunk dalam satu upload (opsional)
+    
+    Returns:
+        Tuple (produk_id, pelanggan_id) berupa array int32
+    """
+    cache = {} if cache is None else cache
+    encoded = []
+    for name, model, column in (('product', Produk, Produk.nama), ('customer_id', Pelanggan, Pelanggan.kode)):
+        codes, uniques = pd.factorize(df[name])
+        ids = _dictionary_ids(model, column, uniques.tolist(), cache.setdefault(name, {}))
+        lookup = np.array([ids[value] for value in uniques.tolist()], dtype=np.int32)
+        encoded.append(lookup[codes])
+    return tuple(encoded)
+
+def get_product_names():
+    """
+    Nama produk per id kamus
+    
+    Returns:
+        Array object dengan index = Produk.id (None untuk id yang tidak ada)
+    """
+    rows = db.session.query(Produk.id, Produk.nama).all()
+    names = np.empty(max((product_id for product_id, _ in rows), default=0) + 1, dtype=object)
+    for product_id, name in rows:
+        names[product_id] = name
+    return names
+
+def get_customer_segments(segment_run_id):
+    """
+    Segmen setiap pelanggan pada sebuah run segmentasi, per kode kamus pelanggan
+    
+    Untuk memetakan kolom pelanggan_id transaksi ke segmen tanpa JOIN per baris.
+    
+    Args:
+        segment_run_id: id AnalisisRun segmentasi
+    
+    Returns:
+        Tuple (labels, codes): labels = list cluster_label terurut, codes =
+        array int32 dengan index = Pelanggan.id berisi posisi label (-1 =
+        pelanggan tidak ada di run)
+    """
+    rows = db.session.query(Pelanggan.id, SegmentasiPelanggan.cluster_label).join(
+        SegmentasiPelanggan, SegmentasiPelanggan.customer_id == Pelanggan.kode
+    ).filter(SegmentasiPelanggan.run_id == segment_run_id).all()
+    
+    labels = sorted({label for _, label in rows})
+    positions = {label: position for position, label in enumerate(labels)}
+    codes = np.full(max((customer_id for customer_id, _ in rows), default=0) + 1, -1, dtype=np.int32)
+    for customer_id, label in rows:
+        codes[customer_id] = positions[label]
+    return labels, codes
+
+def backfill_dictionary_keys():
+    """
+    Isi produk_id dan pelanggan_id transaksi yang disimpan sebelum kamus ada
+    
+    Returns:
+        Jumlah baris yang dilengkapi
+    """
+    # Upload selalu mengisi kedua kolom sekaligus; cukup periksa satu (lewat index)
+    if db.session.query(Transaksi.id).filter(Transaksi.pelanggan_id.is_(None)).first() is None:
+        return 0
+    
+    count = 0
+    for model, column, source, target in ((Produk, Produk.nama, Transaksi.product, Transaksi.produk_id),
+                                          (Pelanggan, Pelanggan.kode, Transaksi.customer_id, Transaksi.pelanggan_id)):
+        values = [value for (value,) in db.session.query(source).filter(target.is_(None)).distinct()]
+        _dictionary_ids(model, column, values)
+        result = db.session.execute(update(Transaksi).where(target.is_(None)).values({
+            target: select(model.id).where(column == source).scalar_subquery()
+        }))
+        count = max(count, result.rowcount)
+    
+    db.session.commit()
+    return count
@@ -0,0 +1,144 @@
+"""
+Penyimpanan status job analisis di database (tabel job_analisis)
+
+Setiap proses web menjalankan job di process pool miliknya sendiri, tetapi
+status, progres, dan hasil job ditulis ke database yang sama. Karena itu
+polling /jobs/<id> boleh mendarat di worker web mana pun, dan job identik
+(jenis, parameter, dan fingerprint data sama) digabung lintas proses lewat
+unique index parsial pada kunci job yang belum selesai.
+
+Job yang proses pemiliknya berhenti di tengah jalan tidak pernah selesai;
+job aktif yang tidak diperbarui selama JOB_STALE_MINUTES dianggap gagal agar
+kuncinya bisa dipakai job baru.
+"""
+import json
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.transaksi import JobAnalisis
+from utils.jobs import Job, ACTIVE_STATUSES, DONE, FAILED, PENDING, RUNNING
+
+DEFAULT_STALE_MINUTES = 60
+DEFAULT_JOB_HISTORY = 100
+
+def _timestamp(value):
+    """DateTime UTC naif -> detik epoch (format lama Job.to_dict)"""
+    return (value - datetime(1970, 1, 1)).total_seconds() if value is not None else None
+
+def _to_job(row):
+    return Job(row.id, row.jenis, json.loads(row.params),
+               status=row.status,
+               progress=row.progress,
+               message=row.message,
+               result=json.loads(row.result) if row.result is not None else None,
+               error=row.error,
+               created_at=_timestamp(row.created_at),
+               finished_at=_timestamp(row.finished_at))
+
+class JobStore:
+    """
+    Store utils.jobs.JobManager berbasis tabel job_analisis
+    
+    Args:
+        app: Aplikasi Flask; dipakai untuk app context saat dipanggil dari
+            thread callback process pool
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    @contextmanager
+    def _session(self):
+        """Session database yang di-commit di akhir blok (app context dibuat jika belum ada)"""
+        with nullcontext() if has_app_context() else self.app.app_context():
+            try:
+                yield db.session
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    
+    def _config(self, name, default):
+        return self.app.config.get(name, default)
+    
+    def create(self, job_id, kind, params, fingerprint, key):
+        """
+        Buat job baru, atau kembalikan job aktif dengan kunci yang sama
+        
+        Returns:
+            Tuple (Job, created)
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(minutes=self._config('JOB_STALE_MINUTES', DEFAULT_STALE_MINUTES))
+        
+        with self._session() as session:
+            JobAnalisis.query.filter(
+                JobAnalisis.status.in_(ACTIVE_STATUSES), JobAnalisis.updated_at < stale_before
+            ).update({'status': FAILED, 'message': 'Gagal', 'finished_at': now,
+                      'error': 'Job tidak selesai (proses worker berhenti)'}, synchronize_session=False)
+            self._prune(session)
+        
+        for _ in range(2):
+            row = JobAnalisis(id=job_id, jenis=kind, params=json.dumps(params, sort_keys=True),
+                              fingerprint=fingerprint, kunci=key, status=PENDING,
+                              message='Menunggu antrian', created_at=now, updated_at=now)
+            try:
+                with self._session() as session:
+                    session.add(row)
+                    job = _to_job(row)
+                return job, True
+            except IntegrityError:
+                # Job identik sudah dibuat (mungkin oleh proses web lain)
+                with self._session() as session:
+                    existing = session.execute(select(JobAnalisis).where(
+                        JobAnalisis.kunci == key, JobAnalisis.status.in_(ACTIVE_STATUSES)
+                    )).scalar()
+                    if existing is not None:
+                        return _to_job(existing), False
+        raise RuntimeError(f'Job {kind} tidak bisa dibuat')
+    
+    def _prune(self, session):
+        """Buang job selesai selain JOB_HISTORY job terbaru"""
+        keep = select(JobAnalisis.id).where(JobAnalisis.status.in_((DONE, FAILED))) \
+            .order_by(JobAnalisis.finished_at.desc()).limit(self._config('JOB_HISTORY', DEFAULT_JOB_HISTORY))
+        session.execute(JobAnalisis.__table__.delete().where(
+            JobAnalisis.status.in_((DONE, FAILED)), JobAnalisis.id.not_in(keep.scalar_subquery())
+        ))
+    
+    def get(self, job_id):
+        """Job berdasarkan id, atau None"""
+        with self._session() as session:
+            row = session.get(JobAnalisis, job_id)
+            return _to_job(row) if row is not None else None
+    
+    def update_progress(self, job_id, percent, message):
+        """Catat progres job yang belum selesai"""
+        with self._session():
+            JobAnalisis.query.filter(
+                JobAnalisis.id == job_id, JobAnalisis.status.in_(ACTIVE_STATUSES)
+            ).update({'status': RUNNING, 'progress': percent, 'message': message,
+                      'updated_at': datetime.utcnow()}, synchronize_session=False)
+    
+    def finish(self, job_id, result=None, error=None):
+        """Tandai job selesai dengan hasil (JSON) atau pesan error"""
+        payload = None
+        if error is None:
+            try:
+                payload = json.dumps(result)
+            except (TypeError, ValueError) as e:
+                error = f'Hasil job tidak bisa disimpan: {e}'
+        
+        now = datetime.utcnow()
+        with self._session():
+            JobAnalisis.query.filter(JobAnalisis.id == job_id).update({
+                'status': FAILED if error else DONE,
+                'progress': 100,
+                'message': 'Gagal' if error else 'Selesai',
+                'result': payload,
+                'error': error,
+                'updated_at': now,
+                'finished_at': now
+            }, synchronize_session=False)
@@ -0,0 +1,180 @@
+"""
+Controller laporan perpindahan segmen pelanggan antara dua run segmentasi
+
+Setiap run segmentasi menyimpan segmen semua pelanggannya (baris
+SegmentasiPelanggan dengan run_id), sehingga perpindahan segmen dihitung
+dengan satu JOIN antara baris kedua run pada (run_id, customer_id) lalu
+GROUP BY pasangan label, sepenuhnya di database. Pelanggan yang hanya ada di
+run tujuan dihitung sebagai pelanggan baru, yang hanya ada di run asal
+sebagai pelanggan hilang (dari selisih jumlah per label).
+"""
+from sqlalchemy import and_, func, select
+from models import db
+from models.transaksi import AnalisisRun, SegmentasiPelanggan
+from controllers.result_controller import READY_STATUSES, get_active_run_id, get_run
+
+DEFAULT_MIGRATION_CUSTOMERS = 100
+MAX_MIGRATION_CUSTOMERS = 1000
+
+def _migration_runs(from_run_id=None, to_run_id=None):
+    """
+    Run asal dan tujuan laporan perpindahan
+    
+    Default run tujuan adalah run segmentasi aktif, dan run asal adalah run
+    segmentasi tersimpan sebelumnya (dibuat lebih dulu).
+    
+    Returns:
+        Tuple (from_run, to_run, error)
+    """
+    if to_run_id is None:
+        to_run_id = get_active_run_id('segmentasi')
+    to_run = get_run('segmentasi', to_run_id) if to_run_id is not None else None
+    if to_run is None:
+        return None, None, {'error': 'Run segmentasi tujuan tidak ditemukan. Jalankan segmentasi terlebih dahulu.'}
+    
+    if from_run_id is None:
+        from_run = AnalisisRun.query.filter(
+            AnalisisRun.jenis == 'segmentasi', AnalisisRun.status.in_(READY_STATUSES),
+            AnalisisRun.created_at <= to_run.created_at, AnalisisRun.id != to_run.id
+        ).order_by(AnalisisRun.created_at.desc(), AnalisisRun.id.desc()).first()
+        if from_run is None:
+            return None, to_run, {'error': 'Belum ada run segmentasi sebelumnya untuk dibandingkan.'}
+    else:
+        from_run = get_run('segmentasi', from_run_id)
+        if from_run is None:
+            return None, to_run, {'error': 'Run segmentasi asal tidak ditemukan.'}
+    
+    if from_run.id == to_run.id:
+        return from_run, to_run, {'error': 'Run asal dan tujuan harus berbeda.'}
+    return from_run, to_run, None
+
+def _label_counts(run_id):
+    table = SegmentasiPelanggan.__table__
+    rows = db.session.execute(
+        select(table.c.cluster_label, func.count()).where(table.c.run_id == run_id).group_by(table.c.cluster_label)
+    )
+    return dict(rows.all())
+
+def segment_migration(from_run_id=None, to_run_id=None):
+    """
+    Matriks perpindahan segmen pelanggan dari satu run segmentasi ke run lain
+    
+    Args:
+        from_run_id: id run segmentasi asal (default: run sebelum run tujuan)
+        to_run_id: id run segmentasi tujuan (default: run aktif)
+    
+    Returns:
+        Dictionary dengan key 'error', atau:
+        - from_run, to_run: id run asal dan tujuan
+        - from_labels, to_labels: label segmen masing-masing run (terurut)
+        - matrix: dictionary label asal -> (label tujuan -> jumlah pelanggan)
+        - new: label tujuan -> jumlah pelanggan yang tidak ada di run asal
+        - lost: label asal -> jumlah pelanggan yang tidak ada di run tujuan
+        - stayed, moved: jumlah pelanggan yang segmennya tetap/berubah
+    """
+    from_run, to_run, error = _migration_runs(from_run_id, to_run_id)
+    if error:
+        return error
+    
+    source = SegmentasiPelanggan.__table__.alias('asal')
+    target = SegmentasiPelanggan.__table__.alias('tujuan')
+    rows = db.session.execute(
+        select(source.c.cluster_label, target.c.cluster_label, func.count())
+        .select_from(source.join(target, and_(
+            target.c.run_id == to_run.id, target.c.customer_id == source.c.customer_id
+        )))
+        .where(source.c.run_id == from_run.id)
+        .group_by(source.c.cluster_label, target.c.cluster_label)
+    ).all()
+    
+    from_totals = _label_counts(from_run.id)
+    to_totals = _label_counts(to_run.id)
+    from_labels = sorted(from_totals)
+    to_labels = sorted(to_totals)
+    
+    matrix = {label: dict.fromkeys(to_labels, 0) for label in from_labels}
+    for from_label, to_label, count in rows:
+        matrix[from_label][to_label] = count
+    
+    stayed = sum(count for from_label, to_label, count in rows if from_label == to_label)
+    return {
+        'from_run': from_run.id,
+        'to_run': to_run.id,
+        'from_labels': from_labels,
+        'to_labels': to_labels,
+        'matrix': matrix,
+        'new': {label: to_totals[label] - sum(matrix[source_label][label] for source_label in from_labels)
+                for label in to_labels},
+        'lost': {label: from_totals[label] - sum(matrix[label].values()) for label in from_labels},
+        'stayed': stayed,
+        'moved': sum(count for _, _, count in rows) - stayed
+    }
+
+def migration_customers(from_label, to_label, from_run_id=None, to_run_id=None,
+                        limit=DEFAULT_MIGRATION_CUSTOMERS, after=None):
+    """
+    Daftar pelanggan untuk satu perpindahan segmen (urut customer_id, per halaman)
+    
+    Args:
+        from_label: Label segmen asal, atau None untuk pelanggan baru
+        to_label: Label segmen tujuan, atau None untuk pelanggan hilang
+        from_run_id: id run segmentasi asal (default: run sebelum run tujuan)
+        to_run_id: id run segmentasi tujuan (default: run aktif)
+        limit: Jumlah pelanggan per halaman
+        after: customer_id terakhir halaman sebelumnya (keyset pagination)
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'from_run', 'to_run', 'customers'
+        (list dictionary customer_id serta recency/frequency/monetary di run
+        asal dan tujuan, None jika tidak ada) dan 'next_after' (None jika
+        halaman terakhir)
+    """
+    if from_label is None and to_label is None:
+        return {'error': 'Isi segmen asal dan/atau segmen tujuan'}
+    if not 1 <= limit <= MAX_MIGRATION_CUSTOMERS:
+        return {'error': f'limit harus di antara 1 dan {MAX_MIGRATION_CUSTOMERS}'}
+    
+    from_run, to_run, error = _migration_runs(from_run_id, to_run_id)
+    if error:
+        return error
+    
+    source = SegmentasiPelanggan.__table__.alias('asal')
+    target = SegmentasiPelanggan.__table__.alias('tujuan')
+    if from_label is None:
+        # Pelanggan baru: ada di run tujuan, tidak ada di run asal
+        base, other, base_run, other_run, label = target, source, to_run, from_run, to_label
+    else:
+        base, other, base_run, other_run, label = source, target, from_run, to_run, from_label
+    
+    query = select(
+        base.c.customer_id, source.c.recency, source.c.frequency, source.c.monetary,
+        target.c.recency, target.c.frequency, target.c.monetary
+    ).select_from(base.outerjoin(other, and_(
+        other.c.run_id == other_run.id, other.c.customer_id == base.c.customer_id
+    ))).where(base.c.run_id == base_run.id, base.c.cluster_label == label)
+    
+    if from_label is None or to_label is None:
+        query = query.where(other.c.id.is_(None))
+    else:
+        query = query.where(target.c.cluster_label == to_label)
+    if after is not None:
+        query = query.where(base.c.customer_id > after)
+    
+    rows = db.session.execute(query.order_by(base.c.customer_id).limit(limit + 1)).all()
+    
+    def rfm(recency, frequency, monetary):
+        if recency is None:
+            return None
+        return {'recency': recency, 'frequency': frequency, 'monetary': monetary}
+    
+    customers = [{
+        'customer_id': row[0],
+        'from': rfm(*row[1:4]),
+        'to': rfm(*row[4:7])
+    } for row in rows[:limit]]
+    return {
+        'from_run': from_run.id,
+        'to_run': to_run.id,
+        'customers': customers,
+        'next_after': customers[-1]['customer_id'] if len(rows) > limit else None
+    }
@@ -0,0 +1,369 @@
+"""
+Controller untuk pemeliharaan support itemset secara inkremental
+
+Setelah mining penuh, count setiap itemset frequent (support >=
+store_min_support) beserta negative border-nya disimpan di tabel
+support_itemset_produk, dengan kunci kode kamus produk. Negative border
+adalah itemset yang tidak frequent tetapi semua subset-nya frequent,
+termasuk produk tunggal yang tidak frequent. Upload dan hapus transaksi
+hanya memperbarui count itemset tersimpan yang termuat di keranjang yang
+berubah, sehingga rules bisa dibentuk ulang dari count tersimpan tanpa
+membaca seluruh tabel transaksi.
+
+Itemset yang tidak tersimpan selalu memuat satu itemset border, sehingga
+count-nya tidak melebihi count itemset border tersebut. Rules untuk
+min_support tertentu dibentuk dari count tersimpan selama count terbesar
+itemset border masih di bawah ceil(min_support * N); jika tidak, perlu
+mining penuh.
+
+Jika count itemset border sudah mencapai min_support, itemset itu dinaikkan
+menjadi itemset tersimpan biasa dan perluasannya dihitung hanya dari
+keranjang yang memuatnya (promote_border), seperti algoritma border untuk
+mining inkremental.
+
+Kumpulan kode itemset tersimpan (tanpa count) disalin ke memori setiap
+proses dan dipakai ulang antar chunk upload selama versinya sama dengan
+status_support_itemset.versi.
+"""
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import bindparam, distinct, func, select, update
+from models import db
+from models.transaksi import Transaksi, Produk, SupportItemset, StatusMining
+from utils.apriori import generate_rules
+from utils.frequent_itemsets import min_support_count, negative_border
+
+BASKET_QUERY_BATCH = 10000
+# Promosi border berhenti jika keranjang yang perlu dibaca melebihi proporsi ini (mining penuh lebih murah)
+PROMOTION_MAX_SHARE = 0.25
+
+# (versi, set tuple Produk.id) itemset tersimpan yang terakhir dimuat proses ini
+_stored = (None, frozenset())
+
+def _itemset_code(product_ids):
+    return ','.join(str(product_id) for product_id in sorted(product_ids))
+
+def _parse_code(code):
+    return tuple(int(product_id) for product_id in code.split(','))
+
+def get_mining_state():
+    """Status support itemset tersimpan, atau None jika belum pernah mining"""
+    return StatusMining.query.first()
+
+def save_itemset_store(frequent_itemsets, matrix, items, store_min_support, max_len=None):
+    """
+    Simpan hasil mining penuh sebagai dasar update inkremental
+    
+    Args:
+        frequent_itemsets: DataFrame ['support', 'itemsets'] hasil mining
+            dengan min_support = store_min_support
+        matrix: Matriks CSR transaksi x produk yang di-mining
+        items: Array nama produk sesuai urutan kolom matrix
+        store_min_support: Min support yang dipakai saat mining
+        max_len: Panjang itemset maksimal saat mining (None = tanpa batas)
+    """
+    global _stored
+    reset_itemset_store()
+    
+    n_transactions = matrix.shape[0]
+    column_of = {item: code for code, item in enumerate(items)}
+    frequent = [tuple(column_of[item] for item in itemset) for itemset in frequent_itemsets['itemsets']]
+    border = negative_border(matrix, frequent, max_len)
+    
+    product_ids = dict(db.session.query(Produk.nama, Produk.id))
+    column_ids = [product_ids[item] for item in items]
+    
+    records = [
+        {'kode': _itemset_code(column_ids[code] for code in codes), 'panjang': len(codes),
+         'count': int(round(support * n_transactions)), 'batas': False}
+        for support, codes in zip(frequent_itemsets['support'], frequent)
+    ] + [
+        {'kode': _itemset_code(column_ids[code] for code in codes), 'panjang': len(codes),
+         'count': count, 'batas': True}
+        for codes, count in border
+    ]
+    if records:
+        db.session.execute(SupportItemset.__table__.insert(), records)
+    
+    versi = uuid.uuid4().hex
+    db.session.add(StatusMining(
+        n_transactions=n_transactions,
+        store_min_support=store_min_support,
+        max_len=max_len,
+        versi=versi
+    ))
+    db.session.commit()
+    _stored = (versi, frozenset(_parse_code(record['kode']) for record in records))
+
+def reset_itemset_store():
+    """Hapus support itemset tersimpan (commit oleh pemanggil)"""
+    SupportItemset.query.delete()
+    StatusMining.query.delete()
+
+def can_derive_rules(min_support, max_len=None):
+    """
+    Cek apakah rules untuk min_support ini bisa dibentuk dari count tersimpan
+    
+    Args:
+        min_support: Minimum support threshold
+        max_len: Jumlah produk maksimal per rule (None = tanpa batas)
+    
+    Returns:
+        True jika semua itemset dengan support >= min_support pasti tersimpan
+    """
+    state = get_mining_state()
+    if state is None or state.n_transactions == 0:
+        return False
+    
+    min_count = min_support_count(min_support, state.n_transactions)
+    border_count = db.session.query(func.max(SupportItemset.count)).filter(SupportItemset.batas.is_(True)).scalar()
+    if (border_count or 0) >= min_count:
+        return False
+    
+    if state.max_len is not None and (max_len is None or max_len > state.max_len):
+        # Itemset yang lebih panjang dari max_len mining tidak tersimpan; count-nya
+        # tidak melebihi count subset-nya yang sepanjang max_len
+        longest_count = db.session.query(func.max(SupportItemset.count)).filter(
+            SupportItemset.panjang == state.max_len
+        ).scalar()
+        if (longest_count or 0) >= min_count:
+            return False
+    
+    return True
+
+def _baskets_containing(itemset):
+    """Keranjang (set Produk.id) yang memuat semua produk itemset"""
+    names = [name for (name,) in db.session.query(Produk.nama).filter(Produk.id.in_(itemset))]
+    transaction_ids = db.session.query(Transaksi.transaction_id).filter(
+        Transaksi.product.in_(names)
+    ).group_by(Transaksi.transaction_id).having(func.count(distinct(Transaksi.product)) == len(names))
+    return load_baskets(transaction_id for (transaction_id,) in transaction_ids).values()
+
+def promote_border(min_support):
+    """
+    Naikkan itemset border yang count-nya sudah mencapai min_support (commit)
+    
+    Itemset border tersebut menjadi itemset tersimpan biasa, lalu
+    perluasannya yang semua subset-nya tersimpan biasa dihitung dari keranjang
+    yang memuat itemset itu saja dan disimpan sebagai border baru. Diulang
+    sampai tidak ada border yang mencapai min_support, selama jumlah keranjang
+    yang dibaca tidak melebihi PROMOTION_MAX_SHARE dari seluruh transaksi.
+    
+    Args:
+        min_support: Minimum support threshold
+    
+    Returns:
+        True jika tidak ada lagi itemset border dengan support >= min_support
+    """
+    global _stored
+    state = get_mining_state()
+    if state is None or state.n_transactions == 0:
+        return False
+    
+    min_count = min_support_count(min_support, state.n_transactions)
+    budget = state.n_transactions * PROMOTION_MAX_SHARE
+    promoted_any = False
+    
+    while True:
+        rows = db.session.query(SupportItemset.kode, SupportItemset.count).filter(
+            SupportItemset.batas.is_(True), SupportItemset.count >= min_count
+        ).all()
+        budget -= sum(count for _, count in rows)
+        if not rows or budget < 0:
+            break
+        
+        db.session.execute(update(SupportItemset).where(
+            SupportItemset.kode.in_([code for code, _ in rows])
+        ).values(batas=False))
+        stored = {_parse_code(code): batas for code, batas in db.session.query(SupportItemset.kode, SupportItemset.batas)}
+        frequent = {itemset for itemset, batas in stored.items() if not batas}
+        singles = sorted(itemset[0] for itemset in frequent if len(itemset) == 1)
+        
+        candidates = {}
+        for itemset in map(_parse_code, (code for code, _ in rows)):
+            if state.max_len is not None and len(itemset) >= state.max_len:
+                continue
+            
+            extensions = []
+            for code in singles:
+                candidate = tuple(sorted(set(itemset) | {code}))
+                if len(candidate) == len(itemset) or candidate in stored or candidate in candidates:
+                    continue
+                if all(candidate[:j] + candidate[j + 1:] in frequent for j in range(len(candidate))):
+                    extensions.append(candidate)
+            if not extensions:
+                continue
+            
+            baskets = _baskets_containing(itemset)
+            for candidate in extensions:
+                candidates[candidate] = sum(1 for basket in baskets if basket.issuperset(candidate))
+        
+        if candidates:
+            db.session.execute(SupportItemset.__table__.insert(), [
+                {'kode': _itemset_code(candidate), 'panjang': len(candidate), 'count': count, 'batas': True}
+                for candidate, count in candidates.items()
+            ])
+        promoted_any = True
+    
+    if promoted_any:
+        db.session.execute(update(StatusMining).values(versi=uuid.uuid4().hex))
+        _stored = (None, frozenset())
+        db.session.commit()
+    
+    return not rows
+
+def derive_rules(min_support, min_confidence, max_len=None, **limits):
+    """
+    Bentuk association rules dari count tersimpan tanpa membaca tabel transaksi
+    
+    Hanya valid jika can_derive_rules(min_support, max_len) bernilai True.
+    
+    Args:
+        min_support: Minimum support threshold
+        min_confidence: Minimum confidence threshold
+        max_len: Jumlah produk maksimal per rule (None = tanpa batas)
+        limits: top_k, metric, max_per_antecedent (lihat generate_rules)
+    
+    Returns:
+        DataFrame rules dengan format yang sama seperti run_apriori
+    """
+    state = get_mining_state()
+    n_transactions = state.n_transactions
+    min_count = min_support_count(min_support, n_transactions)
+    
+    query = db.session.query(SupportItemset.kode, SupportItemset.count).filter(
+        SupportItemset.count >= min_count
+    )
+    if max_len is not None:
+        query = query.filter(SupportItemset.panjang <= max_len)
+    rows = [(_parse_code(code), count) for code, count in query]
+    
+    product_ids = {product_id for codes, _ in rows for product_id in codes}
+    names = dict(db.session.query(Produk.id, Produk.nama).filter(Produk.id.in_(product_ids))) if product_ids else {}
+    
+    frequent_itemsets = pd.DataFrame({
+        'support': [count / n_transactions for _, count in rows],
+        'itemsets': [frozenset(names[product_id] for product_id in codes) for codes, _ in rows]
+    })
+    
+    return generate_rules(frequent_itemsets, min_confidence, max_len=max_len, **limits)
+
+def load_baskets(transaction_ids):
+    """
+    Ambil isi keranjang (set kode produk) untuk transaction_id tertentu
+    
+    Returns:
+        Dictionary transaction_id -> set Produk.id
+    """
+    transaction_ids = list(transaction_ids)
+    baskets = {}
+    
+    for start in range(0, len(transaction_ids), BASKET_QUERY_BATCH):
+        batch = transaction_ids[start:start + BASKET_QUERY_BATCH]
+        rows = db.session.query(Transaksi.transaction_id, Transaksi.produk_id).filter(
+            Transaksi.transaction_id.in_(batch)
+        )
+        for transaction_id, product_id in rows:
+            baskets.setdefault(transaction_id, set()).add(product_id)
+    
+    return baskets
+
+def _stored_itemsets(versi):
+    """Kode itemset tersimpan, dimuat ulang dari database hanya jika versinya berubah"""
+    global _stored
+    if _stored[0] != versi:
+        codes = db.session.execute(select(SupportItemset.kode)).scalars()
+        _stored = (versi, frozenset(_parse_code(code) for code in codes))
+    return _stored[1]
+
+def _count_contained(basket, stored, deltas, sign):
+    """Tambahkan sign ke delta setiap itemset tersimpan yang termuat di basket"""
+    codes = sorted(basket)
+    # Kumpulan tersimpan tertutup ke bawah: cukup perluas prefix yang tersimpan
+    stack = [((), 0)]
+    while stack:
+        prefix, start = stack.pop()
+        for position in range(start, len(codes)):
+            itemset = prefix + (codes[position],)
+            if itemset in stored:
+                deltas[itemset] += sign
+                stack.append((itemset, position + 1))
+            elif not prefix:
+                # Produk tanpa count tersimpan (mis. produk baru): masuk sebagai border
+                deltas[itemset] += sign
+
+def apply_basket_changes(old_baskets, new_baskets):
+    """
+    Perbarui count support itemset dari keranjang yang berubah (commit oleh pemanggil)
+    
+    Hanya itemset tersimpan yang termuat di keranjang lama atau baru yang
+    dihitung; itemset lain count-nya tidak berubah.
+    
+    Args:
+        old_baskets: Dictionary transaction_id -> set Produk.id sebelum perubahan
+        new_baskets: Dictionary transaction_id -> set Produk.id sesudah perubahan
+    """
+    global _stored
+    
+    changed = [
+        transaction_id for transaction_id in set(old_baskets) | set(new_baskets)
+        if old_baskets.get(transaction_id, set()) != new_baskets.get(transaction_id, set())
+    ]
+    if not changed:
+        return
+    
+    old_list = [old_baskets[t] for t in changed if old_baskets.get(t)]
+    new_list = [new_baskets[t] for t in changed if new_baskets.get(t)]
+    
+    # Tulis dulu agar versi dibaca setelah kunci tulis database dipegang
+    db.session.execute(update(StatusMining).values(
+        n_transactions=StatusMining.n_transactions + len(new_list) - len(old_list)
+    ))
+    versi = db.session.execute(select(StatusMining.versi)).scalar()
+    stored = _stored_itemsets(versi)
+    
+    deltas = Counter()
+    for basket in old_list:
+        _count_contained(basket, stored, deltas, -1)
+    for basket in new_list:
+        _count_contained(basket, stored, deltas, 1)
+    
+    new_items = [itemset for itemset in deltas if itemset not in stored]
+    if new_items:
+        db.session.execute(SupportItemset.__table__.insert(), [
+            {'kode': _itemset_code(itemset), 'panjang': 1, 'count': 0, 'batas': True} for itemset in new_items
+        ])
+        versi = uuid.uuid4().hex
+        db.session.execute(update(StatusMining).values(versi=versi))
+        _stored = (versi, stored | frozenset(new_items))
+    
+    updates = [{'_kode': _itemset_code(itemset), 'delta': delta} for itemset, delta in deltas.items() if delta]
+    if updates:
+        table = SupportItemset.__table__
+        db.session.execute(
+            table.update().where(table.c.kode == bindparam('_kode')).values(count=table.c.count + bindparam('delta')),
+            updates
+        )
+
+@contextmanager
+def maintain_itemset_support(transaction_ids):
+    """
+    Bungkus perubahan data transaksi agar support itemset tersimpan ikut diperbarui
+    
+    Contoh:
+        with maintain_itemset_support(transaction_ids):
+            bulk_insert_transactions(chunk)
+    
+    Args:
+        transaction_ids: transaction_id yang keranjangnya mungkin berubah
+    """
+    if get_mining_state() is None:
+        yield
+        return
+    
+    transaction_ids = set(transaction_ids)
+    old_baskets = load_baskets(transaction_ids)
+    yield
+    apply_basket_changes(old_baskets, load_baskets(transaction_ids))
@@ -0,0 +1,244 @@
+"""
+Controller rekomendasi produk real-time untuk sebuah keranjang belanja
+
+Rules run MBA dimuat sekali ke RuleIndex di memori. Index dibuat utuh lebih
+dulu lalu baru dipasang, sehingga permintaan yang berjalan selalu membaca
+index lama atau index baru yang lengkap. Run aktif diperiksa ulang paling
+sering sekali per RECOMMENDATION_REFRESH_SECONDS (satu query ringan), sehingga
+permintaan lain tidak menyentuh database; begitu run aktif berganti, index
+run baru dibuat sekali dan dipakai seterusnya.
+
+Jika customer_id diberikan dan segmennya punya run MBA per segmen (Mining
+per Segmen pada run segmentasi aktif), rules segmen itu yang dipakai; run
+aktif seluruh transaksi menjadi cadangan. Pemetaan label segmen -> run
+di-cache di samping index rules dan dibangun ulang hanya jika stempel run
+bercakupan (jumlah, id terbaru, waktu pakai terakhir, dan run segmentasi
+aktif) berubah, yaitu saat run ditulis, dipakai, atau dibuang. Stempel itu
+juga diperiksa paling sering sekali per RECOMMENDATION_REFRESH_SECONDS.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import func
+from models import db
+from models.transaksi import AnalisisRun, AturanAsosiasi, SegmentasiPelanggan
+from controllers.result_controller import READY_STATUSES, get_active_run_id, load_rules
+from controllers.scoring_controller import score_customers
+from utils.recommendation import RuleIndex
+
+DEFAULT_RECOMMENDATIONS = 10
+MAX_RECOMMENDATIONS = 50
+MAX_BASKET_SIZE = 100
+# Run aktif ditambah beberapa run per segmen
+INDEX_CACHE_SIZE = 6
+DEFAULT_REFRESH_SECONDS = 1.0
+
+# (run_id, created_at) -> RuleIndex; created_at ikut menjadi kunci karena id
+# run bisa dipakai ulang setelah semua hasil dihapus
+_indexes = OrderedDict()
+_build_lock = threading.Lock()
+
+# (waktu pemeriksaan, kunci run aktif) terakhir
+_active_key = (float('-inf'), None)
+
+# (waktu pemeriksaan, stempel run bercakupan, {label segmen: kunci run}) terakhir
+_segment_runs = (float('-inf'), None, {})
+
+def _run_key(run_id=None):
+    """Kunci cache (id, created_at) run MBA aktif atau run terpilih, atau None"""
+    query = db.session.query(AnalisisRun.id, AnalisisRun.created_at).filter(AnalisisRun.jenis == 'mba')
+    if run_id is None:
+        query = query.filter(AnalisisRun.status == 'aktif').order_by(AnalisisRun.id.desc())
+    else:
+        query = query.filter(AnalisisRun.id == run_id, AnalisisRun.status.in_(READY_STATUSES))
+    row = query.first()
+    return (row.id, row.created_at) if row is not None else None
+
+def _refresh_due(checked_at):
+    refresh = current_app.config.get('RECOMMENDATION_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+    return time.monotonic() - checked_at >= refresh
+
+def _current_active_key():
+    """Kunci run MBA aktif, dibaca ulang dari database jika pemeriksaan terakhir sudah kedaluwarsa"""
+    global _active_key
+    checked_at, key = _active_key
+    if _refresh_due(checked_at):
+        key = _run_key()
+        _active_key = (time.monotonic(), key)
+    return key
+
+def _load_index(run_id):
+    if run_id is not None:
+        # Item rules dari tabel item_aturan (aman untuk nama produk yang memuat koma)
+        return RuleIndex(load_rules(run_id).itertuples(index=False))
+    
+    rows = db.session.query(
+        AturanAsosiasi.antecedents, AturanAsosiasi.consequents,
+        AturanAsosiasi.support, AturanAsosiasi.confidence, AturanAsosiasi.lift
+    ).filter(AturanAsosiasi.run_id.is_(None)).all()
+    return RuleIndex(rows)
+
+def get_rule_index(run_id=None):
+    """
+    Index rules sebuah run MBA (default: run aktif)
+    
+    Args:
+        run_id: id AnalisisRun MBA (opsional)
+    
+    Returns:
+        Tuple (run_id, RuleIndex), atau (None, None) jika run tidak ditemukan
+    """
+    if run_id is None:
+        key = _current_active_key()
+    else:
+        key = _run_key(run_id)
+    if key is None:
+        if run_id is not None or get_active_run_id('mba') is not None:
+            return None, None
+        # Rules lama tanpa run (dari versi sebelumnya) tidak di-cache
+        index = _load_index(None)
+        return None, index if len(index) else None
+    
+    return key[0], _cached_index(key)
+
+def _cached_index(key):
+    """RuleIndex untuk kunci run (id, created_at), dibuat sekali lalu di-cache"""
+    index = _indexes.get(key)
+    if index is None:
+        with _build_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _load_index(key[0])
+                _indexes[key] = index
+                while len(_indexes) > INDEX_CACHE_SIZE:
+                    _indexes.popitem(last=False)
+    return index
+
+def customer_segment(customer_id):
+    """
+    Segmen pelanggan dari run segmentasi aktif
+    
+    Pelanggan yang belum ada di run tersebut (misalnya baru diupload)
+    dinilai dengan model segmentasi tersimpan.
+    
+    Args:
+        customer_id: ID pelanggan
+    
+    Returns:
+        Dictionary cluster, cluster_label, sumber ('segmentasi' atau 'model'),
+        atau None jika segmennya tidak diketahui
+    """
+    run_id = get_active_run_id('segmentasi')
+    if run_id is None:
+        return None
+    
+    row = db.session.query(SegmentasiPelanggan.cluster, SegmentasiPelanggan.cluster_label).filter(
+        SegmentasiPelanggan.run_id == run_id, SegmentasiPelanggan.customer_id == customer_id
+    ).first()
+    if row is not None:
+        return {'cluster': row.cluster, 'cluster_label': row.cluster_label, 'sumber': 'segmentasi'}
+    
+    scored = score_customers([customer_id], run_id)
+    if scored.get('results'):
+        result = scored['results'][0]
+        return {'cluster': result['cluster'], 'cluster_label': result['cluster_label'], 'sumber': 'model'}
+    return None
+
+def _segment_runs_stamp():
+    """Stempel run MBA bercakupan; berubah setiap run ditulis, dipakai (touch_run), atau dibuang"""
+    row = db.session.query(
+        func.count(AnalisisRun.id), func.max(AnalisisRun.id), func.max(AnalisisRun.last_used_at)
+    ).filter(
+        AnalisisRun.jenis == 'mba', AnalisisRun.status.in_(READY_STATUSES), AnalisisRun.cakupan.isnot(None)
+    ).one()
+    return (get_active_run_id('segmentasi'),) + tuple(row)
+
+def _load_segment_runs(segment_run):
+    """Label segmen -> kunci run (id, created_at) MBA per segmen run segmentasi segment_run"""
+    runs = db.session.query(AnalisisRun.id, AnalisisRun.created_at, AnalisisRun.params).filter(
+        AnalisisRun.jenis == 'mba', AnalisisRun.status.in_(READY_STATUSES), AnalisisRun.cakupan.isnot(None)
+    ).order_by(AnalisisRun.last_used_at.desc(), AnalisisRun.id.desc())
+    
+    segment_runs = {}
+    for run_id, created_at, params in runs:
+        scope = json.loads(params or '{}').get('scope')
+        # Hanya cakupan segmen saja (tanpa rentang tanggal atau daftar pelanggan)
+        if isinstance(scope, dict) and scope == {'segment': scope.get('segment'), 'segment_run': segment_run}:
+            segment_runs.setdefault(scope['segment'], (run_id, created_at))
+    return segment_runs
+
+def segment_run_key(segment):
+    """
+    Run MBA per segmen untuk satu label segmen run segmentasi aktif
+    
+    Hanya run yang cakupannya segmen saja (tanpa rentang tanggal atau daftar
+    pelanggan), yang terakhir dipakai lebih dulu. Pemetaan diambil dari
+    cache dan dibangun ulang hanya jika stempel run bercakupan berubah.
+    
+    Args:
+        segment: Label segmen
+    
+    Returns:
+        Kunci run (id AnalisisRun, created_at), atau None jika segmen belum punya run
+    """
+    global _segment_runs
+    checked_at, stamp, segment_runs = _segment_runs
+    if _refresh_due(checked_at):
+        current = _segment_runs_stamp()
+        if current != stamp:
+            segment_runs = _load_segment_runs(current[0])
+        _segment_runs = (time.monotonic(), current, segment_runs)
+    return segment_runs.get(segment)
+
+def recommend_for_basket(basket, customer_id=None, limit=DEFAULT_RECOMMENDATIONS, run_id=None):
+    """
+    Rekomendasi produk promosi untuk isi keranjang
+    
+    Tanpa run_id, rules run MBA per segmen pelanggan dipakai jika ada dan
+    menghasilkan rekomendasi; selain itu rules run MBA aktif.
+    
+    Args:
+        basket: List nama produk di keranjang
+        customer_id: ID pelanggan untuk memilih rules segmennya (opsional)
+        limit: Jumlah maksimal produk rekomendasi
+        run_id: id run MBA yang rules-nya dipakai (default: run segmen pelanggan, lalu run aktif)
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'run_id', 'cakupan' (label segmen
+        rules yang dipakai, None untuk seluruh transaksi), 'recommendations'
+        (lihat RuleIndex.recommend) dan 'segment' (lihat customer_segment)
+    """
+    if not isinstance(basket, list) or not basket:
+        return {'error': 'Keranjang (basket) wajib berisi minimal satu produk'}
+    if len(basket) > MAX_BASKET_SIZE:
+        return {'error': f'Maksimal {MAX_BASKET_SIZE} produk per keranjang'}
+    if not 1 <= limit <= MAX_RECOMMENDATIONS:
+        return {'error': f'limit harus di antara 1 dan {MAX_RECOMMENDATIONS}'}
+    
+    basket = [str(product).strip() for product in basket]
+    segment = customer_segment(str(customer_id)) if customer_id else None
+    
+    if run_id is None and segment is not None:
+        key = segment_run_key(segment['cluster_label'])
+        if key is not None:
+            recommendations = _cached_index(key).recommend(basket, limit)
+            if recommendations:
+                return {
+                    'run_id': key[0],
+                    'cakupan': segment['cluster_label'],
+                    'recommendations': recommendations,
+                    'segment': segment
+                }
+    
+    run_id, index = get_rule_index(run_id)
+    if index is None:
+        return {'error': 'Hasil analisis MBA tidak ditemukan. Jalankan analisis MBA terlebih dahulu.'}
+    
+    return {
+        'run_id': run_id,
+        'cakupan': None,
+        'recommendations': index.recommend(basket, limit),
+        'segment': segment
+    }
@@ -0,0 +1,517 @@
+"""
+Controller untuk menyimpan dan membaca hasil analisis (rules dan segmentasi)
+
+Setiap penyimpanan membuat AnalisisRun baru berstatus 'staging'. Baris hasil
+ditulis dengan insert batch ke run tersebut, lalu run diaktifkan dalam satu
+transaksi singkat (flip). Halaman hanya membaca baris milik run aktif (atau
+run yang dipilih), sehingga tidak pernah melihat tabel yang setengah terhapus
+atau setengah terisi.
+
+Run dikunci dengan (jenis, parameter, fingerprint data). Analisis ulang
+dengan kunci yang sama memakai run tersimpan tanpa menghitung ulang. Per
+jenis hanya ANALYSIS_RUN_HISTORY run yang disimpan (segmentasi:
+SEGMENT_RUN_HISTORY, agar laporan perpindahan segmen punya riwayat); run
+yang paling lama tidak dipakai dihapus lebih dulu (LRU).
+
+Run bercakupan (mis. MBA satu segmen atau rentang tanggal) tidak pernah
+menjadi run aktif; run tersebut langsung berstatus 'siap', dibaca lewat id
+run, dan riwayatnya dibatasi terpisah (SCOPED_RUN_HISTORY).
+
+Figure visualisasi disimpan per run (GrafikRun), sehingga membuka kembali
+hasil yang sama tidak membangun ulang grafik.
+
+Item antecedent/consequent setiap rule juga disimpan per produk di tabel
+item_aturan (dengan kamus produk), sehingga "semua rules yang melibatkan
+produk X" dicari lewat index, bukan LIKE atas string yang digabung koma.
+"""
+import json
+from datetime import datetime
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.transaksi import (
+    AturanAsosiasi, SegmentasiPelanggan, AnalisisRun, GrafikRun, ModelSegmentasi, ItemAturan, Produk
+)
+from controllers.data_controller import get_product_ids
+from utils.apriori import format_itemset, parse_itemset
+
+RESULT_BATCH_SIZE = 5000
+DEFAULT_RUN_HISTORY = 5
+DEFAULT_SCOPED_RUN_HISTORY = 20
+DEFAULT_SEGMENT_RUN_HISTORY = 12
+
+# Jenis run -> model baris hasilnya
+RESULT_MODELS = {
+    'mba': AturanAsosiasi,
+    'segmentasi': SegmentasiPelanggan
+}
+
+# Status run yang barisnya lengkap dan boleh dibaca
+READY_STATUSES = ('aktif', 'siap')
+
+# Sisi item rule di tabel item_aturan
+RULE_SIDES = {'antecedent': 'A', 'consequent': 'C'}
+
+def save_rules(rules, params=None, fingerprint=None, cakupan=None):
+    """
+    Simpan association rules sebagai run MBA baru dan aktifkan
+    
+    Args:
+        rules: DataFrame hasil generate_rules
+        params: Dictionary parameter analisis (bagian dari kunci cache)
+        fingerprint: Fingerprint data transaksi yang dianalisis
+        cakupan: Label cakupan data (opsional); run bercakupan disimpan
+            sebagai 'siap' tanpa menggantikan run aktif
+    
+    Returns:
+        id AnalisisRun yang baru
+    """
+    antecedents = [_as_itemset(itemset) for itemset in rules['antecedents']]
+    consequents = [_as_itemset(itemset) for itemset in rules['consequents']]
+    records = {
+        'antecedents': [format_itemset(itemset) for itemset in antecedents],
+        'consequents': [format_itemset(itemset) for itemset in consequents],
+        'support': rules['support'].astype(float).tolist(),
+        'confidence': rules['confidence'].astype(float).tolist(),
+        'lift': rules['lift'].astype(float).tolist()
+    }
+    return _write_run('mba', records, len(rules), params, fingerprint,
+                      rule_items=list(zip(antecedents, consequents)), cakupan=cakupan)
+
+def _as_itemset(itemset):
+    return parse_itemset(itemset) if isinstance(itemset, str) else frozenset(itemset)
+
+def save_segments(rfm_clustered, params=None, fingerprint=None, model_artifact=None):
+    """
+    Simpan hasil segmentasi sebagai run segmentasi baru dan aktifkan
+    
+    Args:
+        rfm_clustered: DataFrame hasil kmeans_clustering
+        params: Dictionary parameter analisis (bagian dari kunci cache)
+        fingerprint: Fingerprint data transaksi yang dianalisis
+        model_artifact: Dictionary SegmentModel.to_artifact() (opsional),
+            disimpan bersama run agar pelanggan baru bisa dinilai
+    
+    Returns:
+        id AnalisisRun yang baru aktif
+    """
+    records = {
+        'customer_id': rfm_clustered['customer_id'].astype(str).tolist(),
+        'recency': rfm_clustered['Recency'].astype(int).tolist(),
+        'frequency': rfm_clustered['Frequency'].astype(int).tolist(),
+        'monetary': rfm_clustered['Monetary'].astype(float).tolist(),
+        'cluster': rfm_clustered['Cluster'].astype(int).tolist(),
+        'cluster_label': rfm_clustered['Cluster_Label'].astype(str).tolist()
+    }
+    return _write_run('segmentasi', records, len(rfm_clustered), params, fingerprint, model_artifact)
+
+def _params_key(params):
+    """Serialisasi parameter yang stabil (urutan key tidak berpengaruh)"""
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+def _write_run(jenis, columns, n_rows, params=None, fingerprint=None, model_artifact=None, rule_items=None,
+               cakupan=None):
+    """
+    Tulis baris hasil ke run staging baru lalu flip menjadi run aktif (atau siap, untuk run bercakupan)
+    
+    Args:
+        jenis: 'mba' atau 'segmentasi'
+        columns: Dictionary nama kolom -> list nilai (panjang sama)
+        n_rows: Jumlah baris
+        params: Dictionary parameter analisis
+        fingerprint: Fingerprint data transaksi
+        model_artifact: Artefak model segmentasi (opsional)
+        rule_items: List (antecedents, consequents) per baris rules (opsional)
+        cakupan: Label cakupan data (opsional)
+    
+    Returns:
+        id AnalisisRun yang baru
+    """
+    table = RESULT_MODELS[jenis].__table__
+    
+    run = AnalisisRun(jenis=jenis, status='staging', jumlah=n_rows,
+                      params=_params_key(params), fingerprint=fingerprint, cakupan=cakupan)
+    db.session.add(run)
+    db.session.commit()
+    run_id = run.id
+    
+    try:
+        names = list(columns)
+        for start in range(0, n_rows, RESULT_BATCH_SIZE):
+            batch = zip(*(columns[name][start:start + RESULT_BATCH_SIZE] for name in names))
+            db.session.execute(table.insert(), [dict(zip(names, values), run_id=run_id) for values in batch])
+        if rule_items is not None:
+            _write_rule_items(run_id, rule_items)
+        if model_artifact is not None:
+            # Disimpan sebelum flip: run aktif selalu sudah punya modelnya
+            db.session.add(ModelSegmentasi(run_id=run_id, artefak=json.dumps(model_artifact)))
+        db.session.commit()
+        
+        if cakupan is None:
+            activate_run(jenis, run_id)
+        else:
+            touch_run(jenis, run_id)
+    except Exception:
+        db.session.rollback()
+        _delete_runs([run_id], jenis)
+        db.session.commit()
+        raise
+    
+    return run_id
+
+def _write_rule_items(run_id, rule_items):
+    """
+    Tulis item antecedent/consequent rules sebuah run ke tabel item_aturan
+    
+    Args:
+        run_id: id AnalisisRun MBA yang baris rules-nya sudah ditulis
+        rule_items: List (antecedents, consequents) dengan urutan sama seperti baris rules
+    """
+    # id baris rules mengikuti urutan insert (satu transaksi penulis)
+    rule_ids = [rule_id for (rule_id,) in db.session.query(AturanAsosiasi.id).filter(
+        AturanAsosiasi.run_id == run_id
+    ).order_by(AturanAsosiasi.id)]
+    product_ids = get_product_ids(
+        item for antecedents, consequents in rule_items for itemset in (antecedents, consequents) for item in itemset
+    )
+    
+    rows = [
+        {'rule_id': rule_id, 'run_id': run_id, 'produk_id': product_ids[item], 'sisi': side}
+        for rule_id, (antecedents, consequents) in zip(rule_ids, rule_items)
+        for side, itemset in (('A', antecedents), ('C', consequents))
+        for item in itemset
+    ]
+    for start in range(0, len(rows), RESULT_BATCH_SIZE):
+        db.session.execute(ItemAturan.__table__.insert(), rows[start:start + RESULT_BATCH_SIZE])
+
+def backfill_rule_items():
+    """
+    Lengkapi item_aturan untuk run MBA tersimpan dari versi sebelumnya
+    
+    Item diambil dari string antecedents/consequents, sehingga nama produk
+    yang memuat koma pada run lama tidak bisa dipisahkan dengan benar.
+    
+    Returns:
+        Jumlah run yang dilengkapi
+    """
+    has_items = db.session.query(ItemAturan.id).filter(ItemAturan.run_id == AnalisisRun.id).exists()
+    run_ids = [run_id for (run_id,) in db.session.query(AnalisisRun.id).filter(
+        AnalisisRun.jenis == 'mba', AnalisisRun.status.in_(READY_STATUSES), ~has_items
+    )]
+    
+    for run_id in run_ids:
+        rows = db.session.query(AturanAsosiasi.antecedents, AturanAsosiasi.consequents).filter(
+            AturanAsosiasi.run_id == run_id
+        ).order_by(AturanAsosiasi.id).all()
+        _write_rule_items(run_id, [(parse_itemset(antecedents), parse_itemset(consequents))
+                                   for antecedents, consequents in rows])
+        db.session.commit()
+    
+    return len(run_ids)
+
+def activate_run(jenis, run_id):
+    """
+    Jadikan run_id satu-satunya run aktif untuk jenisnya
+    
+    Run aktif sebelumnya tetap disimpan (status 'siap') selama masih dalam
+    batas riwayat, lalu run yang melebihi batas dihapus.
+    
+    Args:
+        jenis: 'mba' atau 'segmentasi'
+        run_id: id AnalisisRun
+    """
+    # Flip: satu transaksi singkat yang hanya mengubah status run. UPDATE
+    # langsung (tanpa SELECT dulu) agar dua flip bersamaan tidak sama-sama aktif
+    db.session.execute(update(AnalisisRun).where(
+        AnalisisRun.jenis == jenis, AnalisisRun.status == 'aktif', AnalisisRun.id != run_id
+    ).values(status='siap'))
+    db.session.execute(update(AnalisisRun).where(AnalisisRun.id == run_id).values(
+        status='aktif', last_used_at=datetime.utcnow()
+    ))
+    db.session.commit()
+    
+    _evict_runs(jenis)
+    db.session.commit()
+
+def touch_run(jenis, run_id):
+    """
+    Tandai run bercakupan siap dibaca dan baru dipakai, tanpa mengubah run aktif
+    
+    Args:
+        jenis: 'mba' atau 'segmentasi'
+        run_id: id AnalisisRun
+    """
+    db.session.execute(update(AnalisisRun).where(AnalisisRun.id == run_id).values(
+        status='siap', last_used_at=datetime.utcnow()
+    ))
+    db.session.commit()
+    
+    _evict_runs(jenis, scoped=True)
+    db.session.commit()
+
+def _evict_runs(jenis, scoped=False):
+    """Hapus run di luar batas riwayat, mulai dari yang paling lama tidak dipakai"""
+    if scoped:
+        limit = current_app.config.get('SCOPED_RUN_HISTORY', DEFAULT_SCOPED_RUN_HISTORY)
+        scope_filter = AnalisisRun.cakupan.isnot(None)
+    else:
+        if jenis == 'segmentasi':
+            limit = current_app.config.get('SEGMENT_RUN_HISTORY', DEFAULT_SEGMENT_RUN_HISTORY)
+        else:
+            limit = current_app.config.get('ANALYSIS_RUN_HISTORY', DEFAULT_RUN_HISTORY)
+        scope_filter = AnalisisRun.cakupan.is_(None)
+    
+    evicted = [
+        run_id for (run_id,) in db.session.query(AnalisisRun.id).filter(
+            AnalisisRun.jenis == jenis, AnalisisRun.status.in_(READY_STATUSES), scope_filter
+        ).order_by(
+            # Run aktif tidak pernah dibuang
+            (AnalisisRun.status == 'aktif').desc(),
+            AnalisisRun.last_used_at.desc(),
+            AnalisisRun.id.desc()
+        ).offset(max(1, int(limit)))
+    ]
+    
+    # Baris lama tanpa run (dari versi sebelumnya) juga sudah tidak dibaca
+    _delete_runs(evicted, jenis, include_legacy=not scoped)
+
+def _delete_runs(run_ids, jenis, include_legacy=False):
+    model = RESULT_MODELS[jenis]
+    if run_ids:
+        model.query.filter(model.run_id.in_(run_ids)).delete(synchronize_session=False)
+        GrafikRun.query.filter(GrafikRun.run_id.in_(run_ids)).delete(synchronize_session=False)
+        ModelSegmentasi.query.filter(ModelSegmentasi.run_id.in_(run_ids)).delete(synchronize_session=False)
+        ItemAturan.query.filter(ItemAturan.run_id.in_(run_ids)).delete(synchronize_session=False)
+        AnalisisRun.query.filter(AnalisisRun.id.in_(run_ids)).delete(synchronize_session=False)
+    if include_legacy:
+        model.query.filter(model.run_id.is_(None)).delete(synchronize_session=False)
+
+def find_run(jenis, params, fingerprint):
+    """
+    Cari run tersimpan dengan parameter dan fingerprint data yang sama
+    
+    Args:
+        jenis: 'mba' atau 'segmentasi'
+        params: Dictionary parameter analisis
+        fingerprint: Fingerprint data transaksi
+    
+    Returns:
+        AnalisisRun atau None jika belum pernah dihitung
+    """
+    if fingerprint is None:
+        return None
+    
+    return AnalisisRun.query.filter(
+        AnalisisRun.jenis == jenis,
+        AnalisisRun.fingerprint == fingerprint,
+        AnalisisRun.params == _params_key(params),
+        AnalisisRun.status.in_(READY_STATUSES)
+    ).order_by(AnalisisRun.id.desc()).first()
+
+def list_runs(jenis):
+    """
+    Daftar run tersimpan untuk satu jenis analisis (terakhir dipakai lebih dulu)
+    
+    Returns:
+        List dictionary id, status, params, jumlah, cakupan, created_at
+    """
+    runs = AnalisisRun.query.filter(
+        AnalisisRun.jenis == jenis, AnalisisRun.status.in_(READY_STATUSES)
+    ).order_by(AnalisisRun.last_used_at.desc(), AnalisisRun.id.desc()).all()
+    
+    return [{
+        'id': run.id,
+        'status': run.status,
+        'params': json.loads(run.params or '{}'),
+        'jumlah': run.jumlah,
+        'cakupan': run.cakupan,
+        'created_at': run.created_at
+    } for run in runs]
+
+def get_run(jenis, run_id):
+    """Run siap baca dengan id dan jenis tertentu, atau None"""
+    return AnalisisRun.query.filter(
+        AnalisisRun.id == run_id, AnalisisRun.jenis == jenis, AnalisisRun.status.in_(READY_STATUSES)
+    ).first()
+
+def get_active_run_id(jenis):
+    """id run aktif untuk jenis analisis, atau None jika belum ada"""
+    return db.session.query(AnalisisRun.id).filter(
+        AnalisisRun.jenis == jenis, AnalisisRun.status == 'aktif'
+    ).order_by(AnalisisRun.id.desc()).limit(1).scalar()
+
+def active_results(jenis, run_id=None):
+    """
+    Query baris hasil milik run aktif atau run yang dipilih
+    
+    Sebelum ada run sama sekali, baris lama tanpa run_id (dari versi
+    sebelumnya) yang dikembalikan.
+    
+    Args:
+        jenis: 'mba' atau 'segmentasi'
+        run_id: id run tertentu (default: run aktif)
+    
+    Returns:
+        Query AturanAsosiasi atau SegmentasiPelanggan
+    """
+    model = RESULT_MODELS[jenis]
+    if run_id is None:
+        run_id = get_active_run_id(jenis)
+    if run_id is None:
+        return model.query.filter(model.run_id.is_(None))
+    return model.query.filter(model.run_id == run_id)
+
+def load_rules(run_id):
+    """
+    Muat rules satu run dengan kolom seperti hasil generate_rules
+    
+    antecedents dan consequents dikembalikan sebagai frozenset dari tabel
+    item_aturan.
+    
+    Args:
+        run_id: id AnalisisRun
+    
+    Returns:
+        DataFrame antecedents, consequents, support, confidence, lift
+    """
+    rows = db.session.query(
+        AturanAsosiasi.id, AturanAsosiasi.antecedents, AturanAsosiasi.consequents,
+        AturanAsosiasi.support, AturanAsosiasi.confidence, AturanAsosiasi.lift
+    ).filter(AturanAsosiasi.run_id == run_id).order_by(AturanAsosiasi.id).all()
+    itemsets = rule_itemsets(run_id)
+    
+    return pd.DataFrame([
+        # Baris tanpa item (run lama yang belum dilengkapi) dibaca dari string
+        itemsets.get(rule_id, (parse_itemset(antecedents), parse_itemset(consequents))) + (support, confidence, lift)
+        for rule_id, antecedents, consequents, support, confidence, lift in rows
+    ], columns=['antecedents', 'consequents', 'support', 'confidence', 'lift'])
+
+def rule_itemsets(run_id, rule_ids=None):
+    """
+    Antecedent dan consequent rules dari tabel item_aturan
+    
+    Args:
+        run_id: id AnalisisRun MBA
+        rule_ids: Batasi ke id rule tertentu: list id, atau select() yang
+            menghasilkan id (default: semua rules run)
+    
+    Returns:
+        Dictionary id rule -> (frozenset antecedents, frozenset consequents)
+    """
+    query = db.session.query(ItemAturan.rule_id, ItemAturan.sisi, Produk.nama).join(
+        Produk, Produk.id == ItemAturan.produk_id
+    )
+    
+    # id rule unik di semua run, jadi filter rule_id saja (index ix_item_aturan_rule)
+    if rule_ids is None:
+        rows = query.filter(ItemAturan.run_id == run_id).all()
+    elif isinstance(rule_ids, (list, tuple)):
+        rows = []
+        for start in range(0, len(rule_ids), RESULT_BATCH_SIZE):
+            rows += query.filter(ItemAturan.rule_id.in_(rule_ids[start:start + RESULT_BATCH_SIZE])).all()
+    else:
+        rows = query.filter(ItemAturan.rule_id.in_(rule_ids)).all()
+    
+    items = {}
+    for rule_id, side, product in rows:
+        items.setdefault(rule_id, {'A': set(), 'C': set()})[side].add(product)
+    return {rule_id: (frozenset(sides['A']), frozenset(sides['C'])) for rule_id, sides in items.items()}
+
+def rules_for_product(product, run_id=None, side=None, limit=None):
+    """
+    Rules sebuah run yang melibatkan produk tertentu, urut dari lift tertinggi
+    
+    Args:
+        product: Nama produk
+        run_id: id AnalisisRun MBA (default: run aktif)
+        side: 'antecedent' atau 'consequent' untuk membatasi posisi produk (opsional)
+        limit: Jumlah maksimal rules (opsional)
+    
+    Returns:
+        List dictionary id, antecedents, consequents (list produk terurut),
+        support, confidence, lift
+    """
+    if run_id is None:
+        run_id = get_active_run_id('mba')
+    
+    # id rules lewat index kamus produk lalu ix_item_aturan_run_produk
+    matching = select(ItemAturan.rule_id).join(Produk, Produk.id == ItemAturan.produk_id).where(
+        ItemAturan.run_id == run_id, Produk.nama == product
+    )
+    if side is not None:
+        matching = matching.where(ItemAturan.sisi == RULE_SIDES[side])
+    
+    rows = db.session.query(
+        AturanAsosiasi.id, AturanAsosiasi.support, AturanAsosiasi.confidence, AturanAsosiasi.lift
+    ).filter(AturanAsosiasi.id.in_(matching)).order_by(
+        AturanAsosiasi.lift.desc(), AturanAsosiasi.id
+    ).limit(limit).all()
+    itemsets = rule_itemsets(run_id, [row.id for row in rows] if limit is not None else matching)
+    
+    return [{
+        'id': row.id,
+        'antecedents': sorted(itemsets[row.id][0]),
+        'consequents': sorted(itemsets[row.id][1]),
+        'support': row.support,
+        'confidence': row.confidence,
+        'lift': row.lift
+    } for row in rows]
+
+def load_segments(run_id):
+    """
+    Muat hasil segmentasi satu run dengan kolom seperti hasil kmeans_clustering
+    
+    Args:
+        run_id: id AnalisisRun
+    
+    Returns:
+        DataFrame customer_id, Recency, Frequency, Monetary, Cluster, Cluster_Label
+    """
+    rows = db.session.query(
+        SegmentasiPelanggan.customer_id, SegmentasiPelanggan.recency, SegmentasiPelanggan.frequency,
+        SegmentasiPelanggan.monetary, SegmentasiPelanggan.cluster, SegmentasiPelanggan.cluster_label
+    ).filter(SegmentasiPelanggan.run_id == run_id).order_by(SegmentasiPelanggan.id).all()
+    
+    return pd.DataFrame(rows, columns=['customer_id', 'Recency', 'Frequency', 'Monetary', 'Cluster', 'Cluster_Label'])
+
+def get_figures(run_id, builders):
+    """
+    Ambil figure sebuah run dari cache, bangun dan simpan yang belum ada
+    
+    Args:
+        run_id: id AnalisisRun pemilik figure
+        builders: Dictionary nama figure -> fungsi tanpa argumen yang
+                  mengembalikan JSON figure (atau None jika data kosong)
+    
+    Returns:
+        Dictionary nama figure -> JSON figure (atau None)
+    """
+    figures = dict(db.session.query(GrafikRun.nama, GrafikRun.figure).filter(
+        GrafikRun.run_id == run_id, GrafikRun.nama.in_(list(builders))
+    ).all())
+    
+    missing = [name for name in builders if name not in figures]
+    for name in missing:
+        figures[name] = builders[name]()
+        if figures[name] is not None:
+            db.session.add(GrafikRun(run_id=run_id, nama=name, figure=figures[name]))
+    
+    if missing:
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Proses lain sudah menyimpan figure yang sama lebih dulu
+            db.session.rollback()
+    
+    return figures
+
+def clear_results():
+    """Hapus semua hasil analisis beserta run-nya (commit oleh pemanggil)"""
+    AturanAsosiasi.query.delete()
+    SegmentasiPelanggan.query.delete()
+    GrafikRun.query.delete()
+    ModelSegmentasi.query.delete()
+    ItemAturan.query.delete()
+    AnalisisRun.query.delete()
@@ -0,0 +1,418 @@
+"""
+Controller ringkasan RFM per pelanggan yang dimaterialisasi
+
+Tabel ringkasan_rfm menyimpan agregat berjalan per pelanggan (tanggal
+transaksi terakhir, jumlah transaksi, total pembelian) yang diperbarui dari
+setiap batch upload, sehingga segmentasi tidak perlu GROUP BY seluruh tabel
+transaksi. Recency tidak disimpan per pelanggan; tanggal acuannya disimpan
+di status_ringkasan_rfm (tanggal terakhir ringkasan diperbarui) dan recency
+dihitung terhadap akhir tanggal itu, sehingga membaca ringkasan yang sama
+memberi hasil yang sama sampai upload/hapus berikutnya.
+
+Snapshot harian (snapshot_rfm) hanya menyimpan baris pelanggan yang berubah
+pada suatu hari (snapshot pertama berisi semua pelanggan sebagai dasar).
+Kondisi seorang pelanggan pada akhir tanggal T adalah barisnya yang terakhir
+dengan tanggal <= T; baris dengan frequency 0 menandai pelanggan yang tidak
+lagi punya transaksi. Baris yang lebih tua dari RFM_SNAPSHOT_DAYS hari dan
+sudah digantikan baris yang lebih baru dihapus.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import pandas as pd
+from flask import current_app
+from sqlalchemy import and_, bindparam, distinct, func, literal, or_, select, type_coerce
+from models import db
+from models.transaksi import Transaksi, Pelanggan, RingkasanRfm, SnapshotRfm, StatusRfm
+from utils.clustering import rfm_from_summary
+
+RFM_QUERY_BATCH = 500
+DEFAULT_SNAPSHOT_DAYS = 400
+
+RFM_FRAME_COLUMNS = ['customer_id', 'Recency', 'Frequency', 'Monetary']
+
+def _batches(values, size=RFM_QUERY_BATCH):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _summary_select(pelanggan_ids=None):
+    """SELECT agregat RFM per pelanggan_id dari tabel transaksi"""
+    table = Transaksi.__table__
+    query = select(
+        table.c.pelanggan_id,
+        func.max(table.c.date),
+        func.count(distinct(table.c.transaction_id)),
+        func.sum(table.c.total)
+    ).group_by(table.c.pelanggan_id)
+    if pelanggan_ids is not None:
+        query = query.where(table.c.pelanggan_id.in_(pelanggan_ids))
+    return query
+
+def _end_of(tanggal):
+    return datetime.combine(tanggal + timedelta(days=1), datetime.min.time())
+
+def _set_reference_date(tanggal=None):
+    """Catat tanggal acuan recency ringkasan RFM (default: hari ini)"""
+    status = StatusRfm.query.first()
+    if status is None:
+        status = StatusRfm()
+        db.session.add(status)
+    status.tanggal_acuan = tanggal or date.today()
+
+def rebuild_rfm_summary():
+    """Bangun ulang ringkasan RFM dari tabel transaksi (commit oleh pemanggil)"""
+    RingkasanRfm.query.delete()
+    db.session.execute(RingkasanRfm.__table__.insert().from_select(
+        ['pelanggan_id', 'last_date', 'frequency', 'monetary'], _summary_select()
+    ))
+    _set_reference_date()
+
+def reset_rfm_summary():
+    """
+    Kosongkan ringkasan dan snapshot RFM saat semua transaksi dihapus (commit oleh pemanggil)
+    
+    Snapshot lama ikut dihapus sehingga riwayat dimulai ulang dari data yang
+    diupload berikutnya.
+    """
+    RingkasanRfm.query.delete()
+    SnapshotRfm.query.delete()
+    StatusRfm.query.delete()
+
+def rfm_summary_ready():
+    """
+    Apakah ringkasan RFM sesuai dengan tabel transaksi dan boleh diperbarui inkremental
+    
+    Ringkasan kosong padahal transaksi ada berarti belum pernah dibangun
+    (database lama); ringkasan dibangun saat pertama kali dibaca.
+    """
+    return (db.session.query(RingkasanRfm.pelanggan_id).first() is not None
+            or db.session.query(Transaksi.id).first() is None)
+
+def ensure_rfm_summary():
+    """Bangun ringkasan RFM dari tabel transaksi jika belum pernah ada"""
+    if not rfm_summary_ready():
+        rebuild_rfm_summary()
+        db.session.commit()
+    elif StatusRfm.query.first() is None and db.session.query(RingkasanRfm.pelanggan_id).first() is not None:
+        # Ringkasan dari versi sebelum tanggal acuan disimpan: berlaku mulai hari ini
+        _set_reference_date()
+        db.session.commit()
+
+def summary_reference_date():
+    """
+    Tanggal acuan recency ringkasan RFM tersimpan
+    
+    Returns:
+        date; recency dihitung terhadap akhir tanggal ini. Hari ini jika
+        belum ada ringkasan (belum ada transaksi)
+    """
+    ensure_rfm_summary()
+    tanggal = db.session.query(StatusRfm.tanggal_acuan).scalar()
+    return tanggal or date.today()
+
+@contextmanager
+def maintain_rfm_summary(df, changed=None):
+    """
+    Bungkus insert batch transaksi agar ringkasan RFM ikut diperbarui
+    
+    transaction_id yang sudah ada sebelum insert tidak menambah frequency
+    (baris satu transaksi bisa terbagi ke beberapa chunk/upload).
+    
+    Contoh:
+        with maintain_rfm_summary(chunk, changed):
+            bulk_insert_transactions(chunk)
+    
+    Args:
+        df: DataFrame hasil prepare_transactions yang akan disimpan
+        changed: Set opsional yang diisi pelanggan_id yang ringkasannya berubah
+    """
+    if df.empty or not rfm_summary_ready():
+        yield
+        return
+    
+    existing = set()
+    table = Transaksi.__table__
+    for batch in _batches(df['transaction_id'].unique()):
+        existing.update(db.session.execute(
+            select(table.c.transaction_id).where(table.c.transaction_id.in_(batch)).distinct()
+        ).scalars())
+    yield
+    
+    pelanggan_ids = apply_rfm_delta(df, existing)
+    if changed is not None:
+        changed.update(pelanggan_ids)
+
+def apply_rfm_delta(df, existing_transaction_ids):
+    """
+    Tambahkan baris transaksi baru ke agregat berjalan ringkasan RFM
+    (commit oleh pemanggil)
+    
+    Args:
+        df: DataFrame baris transaksi baru (transaction_id, date, customer_id, total);
+            baris harus sudah di-flush ke database
+        existing_transaction_ids: transaction_id yang sudah ada sebelum baris ini disimpan
+    
+    Returns:
+        List pelanggan_id yang ringkasannya berubah
+    """
+    customers = df.groupby('customer_id', sort=False).agg(last_date=('date', 'max'), monetary=('total', 'sum'))
+    new_rows = df[~df['transaction_id'].isin(existing_transaction_ids)]
+    customers['frequency'] = new_rows.groupby('customer_id', sort=False)['transaction_id'].nunique().reindex(
+        customers.index, fill_value=0
+    )
+    
+    codes = {}
+    for batch in _batches(customers.index):
+        codes.update(db.session.query(Pelanggan.kode, Pelanggan.id).filter(Pelanggan.kode.in_(batch)))
+    customers.index = customers.index.map(codes)
+    
+    table = RingkasanRfm.__table__
+    existing = {}
+    for batch in _batches(customers.index):
+        existing.update(db.session.execute(
+            select(table.c.pelanggan_id, table.c.last_date).where(table.c.pelanggan_id.in_(batch))
+        ).all())
+    
+    inserts, updates = [], []
+    for pelanggan_id, last_date, monetary, frequency in zip(
+        customers.index.tolist(), customers['last_date'].tolist(),
+        customers['monetary'].tolist(), customers['frequency'].tolist()
+    ):
+        if pelanggan_id in existing:
+            updates.append({'_id': pelanggan_id, 'last_date': max(last_date, existing[pelanggan_id]),
+                            'd_frequency': frequency, 'd_monetary': monetary})
+        else:
+            inserts.append({'pelanggan_id': pelanggan_id, 'last_date': last_date,
+                            'frequency': frequency, 'monetary': monetary})
+    
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if updates:
+        db.session.execute(
+            table.update().where(table.c.pelanggan_id == bindparam('_id')).values(
+                last_date=bindparam('last_date'),
+                frequency=table.c.frequency + bindparam('d_frequency'),
+                monetary=table.c.monetary + bindparam('d_monetary')
+            ),
+            updates
+        )
+    _set_reference_date()
+    
+    return customers.index.tolist()
+
+def refresh_rfm_customers(pelanggan_ids):
+    """
+    Hitung ulang ringkasan beberapa pelanggan dari tabel transaksi, mis. setelah
+    transaksi dihapus (max tanggal tidak bisa dikurangi secara inkremental).
+    Pelanggan tanpa transaksi tersisa dihapus dari ringkasan. Commit oleh pemanggil.
+    
+    Args:
+        pelanggan_ids: Iterable pelanggan_id
+    """
+    if not rfm_summary_ready():
+        return
+    
+    table = RingkasanRfm.__table__
+    for batch in _batches(set(pelanggan_ids)):
+        db.session.execute(table.delete().where(table.c.pelanggan_id.in_(batch)))
+        db.session.execute(table.insert().from_select(
+            ['pelanggan_id', 'last_date', 'frequency', 'monetary'], _summary_select(batch)
+        ))
+    _set_reference_date()
+
+def _snapshot_state(tanggal, pelanggan_ids=None):
+    """
+    SELECT kondisi snapshot setiap pelanggan pada akhir tanggal (termasuk
+    penanda frequency 0): baris terakhir per pelanggan dengan tanggal <= tanggal
+    """
+    table = SnapshotRfm.__table__
+    latest = select(table.c.pelanggan_id, func.max(table.c.tanggal).label('tanggal')).where(
+        table.c.tanggal <= tanggal
+    ).group_by(table.c.pelanggan_id)
+    if pelanggan_ids is not None:
+        latest = latest.where(table.c.pelanggan_id.in_(pelanggan_ids))
+    latest = latest.subquery()
+    
+    return select(table.c.pelanggan_id, table.c.last_date, table.c.frequency, table.c.monetary).join(
+        latest, and_(table.c.pelanggan_id == latest.c.pelanggan_id, table.c.tanggal == latest.c.tanggal)
+    )
+
+def _write_snapshot_changes(tanggal, pelanggan_ids=None):
+    """Simpan baris ringkasan yang berbeda dari kondisi snapshot sebelumnya, serta penanda pelanggan hilang"""
+    table = SnapshotRfm.__table__
+    summary = RingkasanRfm.__table__
+    columns = ['tanggal', 'pelanggan_id', 'last_date', 'frequency', 'monetary']
+    state = _snapshot_state(tanggal, pelanggan_ids).subquery()
+    
+    changed = select(literal(tanggal, db.Date), summary.c.pelanggan_id, summary.c.last_date,
+                     summary.c.frequency, summary.c.monetary).select_from(
+        summary.outerjoin(state, state.c.pelanggan_id == summary.c.pelanggan_id)
+    ).where(or_(
+        state.c.pelanggan_id.is_(None), state.c.last_date != summary.c.last_date,
+        state.c.frequency != summary.c.frequency, state.c.monetary != summary.c.monetary
+    ))
+    removed = select(literal(tanggal, db.Date), state.c.pelanggan_id, state.c.last_date,
+                     literal(0), literal(0.0)).select_from(
+        state.outerjoin(summary, summary.c.pelanggan_id == state.c.pelanggan_id)
+    ).where(summary.c.pelanggan_id.is_(None), state.c.frequency > 0)
+    if pelanggan_ids is not None:
+        changed = changed.where(summary.c.pelanggan_id.in_(pelanggan_ids))
+    
+    db.session.execute(table.insert().from_select(columns, changed))
+    db.session.execute(table.insert().from_select(columns, removed))
+
+def _prune_snapshots(cutoff):
+    """
+    Hapus baris snapshot sebelum cutoff yang tidak lagi menentukan kondisi pada
+    tanggal >= cutoff: baris yang sudah digantikan baris lebih baru (<= cutoff)
+    dan penanda pelanggan hilang
+    """
+    table = SnapshotRfm.__table__
+    newer = table.alias('lebih_baru')
+    superseded = select(func.max(newer.c.tanggal)).where(
+        newer.c.pelanggan_id == table.c.pelanggan_id, newer.c.tanggal <= cutoff
+    ).scalar_subquery()
+    db.session.execute(table.delete().where(table.c.tanggal < cutoff, table.c.tanggal < superseded))
+    db.session.execute(table.delete().where(table.c.tanggal < cutoff, table.c.frequency == 0))
+
+def take_rfm_snapshot(pelanggan_ids=None, tanggal=None):
+    """
+    Perbarui snapshot ringkasan RFM untuk satu tanggal (commit oleh pemanggil)
+    
+    Hanya pelanggan yang kondisinya berbeda dari snapshot sebelumnya yang
+    disimpan. Snapshot pertama berisi semua pelanggan. Pada snapshot pertama
+    setiap hari, baris lama di luar RFM_SNAPSHOT_DAYS hari dirapikan.
+    
+    Args:
+        pelanggan_ids: pelanggan_id yang berubah (default: bandingkan semua pelanggan)
+        tanggal: Tanggal snapshot (default: hari ini)
+    """
+    if not rfm_summary_ready():
+        rebuild_rfm_summary()
+    if tanggal is None:
+        tanggal = date.today()
+    
+    table = SnapshotRfm.__table__
+    if db.session.query(SnapshotRfm.id).first() is None:
+        pelanggan_ids = None
+    first_today = db.session.query(SnapshotRfm.id).filter(SnapshotRfm.tanggal == tanggal).first() is None
+    
+    if pelanggan_ids is None:
+        db.session.execute(table.delete().where(table.c.tanggal == tanggal))
+        _write_snapshot_changes(tanggal)
+    else:
+        for batch in _batches(set(pelanggan_ids)):
+            db.session.execute(table.delete().where(table.c.tanggal == tanggal, table.c.pelanggan_id.in_(batch)))
+            _write_snapshot_changes(tanggal, batch)
+    
+    if first_today:
+        keep_days = current_app.config.get('RFM_SNAPSHOT_DAYS', DEFAULT_SNAPSHOT_DAYS)
+        _prune_snapshots(tanggal - timedelta(days=keep_days))
+
+def _rfm_frame(query, current_date):
+    rows = query.all()
+    if not rows:
+        return pd.DataFrame(columns=RFM_FRAME_COLUMNS)
+    summary = pd.DataFrame(rows, columns=['customer_id', 'last_date', 'Frequency', 'Monetary'])
+    return rfm_from_summary(summary, current_date)
+
+def get_rfm_summary(current_date=None, customer_ids=None):
+    """
+    RFM seluruh transaksi dari ringkasan tersimpan (tanpa membaca tabel transaksi)
+    
+    Args:
+        current_date: Tanggal acuan recency (default: akhir tanggal acuan
+            tersimpan, lihat summary_reference_date)
+        customer_ids: Batasi ke pelanggan tertentu (opsional)
+    
+    Returns:
+        DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary'],
+        urut customer_id
+    """
+    ensure_rfm_summary()
+    if current_date is None:
+        current_date = _end_of(summary_reference_date())
+    
+    query = db.session.query(
+        Pelanggan.kode, type_coerce(RingkasanRfm.last_date, db.String), RingkasanRfm.frequency, RingkasanRfm.monetary
+    ).join(Pelanggan, Pelanggan.id == RingkasanRfm.pelanggan_id)
+    if customer_ids is not None:
+        query = query.filter(Pelanggan.kode.in_(list(customer_ids)))
+    
+    return _rfm_frame(query.order_by(Pelanggan.kode), current_date)
+
+def snapshot_date_for(tanggal):
+    """Tanggal snapshot terakhir yang berlaku pada akhir tanggal tertentu, atau None"""
+    return db.session.query(func.max(SnapshotRfm.tanggal)).filter(SnapshotRfm.tanggal <= tanggal).scalar()
+
+def get_rfm_snapshot(tanggal, customer_ids=None):
+    """
+    RFM pelanggan pada akhir sebuah tanggal, disusun dari baris snapshot
+    terakhir setiap pelanggan sampai tanggal tersebut
+    
+    Args:
+        tanggal: date (atau string ISO)
+        customer_ids: Batasi ke pelanggan tertentu (opsional)
+    
+    Returns:
+        DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary'];
+        recency dihitung terhadap akhir tanggal tersebut. Kosong jika belum
+        ada snapshot sampai tanggal tersebut
+    """
+    if isinstance(tanggal, str):
+        tanggal = date.fromisoformat(tanggal)
+    
+    state = _snapshot_state(tanggal).subquery()
+    query = db.session.query(
+        Pelanggan.kode, type_coerce(state.c.last_date, db.String), state.c.frequency, state.c.monetary
+    ).join(Pelanggan, Pelanggan.id == state.c.pelanggan_id).filter(state.c.frequency > 0)
+    if customer_ids is not None:
+        query = query.filter(Pelanggan.kode.in_(list(customer_ids)))
+    
+    return _rfm_frame(query.order_by(Pelanggan.kode), _end_of(tanggal))
+
+def list_rfm_snapshots():
+    """
+    Daftar tanggal snapshot RFM dalam masa simpan RFM_SNAPSHOT_DAYS hari
+    
+    Baris yang lebih tua masih disimpan jika menjadi dasar kondisi pelanggan
+    yang belum berubah, tetapi tanggalnya tidak lagi bisa disusun lengkap.
+    
+    Returns:
+        List dictionary tanggal (ISO) dan jumlah pelanggan yang berubah pada
+        tanggal itu ('berubah'), urut tanggal
+    """
+    keep_days = current_app.config.get('RFM_SNAPSHOT_DAYS', DEFAULT_SNAPSHOT_DAYS)
+    rows = db.session.query(SnapshotRfm.tanggal, func.count(SnapshotRfm.id)).filter(
+        SnapshotRfm.tanggal >= date.today() - timedelta(days=keep_days)
+    ).group_by(SnapshotRfm.tanggal).order_by(SnapshotRfm.tanggal)
+    return [{'tanggal': tanggal.isoformat(), 'berubah': count} for tanggal, count in rows]
+
+def check_rfm_summary(fix=False):
+    """
+    Bandingkan ringkasan RFM tersimpan dengan hasil hitung ulang dari tabel transaksi
+    
+    Args:
+        fix: Bangun ulang ringkasan jika ditemukan selisih
+    
+    Returns:
+        Jumlah pelanggan yang ringkasannya berbeda (0 jika konsisten)
+    """
+    expected = pd.DataFrame(db.session.execute(_summary_select()).all(),
+                            columns=['pelanggan_id', 'last_date', 'frequency', 'monetary'])
+    stored = pd.read_sql(select(RingkasanRfm.__table__), db.session.connection())
+    
+    merged = expected.merge(stored, on='pelanggan_id', how='outer', suffixes=('', '_stored'), indicator=True)
+    different = (
+        (merged['_merge'] != 'both')
+        | (pd.to_datetime(merged['last_date'], format='ISO8601') != pd.to_datetime(merged['last_date_stored'], format='ISO8601'))
+        | (merged['frequency'] != merged['frequency_stored'])
+        | ((merged['monetary'] - merged['monetary_stored']).abs() > 0.01)
+    )
+    count = int(different.sum())
+    
+    if count and fix:
+        rebuild_rfm_summary()
+        db.session.commit()
+    
+    return count
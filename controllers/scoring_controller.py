@@ -0,0 +1,193 @@
+"""
+Controller untuk menilai segmen pelanggan dengan model segmentasi tersimpan
+
+Setiap run segmentasi menyimpan artefak SegmentModel (scaler, pusat cluster,
+dan label segmen). Pelanggan baru, misalnya setelah upload, bisa langsung
+diberi segmen dari nilai RFM-nya tanpa clustering ulang.
+"""
+import json
+from collections import OrderedDict
+from datetime import date
+import pandas as pd
+from models import db
+from models.transaksi import ModelSegmentasi
+from controllers.data_controller import get_rfm_dataframe
+from controllers.result_controller import get_active_run_id, get_run
+from controllers.rfm_controller import get_rfm_snapshot, list_rfm_snapshots
+from utils.clustering import SegmentModel, RFM_COLUMNS
+
+MAX_SCORE_BATCH = 10000
+MODEL_CACHE_SIZE = 4
+
+# (run_id, id artefak, created_at) -> SegmentModel; id run bisa dipakai ulang
+# setelah semua hasil dihapus, jadi id dan waktu artefak ikut menjadi kunci
+_model_cache = OrderedDict()
+
+def get_segment_model(run_id=None):
+    """
+    Muat model segmentasi sebuah run (default: run segmentasi aktif)
+    
+    Args:
+        run_id: id AnalisisRun segmentasi (opsional)
+    
+    Returns:
+        Tuple (run, SegmentModel), atau (run, None) jika run tidak punya model
+        (hasil dari versi sebelumnya); run None jika tidak ditemukan
+    """
+    if run_id is None:
+        run_id = get_active_run_id('segmentasi')
+    run = get_run('segmentasi', run_id) if run_id is not None else None
+    if run is None:
+        return None, None
+    
+    row = db.session.query(ModelSegmentasi.id, ModelSegmentasi.created_at).filter(
+        ModelSegmentasi.run_id == run.id
+    ).first()
+    if row is None:
+        return run, None
+    
+    key = (run.id, row.id, row.created_at)
+    model = _model_cache.get(key)
+    if model is None:
+        artefak = db.session.query(ModelSegmentasi.artefak).filter(ModelSegmentasi.id == row.id).scalar()
+        model = SegmentModel.from_artifact(json.loads(artefak))
+        _model_cache[key] = model
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    else:
+        _model_cache.move_to_end(key)
+    
+    return run, model
+
+def _model_or_error(run_id):
+    run, model = get_segment_model(run_id)
+    if run is None:
+        return None, None, {'error': 'Belum ada hasil segmentasi. Jalankan segmentasi terlebih dahulu.'}
+    if model is None:
+        return run, None, {'error': 'Hasil segmentasi ini belum memiliki model. Jalankan segmentasi ulang.'}
+    return run, model, None
+
+def score_rfm(records, run_id=None):
+    """
+    Tentukan segmen dari nilai RFM
+    
+    Args:
+        records: List dictionary berisi recency, frequency, monetary
+        run_id: id run segmentasi yang modelnya dipakai (default: run aktif)
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'run_id' dan 'results'
+        (list dictionary recency, frequency, monetary, cluster, cluster_label)
+    """
+    if not records:
+        return {'error': 'Data RFM kosong'}
+    if len(records) > MAX_SCORE_BATCH:
+        return {'error': f'Maksimal {MAX_SCORE_BATCH} data per permintaan'}
+    
+    try:
+        values = [
+            (float(record['recency']), float(record['frequency']), float(record['monetary']))
+            for record in records
+        ]
+    except (KeyError, TypeError, ValueError):
+        return {'error': 'Setiap data wajib berisi recency, frequency, dan monetary berupa angka'}
+    
+    run, model, error = _model_or_error(run_id)
+    if error:
+        return error
+    
+    if len(values) == 1:
+        scored = [model.score(*values[0])]
+    else:
+        batch = model.score_batch(pd.DataFrame(values, columns=RFM_COLUMNS))
+        scored = zip(batch['Cluster'].tolist(), batch['Cluster_Label'].tolist())
+    
+    return {
+        'run_id': run.id,
+        'results': [{
+            'recency': recency, 'frequency': frequency, 'monetary': monetary,
+            'cluster': int(cluster), 'cluster_label': label
+        } for (recency, frequency, monetary), (cluster, label) in zip(values, scored)]
+    }
+
+def score_customers(customer_ids, run_id=None):
+    """
+    Tentukan segmen pelanggan dari transaksinya saat ini (termasuk upload terbaru)
+    
+    RFM dihitung dengan rentang tanggal yang sama seperti run segmentasi
+    yang modelnya dipakai.
+    
+    Args:
+        customer_ids: List customer_id
+        run_id: id run segmentasi (default: run aktif)
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'run_id', 'results' (list
+        dictionary customer_id, recency, frequency, monetary, cluster,
+        cluster_label) dan 'not_found' (customer_id tanpa transaksi)
+    """
+    customer_ids = list(dict.fromkeys(str(customer_id) for customer_id in customer_ids or []))
+    if not customer_ids:
+        return {'error': 'customer_id kosong'}
+    if len(customer_ids) > MAX_SCORE_BATCH:
+        return {'error': f'Maksimal {MAX_SCORE_BATCH} pelanggan per permintaan'}
+    
+    run, model, error = _model_or_error(run_id)
+    if error:
+        return error
+    
+    params = json.loads(run.params or '{}')
+    rfm_df = get_rfm_dataframe(start_date=params.get('start_date'), end_date=params.get('end_date'),
+                               customer_ids=customer_ids)
+    scored = model.score_batch(rfm_df) if not rfm_df.empty else rfm_df
+    
+    found = set(scored['customer_id']) if not scored.empty else set()
+    return {
+        'run_id': run.id,
+        'results': [{
+            'customer_id': row.customer_id,
+            'recency': int(row.Recency),
+            'frequency': int(row.Frequency),
+            'monetary': float(row.Monetary),
+            'cluster': int(row.Cluster),
+            'cluster_label': row.Cluster_Label
+        } for row in scored.itertuples(index=False)],
+        'not_found': [customer_id for customer_id in customer_ids if customer_id not in found]
+    }
+
+def segment_trend(start_date=None, end_date=None, run_id=None):
+    """
+    Jumlah pelanggan per segmen pada setiap tanggal snapshot RFM harian
+    
+    Setiap snapshot dinilai dengan model segmentasi tersimpan, tanpa
+    clustering ulang dan tanpa membaca riwayat transaksi.
+    
+    Args:
+        start_date: Tanggal snapshot paling awal, string 'YYYY-MM-DD' (opsional)
+        end_date: Tanggal snapshot paling akhir, string 'YYYY-MM-DD' (opsional)
+        run_id: id run segmentasi yang modelnya dipakai (default: run aktif)
+    
+    Returns:
+        Dictionary dengan key 'error', atau 'run_id', 'labels' (label segmen
+        model) dan 'trend' (list dictionary tanggal, pelanggan, segments
+        berisi label -> jumlah pelanggan)
+    """
+    run, model, error = _model_or_error(run_id)
+    if error:
+        return error
+    
+    # Beberapa cluster bisa berbagi label (K > 3): satu seri per label, urutan cluster
+    labels = list(dict.fromkeys(model.labels[cluster] for cluster in sorted(model.labels)))
+    trend = []
+    for snapshot in list_rfm_snapshots():
+        if (start_date and snapshot['tanggal'] < start_date) or (end_date and snapshot['tanggal'] > end_date):
+            continue
+        rfm_df = get_rfm_snapshot(date.fromisoformat(snapshot['tanggal']))
+        counts = model.score_batch(rfm_df)['Cluster_Label'].value_counts() if not rfm_df.empty else {}
+        trend.append({
+            'tanggal': snapshot['tanggal'],
+            'pelanggan': len(rfm_df),
+            'segments': {label: int(counts.get(label, 0)) for label in labels}
+        })
+    
+    return {'run_id': run.id, 'labels': labels, 'trend': trend}
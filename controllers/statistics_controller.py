@@ -0,0 +1,190 @@
+"""
+Controller untuk statistik dashboard yang dimaterialisasi
+
+Ringkasan (jumlah transaksi, pelanggan, produk, dan pendapatan) disimpan di
+tabel statistik_data dan diperbarui setiap upload/hapus, sehingga dashboard
+tidak perlu membaca seluruh tabel transaksi. Nilai distinct diperbarui dari
+kunci baris yang berubah saja: sebelum dan sesudah perubahan diperiksa
+nilai kunci mana yang masih punya baris transaksi (EXISTS lewat index
+transaction_id, customer_id, dan product), tanpa tabel hitungan per kunci.
+"""
+import math
+from contextlib import contextmanager
+from sqlalchemy import distinct, func, text
+from models import db
+from models.transaksi import Transaksi, StatistikData
+
+# Kolom kunci -> field ringkasan yang menyimpan jumlah distinct-nya
+KEY_COLUMNS = {
+    'transaction_id': 'total_transactions',
+    'customer_id': 'total_customers',
+    'product': 'total_products'
+}
+KEY_QUERY_BATCH = 500
+
+def _to_dict(summary):
+    return {
+        'total_transactions': summary.total_transactions,
+        'total_customers': summary.total_customers,
+        'total_products': summary.total_products,
+        'total_revenue': summary.total_revenue
+    }
+
+def get_statistics():
+    """
+    Dapatkan statistik dasar dari data transaksi
+    
+    Ringkasan dibangun dari tabel transaksi hanya jika belum pernah ada
+    (mis. database lama sebelum tabel statistik ditambahkan).
+    
+    Returns:
+        Dictionary dengan statistik
+    """
+    summary = StatistikData.query.first()
+    if summary is None:
+        summary = rebuild_statistics()
+        db.session.commit()
+    
+    return _to_dict(summary)
+
+def compute_statistics():
+    """
+    Hitung statistik langsung dari tabel transaksi (agregasi di database)
+    
+    Returns:
+        Dictionary dengan statistik dan 'total_rows'
+    """
+    row = db.session.query(
+        func.count(Transaksi.id),
+        func.count(distinct(Transaksi.transaction_id)),
+        # Kode kamus integer: DISTINCT lebih murah daripada pada kolom teks
+        func.count(distinct(Transaksi.pelanggan_id)),
+        func.count(distinct(Transaksi.produk_id)),
+        func.coalesce(func.sum(Transaksi.total), 0.0)
+    ).one()
+    
+    return {
+        'total_rows': row[0],
+        'total_transactions': row[1],
+        'total_customers': row[2],
+        'total_products': row[3],
+        'total_revenue': float(row[4])
+    }
+
+def rebuild_statistics():
+    """
+    Bangun ulang ringkasan dari tabel transaksi (commit oleh pemanggil)
+    
+    Returns:
+        Objek StatistikData yang baru
+    """
+    reset_statistics(create=False)
+    summary = StatistikData(**compute_statistics())
+    db.session.add(summary)
+    db.session.flush()
+    return summary
+
+def reset_statistics(create=True):
+    """
+    Kosongkan ringkasan statistik (commit oleh pemanggil)
+    
+    Args:
+        create: Buat ringkasan baru bernilai 0 (data transaksi kosong)
+    """
+    StatistikData.query.delete()
+    if create:
+        db.session.add(StatistikData(total_rows=0, total_transactions=0, total_customers=0,
+                                     total_products=0, total_revenue=0.0))
+
+def _count_present_keys(column, values):
+    """
+    Jumlah nilai kunci yang punya baris di tabel transaksi
+    
+    Satu EXISTS per nilai berhenti di entri index pertama, sehingga produk
+    atau pelanggan dengan banyak baris tidak perlu ditelusuri seluruhnya
+    (berbeda dengan SELECT DISTINCT ... WHERE kolom IN (...)).
+    """
+    present = 0
+    for start in range(0, len(values), KEY_QUERY_BATCH):
+        batch = values[start:start + KEY_QUERY_BATCH]
+        query = text('SELECT ' + ', '.join(
+            f'EXISTS (SELECT 1 FROM {Transaksi.__tablename__} WHERE {column} = :k{i})' for i in range(len(batch))
+        ))
+        row = db.session.execute(query, {f'k{i}': value for i, value in enumerate(batch)}).one()
+        present += sum(1 for exists in row if exists)
+    return present
+
+@contextmanager
+def maintain_statistics(df, sign=1):
+    """
+    Bungkus insert/hapus baris transaksi agar ringkasan statistik ikut
+    diperbarui (commit oleh pemanggil)
+    
+    Jumlah distinct berubah sebanyak selisih nilai kunci df yang punya baris
+    transaksi sesudah dan sebelum perubahan.
+    
+    Contoh:
+        with maintain_statistics(chunk):
+            bulk_insert_transactions(chunk)
+    
+    Args:
+        df: DataFrame baris transaksi yang ditambah/dihapus, dengan kolom
+            transaction_id, customer_id, product, dan total. Perubahan harus
+            sudah di-flush ke database di akhir blok
+        sign: 1 untuk baris yang ditambahkan, -1 untuk baris yang dihapus
+    """
+    if df.empty:
+        yield
+        return
+    
+    if StatistikData.query.first() is None:
+        # Belum ada ringkasan: bangun dari tabel transaksi yang sudah memuat perubahan ini
+        yield
+        rebuild_statistics()
+        return
+    
+    keys = {column: df[column].unique().tolist() for column in KEY_COLUMNS}
+    before = {column: _count_present_keys(column, values) for column, values in keys.items()}
+    yield
+    
+    summary = StatistikData.query.first()
+    for column, field in KEY_COLUMNS.items():
+        changed = _count_present_keys(column, keys[column]) - before[column]
+        setattr(summary, field, getattr(summary, field) + changed)
+    
+    summary.total_rows += sign * len(df)
+    summary.total_revenue += sign * float(df['total'].sum())
+
+def check_statistics(fix=False):
+    """
+    Bandingkan ringkasan tersimpan dengan hasil hitung ulang dari tabel transaksi
+    
+    Args:
+        fix: Bangun ulang ringkasan jika ditemukan selisih
+    
+    Returns:
+        Dictionary field -> (tersimpan, seharusnya) untuk field yang berbeda
+        (kosong jika konsisten)
+    """
+    summary = StatistikData.query.first()
+    expected = compute_statistics()
+    
+    if summary is None:
+        mismatches = {field: (None, value) for field, value in expected.items()}
+    else:
+        mismatches = {}
+        for field, value in expected.items():
+            stored = getattr(summary, field)
+            if field == 'total_revenue':
+                # Penjumlahan float inkremental bisa berbeda sangat sedikit
+                same = math.isclose(stored, value, rel_tol=1e-9, abs_tol=0.01)
+            else:
+                same = stored == value
+            if not same:
+                mismatches[field] = (stored, value)
+    
+    if mismatches and fix:
+        rebuild_statistics()
+        db.session.commit()
+    
+    return mismatches
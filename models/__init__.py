@@ -1,3 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+# Daftarkan pragma SQLite untuk setiap koneksi (juga di proses worker)
+from models import schema  # noqa: E402,F401
@@ -0,0 +1,103 @@
+"""
+Lapisan skema database: pragma SQLite dan migrasi ringan
+
+db.create_all() hanya membuat tabel yang belum ada, sehingga kolom dan index
+yang ditambahkan ke model belakangan tidak pernah sampai ke database lama.
+upgrade_schema() melengkapinya: tabel baru dibuat, kolom yang hilang
+ditambahkan dengan ALTER TABLE, dan index yang hilang dibuat. Tabel usang
+yang isinya bisa dibangun ulang (OBSOLETE_TABLES) dihapus.
+"""
+import sqlite3
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from models import db
+
+# Diterapkan ke setiap koneksi SQLite baru
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',         # Pembaca tidak diblokir oleh penulis (mis. job worker)
+    'synchronous': 'NORMAL',       # Aman dengan WAL, jauh lebih sedikit fsync
+    'cache_size': -64000,          # 64 MB page cache (nilai negatif = KB)
+    'mmap_size': 268435456,        # 256 MB memory-mapped I/O
+    'temp_store': 'MEMORY'         # Sort/GROUP BY sementara di memori
+}
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+# Tabel lama yang hanya berisi data turunan dan sudah digantikan tabel lain
+OBSOLETE_TABLES = ('support_itemset', 'status_mining', 'statistik_kunci')
+
+def upgrade_schema():
+    """
+    Samakan skema database dengan model (dipanggil di dalam app context)
+    
+    Returns:
+        List keterangan perubahan yang dilakukan (kosong jika sudah sesuai)
+    """
+    import models.transaksi  # noqa: F401 - daftarkan semua tabel ke metadata
+    
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+    
+    for name in OBSOLETE_TABLES:
+        if name in existing_tables:
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f'DROP TABLE {engine.dialect.identifier_preparer.quote(name)}')
+            changes.append(f'hapus tabel {name}')
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(engine)
+            changes.append(f'tabel {table.name}')
+            continue
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                _add_column(engine, table, column)
+                changes.append(f'kolom {table.name}.{column.name}')
+        
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+                changes.append(f'index {index.name}')
+    
+    if changes and engine.dialect.name == 'sqlite':
+        # Perbarui statistik query planner untuk index baru
+        with engine.begin() as connection:
+            connection.exec_driver_sql('PRAGMA optimize')
+    
+    return changes
+
+def _add_column(engine, table, column):
+    """Tambahkan satu kolom model ke tabel yang sudah ada"""
+    preparer = engine.dialect.identifier_preparer
+    ddl = (f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN '
+           f'{preparer.format_column(column)} {column.type.compile(engine.dialect)}')
+    
+    # Kolom NOT NULL pada tabel berisi data memerlukan nilai default
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        ddl += f' DEFAULT {_literal(default)}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    
+    with engine.begin() as connection:
+        connection.exec_driver_sql(ddl)
+
+def _literal(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
@@ -3,6 +3,16 @@ from datetime import datetime
 
 class Transaksi(db.Model):
     __tablename__ = 'transaksi'
+    # Index untuk filter + urutan keyset (kolom urut, id) di halaman data transaksi,
+    # GROUP BY pelanggan_id (RFM), serta pencarian keranjang per transaction_id
+    __table_args__ = (
+        db.Index('ix_transaksi_date_id', 'date', 'id'),
+        db.Index('ix_transaksi_total_id', 'total', 'id'),
+        db.Index('ix_transaksi_customer_date', 'customer_id', 'date', 'id'),
+        db.Index('ix_transaksi_product_date', 'product', 'date', 'id'),
+        db.Index('ix_transaksi_transaction_id', 'transaction_id'),
+        db.Index('ix_transaksi_pelanggan_date', 'pelanggan_id', 'date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(100), nullable=False)
@@ -12,14 +22,33 @@ class Transaksi(db.Model):
     quantity = db.Column(db.Integer, nullable=False, default=1)
     price = db.Column(db.Float, nullable=False, default=0.0)
     total = db.Column(db.Float, nullable=False, default=0.0)
+    # Kode integer dari kamus produk/pelanggan, diisi saat upload
+    produk_id = db.Column(db.Integer)  # Produk.id
+    pelanggan_id = db.Column(db.Integer)  # Pelanggan.id
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'transaction_id': self.transaction_id,
+            'date': self.date.isoformat(),
+            'customer_id': self.customer_id,
+            'product': self.product,
+            'quantity': self.quantity,
+            'price': self.price,
+            'total': self.total
+        }
     
     def __repr__(self):
         return f'<Transaksi {self.transaction_id} - {self.product}>'
 
 class AturanAsosiasi(db.Model):
     __tablename__ = 'aturan_asosiasi'
+    __table_args__ = (
+        db.Index('ix_aturan_asosiasi_run_lift', 'run_id', 'lift'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer)  # AnalisisRun pemilik baris (NULL = data sebelum ada run)
     antecedents = db.Column(db.String(500), nullable=False)
     consequents = db.Column(db.String(500), nullable=False)
     support = db.Column(db.Float, nullable=False)
@@ -30,10 +59,54 @@ class AturanAsosiasi(db.Model):
     def __repr__(self):
         return f'<Rule {self.antecedents} => {self.consequents}>'
 
+class Produk(db.Model):
+    """Kamus nama produk -> id integer, dipakai tabel yang merujuk produk"""
+    __tablename__ = 'produk'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nama = db.Column(db.String(200), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f'<Produk {self.id} {self.nama}>'
+
+class Pelanggan(db.Model):
+    """Kamus customer_id -> id integer"""
+    __tablename__ = 'pelanggan'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kode = db.Column(db.String(100), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f'<Pelanggan {self.id} {self.kode}>'
+
+class ItemAturan(db.Model):
+    """Satu produk di antecedent atau consequent sebuah rule (bentuk ternormalisasi AturanAsosiasi)"""
+    __tablename__ = 'item_aturan'
+    __table_args__ = (
+        # "Semua rules yang melibatkan produk X" di satu run
+        db.Index('ix_item_aturan_run_produk', 'run_id', 'produk_id', 'sisi', 'rule_id'),
+        db.Index('ix_item_aturan_rule', 'rule_id', 'sisi', 'produk_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.Integer, nullable=False)  # AturanAsosiasi.id
+    run_id = db.Column(db.Integer)  # Salinan AturanAsosiasi.run_id untuk filter per run
+    produk_id = db.Column(db.Integer, nullable=False)  # Produk.id
+    sisi = db.Column(db.String(1), nullable=False)  # 'A' = antecedent, 'C' = consequent
+    
+    def __repr__(self):
+        return f'<ItemAturan rule {self.rule_id} {self.sisi} produk {self.produk_id}>'
+
 class SegmentasiPelanggan(db.Model):
     __tablename__ = 'segmentasi_pelanggan'
+    __table_args__ = (
+        db.Index('ix_segmentasi_run_label_customer', 'run_id', 'cluster_label', 'customer_id'),
+        # Juga meliputi label: JOIN dua run pada customer_id (laporan perpindahan segmen)
+        db.Index('ix_segmentasi_run_customer_label', 'run_id', 'customer_id', 'cluster_label'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer)  # AnalisisRun pemilik baris (NULL = data sebelum ada run)
     customer_id = db.Column(db.String(100), nullable=False)
     recency = db.Column(db.Integer, nullable=False)
     frequency = db.Column(db.Integer, nullable=False)
@@ -44,3 +117,176 @@ class SegmentasiPelanggan(db.Model):
     
     def __repr__(self):
         return f'<Segmentasi {self.customer_id} - {self.cluster_label}>'
+
+class AnalisisRun(db.Model):
+    """Satu set hasil analisis (rules atau segmentasi) untuk satu kombinasi parameter dan data"""
+    __tablename__ = 'analisis_run'
+    __table_args__ = (
+        db.Index('ix_analisis_run_jenis_status', 'jenis', 'status'),
+        db.Index('ix_analisis_run_lookup', 'jenis', 'fingerprint', 'params'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jenis = db.Column(db.String(20), nullable=False)  # 'mba' atau 'segmentasi'
+    status = db.Column(db.String(20), nullable=False, default='staging')  # staging, aktif, siap
+    params = db.Column(db.Text)  # JSON parameter analisis (key terurut)
+    fingerprint = db.Column(db.String(32))  # Fingerprint data transaksi saat analisis
+    cakupan = db.Column(db.String(200))  # Label cakupan data (segmen/tanggal/pelanggan); NULL = seluruh transaksi
+    jumlah = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AnalisisRun {self.id} {self.jenis} ({self.status})>'
+
+class GrafikRun(db.Model):
+    """Figure Plotly (JSON) yang sudah dibuat untuk satu run, agar tidak dibangun ulang"""
+    __tablename__ = 'grafik_run'
+    __table_args__ = (
+        db.UniqueConstraint('run_id', 'nama', name='uq_grafik_run_nama'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, nullable=False)
+    nama = db.Column(db.String(30), nullable=False)  # mis. 'heatmap', 'plot_3d'
+    figure = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<GrafikRun {self.run_id} {self.nama}>'
+
+class ModelSegmentasi(db.Model):
+    """Artefak model segmentasi (scaler, pusat cluster, label) milik satu run segmentasi"""
+    __tablename__ = 'model_segmentasi'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, nullable=False, unique=True)
+    artefak = db.Column(db.Text, nullable=False)  # JSON SegmentModel.to_artifact()
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ModelSegmentasi run {self.run_id}>'
+
+class SupportItemset(db.Model):
+    """
+    Jumlah transaksi yang memuat setiap itemset, untuk update rules inkremental
+    
+    Berisi itemset frequent saat mining beserta negative border-nya (batas =
+    True: tidak frequent, tetapi semua subset-nya frequent).
+    """
+    __tablename__ = 'support_itemset_produk'
+    __table_args__ = (
+        db.Index('ix_support_itemset_produk_batas_count', 'batas', 'count'),
+        db.Index('ix_support_itemset_produk_panjang_count', 'panjang', 'count'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kode = db.Column(db.Text, nullable=False, unique=True)  # Produk.id terurut naik, dipisah koma
+    panjang = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    batas = db.Column(db.Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f'<SupportItemset {self.kode} = {self.count}>'
+
+class StatusMining(db.Model):
+    """Status tabel support_itemset_produk (satu baris)"""
+    __tablename__ = 'status_support_itemset'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    n_transactions = db.Column(db.Integer, nullable=False)
+    store_min_support = db.Column(db.Float, nullable=False)
+    max_len = db.Column(db.Integer)  # Panjang itemset maksimal saat mining (NULL = tanpa batas)
+    # Berganti setiap kali kumpulan itemset tersimpan berubah (bukan count-nya)
+    versi = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StatusMining N={self.n_transactions} min_support={self.store_min_support}>'
+
+class StatistikData(db.Model):
+    """Ringkasan statistik dashboard yang diperbarui saat upload/hapus (satu baris)"""
+    __tablename__ = 'statistik_data'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    total_transactions = db.Column(db.Integer, nullable=False, default=0)
+    total_customers = db.Column(db.Integer, nullable=False, default=0)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StatistikData {self.total_transactions} transaksi>'
+
+class RingkasanRfm(db.Model):
+    """Agregat RFM berjalan per pelanggan, diperbarui setiap upload (recency terhadap StatusRfm.tanggal_acuan)"""
+    __tablename__ = 'ringkasan_rfm'
+    
+    pelanggan_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Pelanggan.id
+    last_date = db.Column(db.DateTime, nullable=False)  # Tanggal transaksi terakhir
+    frequency = db.Column(db.Integer, nullable=False)  # Jumlah transaction_id berbeda
+    monetary = db.Column(db.Float, nullable=False)  # Total pembelian
+    
+    def __repr__(self):
+        return f'<RingkasanRfm pelanggan {self.pelanggan_id} F={self.frequency} M={self.monetary}>'
+
+class StatusRfm(db.Model):
+    """Status tabel ringkasan_rfm (satu baris)"""
+    __tablename__ = 'status_ringkasan_rfm'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Ringkasan berlaku sampai akhir tanggal ini; recency dihitung terhadapnya
+    tanggal_acuan = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StatusRfm acuan={self.tanggal_acuan}>'
+
+class SnapshotRfm(db.Model):
+    """
+    Baris ringkasan_rfm pelanggan yang berubah pada satu hari (kondisi akhir hari itu)
+    
+    frequency 0 menandai pelanggan yang tidak lagi punya transaksi.
+    """
+    __tablename__ = 'snapshot_rfm'
+    __table_args__ = (
+        db.UniqueConstraint('tanggal', 'pelanggan_id', name='uq_snapshot_rfm_tanggal_pelanggan'),
+        db.Index('ix_snapshot_rfm_pelanggan_tanggal', 'pelanggan_id', 'tanggal'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tanggal = db.Column(db.Date, nullable=False)
+    pelanggan_id = db.Column(db.Integer, nullable=False)
+    last_date = db.Column(db.DateTime, nullable=False)
+    frequency = db.Column(db.Integer, nullable=False)
+    monetary = db.Column(db.Float, nullable=False)
+    
+    def __repr__(self):
+        return f'<SnapshotRfm {self.tanggal} pelanggan {self.pelanggan_id}>'
+
+class JobAnalisis(db.Model):
+    """Status dan hasil job analisis latar belakang, dibaca semua proses web"""
+    __tablename__ = 'job_analisis'
+    __table_args__ = (
+        # Deduplikasi lintas proses: satu job belum selesai per kunci
+        db.Index('uq_job_analisis_kunci_aktif', 'kunci', unique=True,
+                 sqlite_where=db.text("status IN ('pending', 'running')")),
+        db.Index('ix_job_analisis_status_selesai', 'status', 'finished_at'),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)
+    jenis = db.Column(db.String(30), nullable=False)  # mis. 'analisis_mba', 'segmentasi'
+    params = db.Column(db.Text, nullable=False)  # JSON parameter analisis
+    fingerprint = db.Column(db.String(32))  # Fingerprint data transaksi saat job dibuat
+    kunci = db.Column(db.String(40), nullable=False)  # Hash jenis + params + fingerprint
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(200))
+    error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON hasil fungsi job
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<JobAnalisis {self.id} {self.jenis} ({self.status})>'
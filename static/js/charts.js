@@ -0,0 +1,6 @@
+// Render semua figure Plotly yang disematkan sebagai JSON (lihat templates/_plotly.html)
+document.querySelectorAll('script[data-plotly-chart]').forEach(function (node) {
+    var figure = JSON.parse(node.textContent);
+    var target = document.getElementById(node.dataset.plotlyChart);
+    Plotly.newPlot(target, figure.data, figure.layout, {responsive: true});
+});
@@ -0,0 +1,77 @@
+"""
+Fixture pytest: aplikasi dengan database SQLite sementara
+
+Config diarahkan ke direktori temp sebelum app diimport, dan job dijalankan
+inline agar test tidak memerlukan process pool.
+"""
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+_TEST_DIR = tempfile.mkdtemp(prefix='natura_test_')
+Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(_TEST_DIR, 'test.db')
+Config.UPLOAD_FOLDER = os.path.join(_TEST_DIR, 'uploads')
+Config.JOB_WORKERS = 0
+Config.MINING_WORKERS = 1
+Config.CLUSTERING_SWEEP_WORKERS = 1
+
+def transactions_csv(n_transactions=200, n_customers=40, extra=''):
+    """
+    CSV transaksi sintetis yang deterministik
+    
+    Setiap transaksi genap berisi Kopi + Gula (asosiasi kuat), transaksi
+    kelipatan tiga ditambah Susu, dan customer bergilir agar RFM bervariasi.
+    
+    Args:
+        n_transactions: Jumlah transaksi
+        n_customers: Jumlah pelanggan
+        extra: Baris CSV tambahan (tanpa header)
+    
+    Returns:
+        BytesIO berisi file CSV
+    """
+    lines = ['transaction_id,date,customer_id,product,quantity,price']
+    for number in range(n_transactions):
+        products = ['Kopi', 'Gula'] if number % 2 == 0 else ['Teh']
+        if number % 3 == 0:
+            products.append('Susu')
+        day = 1 + (number * 7) % 28
+        month = 1 + number % 6
+        customer = f'C{(number * 7) % n_customers}'
+        for product in products:
+            lines.append(f'T{number},2024-{month:02d}-{day:02d},{customer},{product},{1 + number % 4},{5000 * (1 + number % 5)}')
+    return io.BytesIO(('\n'.join(lines) + '\n' + extra).encode())
+
+@pytest.fixture
+def app():
+    import app as app_module
+    from models import db
+    from models.schema import upgrade_schema
+    
+    flask_app = app_module.app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        upgrade_schema()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def uploaded(client):
+    """Client dengan data transaksi sintetis yang sudah diupload"""
+    response = client.post('/upload', data={'file': (transactions_csv(), 'transaksi.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    return client
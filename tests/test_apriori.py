@@ -0,0 +1,83 @@
+"""Pemilihan rules dengan heap (top_k, max_per_antecedent) dan max_len sama dengan urut-lalu-potong"""
+import random
+
+import pytest
+
+from utils.apriori import RULE_METRICS, _iter_rules, generate_rules, run_apriori
+from utils.frequent_itemsets import mine_frequent_itemsets
+
+METRIC_COLUMNS = {'confidence': 3, 'lift': 4, 'leverage': 5}
+
+def _baskets(n_baskets=400, seed=3):
+    rng = random.Random(seed)
+    products = [f'P{i}' for i in range(15)]
+    weights = [1 / (rank + 1) for rank in range(len(products))]
+    # Keranjang kecil dengan produk berbobot: banyak rules dengan confidence/lift yang sama persis
+    return [sorted(set(rng.choices(products, weights, k=rng.randint(1, 5)))) for _ in range(n_baskets)]
+
+def _all_rules(frequent_itemsets, min_confidence, max_len=None):
+    """Semua rules (dengan leverage) dalam urutan dibentuk, tanpa batas jumlah"""
+    supports = dict(zip(frequent_itemsets['itemsets'], frequent_itemsets['support']))
+    return list(_iter_rules(supports, min_confidence, max_len))
+
+def _as_tuples(rules):
+    return [tuple(row) for row in rules.itertuples(index=False)] if not rules.empty else []
+
+def _brute_force(rules, top_k, metric, max_per_antecedent):
+    """Urutkan semua rules lalu potong (per antecedent, kemudian total)"""
+    column = METRIC_COLUMNS[metric]
+    # Seri dipecah dengan confidence, lift, lalu urutan rule (sort stabil: yang lebih awal menang)
+    ranked = sorted(rules, key=lambda rule: (rule[column], rule[3], rule[4]), reverse=True)
+    if max_per_antecedent is not None:
+        taken = {}
+        selected = []
+        for rule in ranked:
+            if taken.get(rule[0], 0) < max_per_antecedent:
+                taken[rule[0]] = taken.get(rule[0], 0) + 1
+                selected.append(rule)
+        ranked = selected
+    if top_k is not None:
+        ranked = ranked[:top_k]
+    return ranked
+
+def _rule_keys(rules):
+    return [(frozenset(rule[0]), frozenset(rule[1])) for rule in rules]
+
+@pytest.fixture(scope='module')
+def frequent_itemsets():
+    return mine_frequent_itemsets(_baskets(), 0.01)
+
+@pytest.mark.parametrize('metric', RULE_METRICS)
+@pytest.mark.parametrize('top_k, max_per_antecedent', [(1, None), (25, None), (10_000, None),
+                                                        (None, 1), (None, 3), (15, 2)])
+def test_heap_selection_matches_sort_and_truncate(frequent_itemsets, metric, top_k, max_per_antecedent):
+    full = _all_rules(frequent_itemsets, 0.2)
+    expected = _brute_force(full, top_k, metric, max_per_antecedent)
+    
+    selected = generate_rules(frequent_itemsets, 0.2, top_k=top_k, metric=metric,
+                              max_per_antecedent=max_per_antecedent)
+    assert len(selected) == len(expected)
+    assert set(_rule_keys(_as_tuples(selected))) == set(_rule_keys(expected))
+    # Hasil tetap diurutkan berdasarkan confidence
+    assert selected['confidence'].is_monotonic_decreasing
+    
+    if max_per_antecedent is not None:
+        assert selected['antecedents'].value_counts().max() <= max_per_antecedent
+
+@pytest.mark.parametrize('max_len', [2, 3])
+def test_max_len_matches_filtered_rules(frequent_itemsets, max_len):
+    full = _all_rules(frequent_itemsets, 0.2)
+    expected = [rule for rule in full if len(rule[0]) + len(rule[1]) <= max_len]
+    assert 0 < len(expected) < len(full)
+    
+    limited = generate_rules(frequent_itemsets, 0.2, max_len=max_len)
+    assert _rule_keys(_as_tuples(limited)) == _rule_keys(sorted(expected, key=lambda rule: rule[3], reverse=True))
+    assert set(_rule_keys(expected)) == set(_rule_keys(_all_rules(frequent_itemsets, 0.2, max_len)))
+    
+    # max_len saat mining juga memangkas itemset, rules yang dihasilkan tetap sama
+    mined = run_apriori(_baskets(), 0.01, 0.2, max_len=max_len)
+    assert set(_rule_keys(_as_tuples(mined))) == set(_rule_keys(expected))
+    
+    # Digabung dengan top_k: potong setelah rules yang terlalu panjang dibuang
+    top = generate_rules(frequent_itemsets, 0.2, top_k=20, max_len=max_len)
+    assert set(_rule_keys(_as_tuples(top))) == set(_rule_keys(_brute_force(expected, 20, 'lift', None)))
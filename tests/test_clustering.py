@@ -0,0 +1,44 @@
+"""Label segmen dari pusat cluster: SegmentModel dan hasil clustering selalu sepakat"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.clustering import SegmentModel, kmeans_clustering, update_clustering, RFM_COLUMNS
+
+def _rfm(n_customers=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'customer_id': [f'C{i}' for i in range(n_customers)],
+        'Recency': rng.integers(1, 365, n_customers),
+        'Frequency': rng.integers(1, 30, n_customers),
+        'Monetary': rng.gamma(2.0, 50000.0, n_customers)
+    })
+
+def _assert_scores_match(model, rfm_clustered):
+    saved = SegmentModel.from_artifact(json.loads(json.dumps(SegmentModel.from_pipeline(model).to_artifact())))
+    assert sorted(saved.labels) == list(range(len(saved.centers)))
+    
+    expected = list(zip(rfm_clustered['Cluster'].tolist(), rfm_clustered['Cluster_Label'].tolist()))
+    assert [saved.score(*row) for row in rfm_clustered[RFM_COLUMNS].values.tolist()] == expected
+    batch = saved.score_batch(rfm_clustered[RFM_COLUMNS])
+    assert list(zip(batch['Cluster'].tolist(), batch['Cluster_Label'].tolist())) == expected
+
+@pytest.mark.parametrize('backend', ['kmeans', 'minibatch'])
+@pytest.mark.parametrize('n_clusters', [3, 5])
+def test_segment_model_score_matches_clustering(backend, n_clusters):
+    rfm_clustered, model = kmeans_clustering(_rfm(), n_clusters, backend=backend)
+    assert rfm_clustered['Cluster_Label'].notna().all()
+    _assert_scores_match(model, rfm_clustered)
+
+def test_update_clustering_with_empty_clusters():
+    _, model = kmeans_clustering(_rfm(), 3, backend='minibatch')
+    base = SegmentModel.from_pipeline(model)
+    
+    # Pelanggan identik: setelah partial_fit hanya satu cluster yang punya anggota
+    rfm = _rfm().iloc[[0, 0, 0]].assign(customer_id=['A', 'B', 'C'])
+    rfm_clustered, updated = update_clustering(base.to_pipeline(), rfm)
+    assert rfm_clustered['Cluster'].nunique() == 1
+    assert rfm_clustered['Cluster_Label'].notna().all()
+    _assert_scores_match(updated, rfm_clustered)
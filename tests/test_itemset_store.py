@@ -0,0 +1,67 @@
+"""Count support itemset tersimpan tetap sama dengan hitung ulang penuh setelah upload dan hapus"""
+from conftest import transactions_csv
+
+from models.transaksi import Produk, SupportItemset, Transaksi
+from controllers.data_controller import delete_transaction
+from controllers.mining_controller import can_derive_rules, derive_rules, get_mining_state, promote_border
+from utils.apriori import run_apriori
+from utils.frequent_itemsets import count_itemsets
+
+MBA_FORM = {'min_support': '0.05', 'min_confidence': '0.3'}
+
+def _baskets():
+    baskets = {}
+    for transaction_id, product in Transaksi.query.with_entities(Transaksi.transaction_id, Transaksi.product):
+        baskets.setdefault(transaction_id, set()).add(product)
+    return [sorted(basket) for basket in baskets.values()]
+
+def _assert_counts_fresh(derivable=True):
+    names = dict(Produk.query.with_entities(Produk.id, Produk.nama))
+    rows = SupportItemset.query.with_entities(SupportItemset.kode, SupportItemset.count).all()
+    itemsets = [[names[int(product_id)] for product_id in kode.split(',')] for kode, _ in rows]
+    
+    baskets = _baskets()
+    assert get_mining_state().n_transactions == len(baskets)
+    assert [count for _, count in rows] == count_itemsets(baskets, itemsets)
+    
+    # Rules dari count tersimpan sama dengan mining penuh
+    assert can_derive_rules(0.05) == derivable
+    if not derivable:
+        return
+    derived = derive_rules(0.05, 0.3)
+    mined = run_apriori(baskets, 0.05, 0.3)
+    key = lambda rules: sorted(zip(map(sorted, rules['antecedents']), map(sorted, rules['consequents']),
+                                   rules['support'].round(9)))
+    assert key(derived) == key(mined)
+
+def test_itemset_counts_after_upload_and_delete(app, uploaded):
+    assert uploaded.post('/analisis_mba', data=MBA_FORM, follow_redirects=True).status_code == 200
+    with app.app_context():
+        assert SupportItemset.query.filter(SupportItemset.batas.is_(True)).count() > 0
+        _assert_counts_fresh()
+    
+    # Keranjang baru berisi produk lama dan produk yang belum pernah ada (belum frequent)
+    csv = ''.join(f'B{i},2024-07-01,C{i % 5},{product},1,5000\n'
+                  for i in range(30) for product in (['Kopi', 'Gula'] if i % 2 else ['Teh']) + (['Roti'] if i < 3 else []))
+    uploaded.post('/upload', data={'file': (transactions_csv(0, extra=csv), 'baru.csv')},
+                  content_type='multipart/form-data')
+    with app.app_context():
+        assert SupportItemset.query.filter_by(panjang=1, batas=True).count() > 0
+        _assert_counts_fresh()
+        
+        # Hapus satu baris (keranjang mengecil) dan satu keranjang utuh
+        row = Transaksi.query.filter_by(transaction_id='T0', product='Gula').one()
+        assert 'success' in delete_transaction(row.id)
+        for row in Transaksi.query.filter_by(transaction_id='B1').all():
+            assert 'success' in delete_transaction(row.id)
+        _assert_counts_fresh()
+    
+    # Produk baru yang menjadi frequent (itemset border) dinaikkan tanpa mining penuh
+    csv = ''.join(f'R{i},2024-07-02,C1,Roti,1,5000\n' for i in range(40))
+    uploaded.post('/upload', data={'file': (transactions_csv(0, extra=csv), 'roti.csv')},
+                  content_type='multipart/form-data')
+    with app.app_context():
+        _assert_counts_fresh(derivable=False)
+        assert promote_border(0.05)
+        assert SupportItemset.query.filter(SupportItemset.kode.like('%,%'), SupportItemset.batas.is_(True)).count() > 0
+        _assert_counts_fresh()
@@ -0,0 +1,41 @@
+"""Status job disimpan di database sehingga terlihat dari proses web lain"""
+from datetime import datetime, timedelta
+
+from models import db
+from models.transaksi import JobAnalisis
+from controllers.job_controller import JobStore
+from utils.jobs import JobManager, job_key
+
+MBA_FORM = {'min_support': '0.05', 'min_confidence': '0.3'}
+
+def _not_called(**kwargs):
+    raise AssertionError('job identik tidak boleh dijalankan ulang')
+
+def test_job_visible_to_other_manager(app, uploaded):
+    job = uploaded.post('/jobs/analisis_mba', data=MBA_FORM).get_json()
+    
+    # Manager lain (mis. worker gunicorn kedua) membaca job dari database
+    other = JobManager(JobStore(app), 0)
+    with app.test_request_context():
+        found = other.get(job['job_id'])
+    assert found is not None and found.status == 'done'
+    assert found.result['run_id'] == uploaded.get(f"/jobs/{job['job_id']}/result").get_json()['run_id']
+
+def test_active_job_deduplicated_across_managers(app):
+    params = {'n_clusters': 3}
+    key = job_key('segmentasi', params, 'abc')
+    first = JobStore(app)
+    with app.app_context():
+        job, created = first.create('job1', 'segmentasi', params, 'abc', key)
+        assert created
+    
+    other = JobManager(JobStore(app), 0)
+    with app.app_context():
+        assert other.submit('segmentasi', params, 'abc', _not_called, **params).id == 'job1'
+        
+        # Job yang proses pemiliknya berhenti dianggap gagal setelah JOB_STALE_MINUTES
+        JobAnalisis.query.filter_by(id='job1').update({'updated_at': datetime.utcnow() - timedelta(days=1)})
+        db.session.commit()
+        job = other.submit('segmentasi', params, 'abc', lambda **kwargs: {'success': 'ok'}, **params)
+        assert job.id != 'job1' and job.status == 'done'
+        assert other.get('job1').status == 'failed'
@@ -0,0 +1,25 @@
+"""Smoke test halaman Market Basket Analysis"""
+MBA_FORM = {'min_support': '0.05', 'min_confidence': '0.3'}
+
+def test_mba_post_renders_rules(uploaded):
+    response = uploaded.post('/analisis_mba', data=MBA_FORM, follow_redirects=True)
+    
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'Error saat analisis' not in body
+    assert 'Hasil Analisis' in body
+    assert 'Kopi' in body and 'Gula' in body
+
+def test_mba_job_result_renders(uploaded):
+    response = uploaded.post('/jobs/analisis_mba', data=MBA_FORM)
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    
+    assert uploaded.get(f'/jobs/{job_id}').get_json()['status'] == 'done'
+    response = uploaded.get(f'/analisis_mba?job={job_id}')
+    assert response.status_code == 200
+    assert 'Hasil Analisis' in response.get_data(as_text=True)
+
+def test_mba_without_data_redirects(client):
+    response = client.post('/analisis_mba', data=MBA_FORM)
+    assert response.status_code == 302
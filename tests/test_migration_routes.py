@@ -0,0 +1,70 @@
+"""Smoke test laporan perpindahan segmen antara dua run segmentasi"""
+from conftest import transactions_csv
+
+from models.transaksi import Transaksi
+from controllers.data_controller import delete_transaction
+
+def _segment_twice(app, client):
+    """Run segmentasi #1, lalu C0 dihapus dan C99 ditambah sebelum run #2"""
+    assert client.post('/segmentasi', data={'n_clusters': '3'}, follow_redirects=True).status_code == 200
+    
+    csv = 'transaction_id,date,customer_id,product,quantity,price\nBARU1,2024-07-01,C99,Kopi,1,5000\n'
+    client.post('/upload', data={'file': (transactions_csv(0, extra=csv), 'baru.csv')},
+                content_type='multipart/form-data')
+    with app.app_context():
+        for transaksi in Transaksi.query.filter(Transaksi.customer_id == 'C0').all():
+            assert 'success' in delete_transaction(transaksi.id)
+    
+    assert client.post('/segmentasi', data={'n_clusters': '4'}, follow_redirects=True).status_code == 200
+
+def test_migration_matrix(app, uploaded):
+    assert uploaded.get('/api/segmentasi/migrasi').status_code == 400
+    _segment_twice(app, uploaded)
+    
+    result = uploaded.get('/api/segmentasi/migrasi').get_json()
+    assert (result['from_run'], result['to_run']) == (1, 2)
+    assert result['from_labels'] and result['to_labels']
+    
+    # 40 pelanggan lama: 39 tetap ada di run #2, C0 hilang, C99 baru
+    matched = sum(sum(row.values()) for row in result['matrix'].values())
+    assert matched == result['stayed'] + result['moved'] == 39
+    assert sum(result['lost'].values()) == 1
+    assert sum(result['new'].values()) == 1
+    
+    page = uploaded.get('/segmentasi/migrasi').get_data(as_text=True)
+    assert 'Matriks Perpindahan' in page
+
+def test_migration_customers_pagination(app, uploaded):
+    _segment_twice(app, uploaded)
+    result = uploaded.get('/api/segmentasi/migrasi').get_json()
+    
+    new_label = next(label for label, count in result['new'].items() if count)
+    new = uploaded.get('/api/segmentasi/migrasi/pelanggan', query_string={'ke_segmen': new_label}).get_json()
+    assert [row['customer_id'] for row in new['customers']] == ['C99']
+    assert new['customers'][0]['from'] is None and new['next_after'] is None
+    
+    lost_label = next(label for label, count in result['lost'].items() if count)
+    lost = uploaded.get('/api/segmentasi/migrasi/pelanggan', query_string={'dari_segmen': lost_label}).get_json()
+    assert [row['customer_id'] for row in lost['customers']] == ['C0']
+    
+    # Sel matriks terbesar dibaca per halaman berisi satu pelanggan
+    from_label, to_label, count = max(
+        ((source, target, count) for source, row in result['matrix'].items() for target, count in row.items()),
+        key=lambda cell: cell[2]
+    )
+    assert count > 1
+    seen, after = [], None
+    while True:
+        args = {'dari_segmen': from_label, 'ke_segmen': to_label, 'limit': 1}
+        if after:
+            args['after'] = after
+        page = uploaded.get('/api/segmentasi/migrasi/pelanggan', query_string=args).get_json()
+        seen += [row['customer_id'] for row in page['customers']]
+        after = page['next_after']
+        if after is None:
+            break
+    assert len(seen) == count and seen == sorted(set(seen))
+    
+    assert uploaded.get('/api/segmentasi/migrasi/pelanggan').status_code == 400
+    assert uploaded.get('/api/segmentasi/migrasi/pelanggan?ke_segmen=x&limit=0').status_code == 400
+    assert uploaded.get('/api/segmentasi/migrasi?dari=abc').status_code == 400
@@ -0,0 +1,62 @@
+"""Keyset pagination /api/transaksi: maju lalu mundur melewati semua baris tanpa duplikat atau celah"""
+from datetime import datetime
+
+import pytest
+
+from models.transaksi import Transaksi
+
+def _page(client, **params):
+    response = client.get('/api/transaksi', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def _expected_ids(sort, direction, product=None):
+    query = Transaksi.query
+    if product:
+        query = query.filter(Transaksi.product == product)
+    rows = [(getattr(row, sort), row.id) for row in query]
+    return [row_id for _, row_id in sorted(rows, reverse=direction == 'desc')]
+
+@pytest.mark.parametrize('sort', ['date', 'total', 'id'])
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+@pytest.mark.parametrize('product', [None, 'Kopi'])
+def test_walk_all_pages_forward_and_backward(app, uploaded, sort, direction, product):
+    params = {'sort': sort, 'direction': direction, 'limit': 7}
+    if product:
+        params['product'] = product
+    with app.app_context():
+        expected = _expected_ids(sort, direction, product)
+        # Banyak baris dengan tanggal/total sama: urutan seri ditentukan id
+        values = [getattr(row, sort) for row in Transaksi.query]
+        assert sort == 'id' or len(set(values)) < len(values)
+    
+    # Maju dari halaman pertama sampai next_cursor habis
+    pages = [_page(uploaded, **params)]
+    assert pages[0]['prev_cursor'] is None
+    while pages[-1]['next_cursor']:
+        pages.append(_page(uploaded, after=pages[-1]['next_cursor'], **params))
+    forward = [[row['id'] for row in page['data']] for page in pages]
+    assert [row_id for page in forward for row_id in page] == expected
+    assert all(len(page) == 7 for page in forward[:-1]) and 1 <= len(forward[-1]) <= 7
+    
+    # Urutan di dalam halaman mengikuti kolom urut (seri: id)
+    rows = [row for page in pages for row in page['data']]
+    keys = [(datetime.fromisoformat(row['date']) if sort == 'date' else row[sort], row['id']) for row in rows]
+    assert keys == sorted(keys, reverse=direction == 'desc')
+    
+    # Mundur dari halaman terakhir lewat prev_cursor sampai halaman pertama
+    backward = [forward[-1]]
+    cursor = pages[-1]['prev_cursor']
+    while cursor:
+        page = _page(uploaded, before=cursor, **params)
+        backward.append([row['id'] for row in page['data']])
+        cursor = page['prev_cursor']
+    backward_ids = [row_id for page in reversed(backward) for row_id in page]
+    assert backward_ids == expected
+    assert len(set(backward_ids)) == len(expected)
+    # Batas halaman sama dengan saat maju (halaman pertama tetap penuh)
+    assert list(reversed(backward)) == forward
+
+def test_invalid_cursor_and_sort(uploaded):
+    assert uploaded.get('/api/transaksi?sort=nama').status_code == 400
+    assert uploaded.get('/api/transaksi?after=abc&before=abc').status_code == 400
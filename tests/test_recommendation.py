@@ -0,0 +1,55 @@
+"""Test API rekomendasi keranjang dengan konteks segmen pelanggan"""
+import json
+
+from models import db
+from models.transaksi import AnalisisRun, SegmentasiPelanggan
+from controllers.result_controller import _delete_runs, get_active_run_id
+
+MBA_FORM = {'min_support': '0.05', 'min_confidence': '0.3'}
+
+def test_recommendation_uses_segment_rules(app, uploaded, monkeypatch):
+    # Run aktif dan pemetaan segmen -> run diperiksa ulang setiap permintaan
+    monkeypatch.setitem(app.config, 'RECOMMENDATION_REFRESH_SECONDS', 0)
+    assert uploaded.post('/analisis_mba', data=MBA_FORM, follow_redirects=True).status_code == 200
+    assert uploaded.post('/segmentasi', data={'n_clusters': '3'}, follow_redirects=True).status_code == 200
+    assert uploaded.post('/analisis_mba', data=dict(MBA_FORM, mode='segmen'), follow_redirects=True).status_code == 200
+    
+    with app.app_context():
+        active_mba = get_active_run_id('mba')
+        segment_runs = {
+            json.loads(run.params)['scope']['segment']: run.id
+            for run in AnalisisRun.query.filter(AnalisisRun.jenis == 'mba', AnalisisRun.cakupan.isnot(None))
+        }
+        labels = dict(SegmentasiPelanggan.query.with_entities(
+            SegmentasiPelanggan.customer_id, SegmentasiPelanggan.cluster_label
+        ).filter(SegmentasiPelanggan.run_id == get_active_run_id('segmentasi')))
+    assert segment_runs
+    
+    general = uploaded.get('/api/rekomendasi?product=Kopi').get_json()
+    assert general['run_id'] == active_mba
+    assert general['cakupan'] is None
+    
+    # Pelanggan genap membeli Kopi + Gula, sehingga rules segmennya memuat Kopi
+    customer = next(customer for customer, label in labels.items()
+                    if label in segment_runs and int(customer[1:]) % 2 == 0)
+    result = uploaded.get(f'/api/rekomendasi?product=Kopi&customer_id={customer}').get_json()
+    assert result['cakupan'] == labels[customer]
+    assert result['run_id'] == segment_runs[labels[customer]]
+    assert result['recommendations']
+    
+    # Segmen tanpa run MBA per segmen memakai run aktif
+    other = next((customer for customer, label in labels.items() if label not in segment_runs), None)
+    if other is not None:
+        result = uploaded.get(f'/api/rekomendasi?product=Kopi&customer_id={other}').get_json()
+        assert result['run_id'] == active_mba and result['cakupan'] is None
+    
+    # Run eksplisit tetap dihormati
+    pinned = uploaded.get(f'/api/rekomendasi?product=Kopi&customer_id={customer}&run={active_mba}').get_json()
+    assert pinned['run_id'] == active_mba and pinned['cakupan'] is None
+    
+    # Run segmen yang dibuang tidak lagi dipakai (cache pemetaan segmen ikut diperbarui)
+    with app.app_context():
+        _delete_runs([segment_runs[labels[customer]]], 'mba')
+        db.session.commit()
+    result = uploaded.get(f'/api/rekomendasi?product=Kopi&customer_id={customer}').get_json()
+    assert result['run_id'] == active_mba and result['cakupan'] is None
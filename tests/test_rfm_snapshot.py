@@ -0,0 +1,79 @@
+"""Test snapshot RFM harian yang hanya menyimpan pelanggan berubah"""
+from datetime import date, datetime, timedelta
+
+from conftest import transactions_csv
+
+from models import db
+from models.transaksi import SnapshotRfm, StatusRfm, Transaksi
+from controllers.data_controller import delete_transaction
+from controllers.rfm_controller import (
+    get_rfm_snapshot, get_rfm_summary, list_rfm_snapshots, summary_reference_date, take_rfm_snapshot
+)
+
+def _summary_at(tanggal):
+    return get_rfm_summary(datetime.combine(tanggal + timedelta(days=1), datetime.min.time()))
+
+def test_snapshot_stores_only_changes(app, uploaded):
+    today = date.today()
+    base_day = today - timedelta(days=10)
+    with app.app_context():
+        # Snapshot dasar 10 hari lalu, berisi semua pelanggan
+        SnapshotRfm.query.delete()
+        take_rfm_snapshot(tanggal=base_day)
+        db.session.commit()
+        base = get_rfm_snapshot(base_day)
+        assert len(base) == SnapshotRfm.query.count()
+    
+    csv = 'transaction_id,date,customer_id,product,quantity,price\nBARU1,2024-07-01,C1,Kopi,1,5000\n'
+    uploaded.post('/upload', data={'file': (transactions_csv(0, extra=csv), 'baru.csv')},
+                  content_type='multipart/form-data')
+    
+    with app.app_context():
+        assert SnapshotRfm.query.filter(SnapshotRfm.tanggal == today).count() == 1
+        assert get_rfm_snapshot(base_day).equals(base)
+        assert get_rfm_snapshot(today).equals(_summary_at(today))
+        
+        # Pelanggan yang semua transaksinya dihapus hilang dari snapshot
+        for transaksi in Transaksi.query.filter(Transaksi.customer_id == 'C0').all():
+            assert 'success' in delete_transaction(transaksi.id)
+        snapshot = get_rfm_snapshot(today)
+        assert 'C0' not in set(snapshot['customer_id'])
+        assert 'C0' in set(get_rfm_snapshot(base_day)['customer_id'])
+        assert snapshot.equals(_summary_at(today))
+
+def test_snapshot_prune_keeps_current_state(app, uploaded):
+    today = date.today()
+    with app.app_context():
+        SnapshotRfm.query.delete()
+        take_rfm_snapshot(tanggal=today - timedelta(days=10))
+        for transaksi in Transaksi.query.filter(Transaksi.customer_id == 'C1').all():
+            delete_transaction(transaksi.id)
+        before = SnapshotRfm.query.count()
+        
+        app.config['RFM_SNAPSHOT_DAYS'] = 5
+        try:
+            # Baris dasar C1 sudah digantikan penanda hari ini, dan penanda itu lewat masa simpan
+            take_rfm_snapshot([], tanggal=today + timedelta(days=10))
+            db.session.commit()
+            assert SnapshotRfm.query.count() == before - 2
+            assert get_rfm_snapshot(today).equals(_summary_at(today))
+            assert list_rfm_snapshots() == []
+        finally:
+            app.config['RFM_SNAPSHOT_DAYS'] = 400
+
+def test_summary_recency_uses_stored_reference_date(app, uploaded):
+    today = date.today()
+    with app.app_context():
+        assert summary_reference_date() == today
+        assert get_rfm_summary().equals(get_rfm_snapshot(today))
+        
+        # Recency tidak ikut bergeser dengan jam baca, hanya dengan tanggal acuan tersimpan
+        StatusRfm.query.one().tanggal_acuan = today - timedelta(days=3)
+        db.session.commit()
+        earlier = get_rfm_summary()
+        assert earlier.equals(_summary_at(today - timedelta(days=3)))
+        assert ((get_rfm_snapshot(today)['Recency'] - earlier['Recency']) == 3).all()
+        
+        # Perubahan data memperbarui tanggal acuan ke hari ini
+        delete_transaction(Transaksi.query.filter(Transaksi.customer_id == 'C1').first().id)
+        assert summary_reference_date() == today
@@ -0,0 +1,54 @@
+"""RuleIndex (rule didaftarkan di item antecedent paling jarang) sama dengan pencarian menyeluruh"""
+import random
+
+from utils.recommendation import RuleIndex
+
+def _brute_force(rules, basket, limit):
+    """Rule terbaik per produk dari semua rule yang antecedent-nya termuat di keranjang"""
+    basket = set(basket)
+    best = {}
+    for number, (antecedents, consequents, _, confidence, lift) in enumerate(rules):
+        if not set(antecedents) <= basket:
+            continue
+        for product in consequents:
+            candidate = (-lift, -confidence, number)
+            if product not in basket and (product not in best or candidate < best[product]):
+                best[product] = candidate
+    ranked = sorted(best.items(), key=lambda entry: (entry[1][:2], entry[0]))[:limit]
+    return [(product, sorted(rules[number][0]), rules[number][4]) for product, (_, _, number) in ranked]
+
+def test_subset_matching_uses_full_antecedent():
+    rules = [
+        (frozenset({'Kopi', 'Gula'}), frozenset({'Susu'}), 0.1, 0.9, 3.0),
+        (frozenset({'Kopi'}), frozenset({'Roti'}), 0.3, 0.5, 1.5),
+        (frozenset({'Teh'}), frozenset({'Gula'}), 0.2, 0.6, 1.2),
+        (frozenset({'Gula', 'Teh'}), frozenset({'Kopi', 'Susu'}), 0.05, 0.4, 2.0)
+    ]
+    index = RuleIndex(rules)
+    
+    # Rule {Kopi, Gula} didaftarkan di salah satu item saja, tetapi tetap butuh keduanya
+    assert [r['product'] for r in index.recommend(['Kopi'])] == ['Roti']
+    assert [r['product'] for r in index.recommend(['Gula'])] == []
+    assert [r['product'] for r in index.recommend(['Kopi', 'Gula'])] == ['Susu', 'Roti']
+    
+    # Produk yang sudah di keranjang dilewati; Susu dari rule {Kopi, Gula} (lift lebih tinggi)
+    result = index.recommend(['Kopi', 'Gula', 'Teh'])
+    assert [(r['product'], r['antecedents']) for r in result] == [('Susu', ['Gula', 'Kopi']), ('Roti', ['Kopi'])]
+
+def test_recommend_matches_brute_force():
+    rng = random.Random(7)
+    products = [f'P{i}' for i in range(25)]
+    rules = []
+    for _ in range(400):
+        items = rng.sample(products, rng.randint(2, 5))
+        split = rng.randint(1, len(items) - 1)
+        # Lift dibulatkan agar ada rule dengan lift dan confidence sama
+        rules.append((frozenset(items[:split]), frozenset(items[split:]), rng.random(),
+                      round(rng.random(), 1), round(rng.uniform(0.5, 4.0), 1)))
+    index = RuleIndex(rules)
+    
+    for _ in range(300):
+        basket = rng.sample(products, rng.randint(1, 8))
+        limit = rng.randint(1, 12)
+        result = index.recommend(basket, limit)
+        assert [(r['product'], r['antecedents'], r['lift']) for r in result] == _brute_force(rules, basket, limit)
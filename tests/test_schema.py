@@ -0,0 +1,83 @@
+"""upgrade_schema melengkapi database dari skema awal (baseline) dan aman dijalankan ulang"""
+from sqlalchemy import inspect
+
+from models import db
+from models.transaksi import AturanAsosiasi, Transaksi
+from models.schema import OBSOLETE_TABLES, upgrade_schema
+
+# Skema tabel sebelum ada migrasi (db.create_all() versi awal)
+BASELINE_DDL = (
+    '''CREATE TABLE transaksi (
+        id INTEGER NOT NULL PRIMARY KEY,
+        transaction_id VARCHAR(100) NOT NULL,
+        date DATETIME NOT NULL,
+        customer_id VARCHAR(100) NOT NULL,
+        product VARCHAR(200) NOT NULL,
+        quantity INTEGER NOT NULL,
+        price FLOAT NOT NULL,
+        total FLOAT NOT NULL
+    )''',
+    '''CREATE TABLE aturan_asosiasi (
+        id INTEGER NOT NULL PRIMARY KEY,
+        antecedents VARCHAR(500) NOT NULL,
+        consequents VARCHAR(500) NOT NULL,
+        support FLOAT NOT NULL,
+        confidence FLOAT NOT NULL,
+        lift FLOAT NOT NULL,
+        created_at DATETIME
+    )''',
+    '''CREATE TABLE segmentasi_pelanggan (
+        id INTEGER NOT NULL PRIMARY KEY,
+        customer_id VARCHAR(100) NOT NULL,
+        recency INTEGER NOT NULL,
+        frequency INTEGER NOT NULL,
+        monetary FLOAT NOT NULL,
+        cluster INTEGER NOT NULL,
+        cluster_label VARCHAR(100) NOT NULL,
+        created_at DATETIME
+    )''',
+    # Tabel turunan dari versi sebelumnya yang sudah digantikan
+    'CREATE TABLE statistik_kunci (id INTEGER PRIMARY KEY, kolom VARCHAR(20), nilai VARCHAR(200), jumlah INTEGER)'
+)
+
+BASELINE_ROWS = (
+    "INSERT INTO transaksi VALUES (1, 'T1', '2024-01-05 00:00:00', 'C1', 'Kopi', 2, 5000, 10000)",
+    "INSERT INTO aturan_asosiasi VALUES (1, 'Kopi', 'Gula', 0.5, 0.8, 1.6, '2024-01-06 00:00:00')",
+    "INSERT INTO segmentasi_pelanggan VALUES (1, 'C1', 10, 1, 10000, 0, 'Best Customers', '2024-01-06 00:00:00')"
+)
+
+def _create_baseline():
+    engine = db.engine
+    db.session.remove()
+    with engine.begin() as connection:
+        for table in inspect(connection).get_table_names():
+            connection.exec_driver_sql(f'DROP TABLE "{table}"')
+        for statement in BASELINE_DDL + BASELINE_ROWS:
+            connection.exec_driver_sql(statement)
+
+def test_upgrade_baseline_schema_twice(app):
+    with app.app_context():
+        _create_baseline()
+        
+        changes = upgrade_schema()
+        assert 'kolom transaksi.produk_id' in changes
+        assert 'index ix_transaksi_transaction_id' in changes
+        assert 'hapus tabel statistik_kunci' in changes
+        
+        inspector = inspect(db.engine)
+        tables = set(inspector.get_table_names())
+        assert not tables & set(OBSOLETE_TABLES)
+        for table in db.metadata.sorted_tables:
+            assert table.name in tables
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            assert columns >= {column.name for column in table.columns}, table.name
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            assert indexes >= {index.name for index in table.indexes}, table.name
+        
+        # Idempoten: pemanggilan kedua tidak mengubah apa pun
+        assert upgrade_schema() == []
+        
+        # Data lama tetap ada dan masih bisa dibaca lewat model
+        row = Transaksi.query.one()
+        assert (row.transaction_id, row.product, row.total, row.produk_id) == ('T1', 'Kopi', 10000.0, None)
+        assert AturanAsosiasi.query.count() == 1
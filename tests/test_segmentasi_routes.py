@@ -0,0 +1,31 @@
+"""Smoke test segmentasi pelanggan dan API turunannya"""
+from conftest import transactions_csv
+
+def test_segment_trend_labels_unique(uploaded):
+    response = uploaded.post('/segmentasi', data={'n_clusters': '4'}, follow_redirects=True)
+    assert response.status_code == 200
+    
+    result = uploaded.get('/api/segmentasi/tren').get_json()
+    assert len(result['labels']) == len(set(result['labels']))
+    assert result['trend']
+    for point in result['trend']:
+        assert sum(point['segments'].values()) == point['pelanggan']
+
+def test_minibatch_segmentation_updates_active_model(uploaded):
+    form = {'n_clusters': '3', 'backend': 'minibatch'}
+    first = uploaded.post('/segmentasi', data=form, follow_redirects=True).get_data(as_text=True)
+    assert 'inkremental' not in first
+    
+    csv = 'transaction_id,date,customer_id,product,quantity,price\nBARU1,2024-07-01,C99,Kopi,1,5000\n'
+    uploaded.post('/upload', data={'file': (transactions_csv(0, extra=csv), 'baru.csv')},
+                  content_type='multipart/form-data')
+    second = uploaded.post('/segmentasi', data=form, follow_redirects=True).get_data(as_text=True)
+    assert 'Model diperbarui inkremental dari run #1' in second
+    
+    # Pelanggan baru ikut tersegmentasi oleh model hasil update
+    result = uploaded.get('/api/segmentasi/skor?customer_id=C99').get_json()
+    assert result['run_id'] == 2 and result['results']
+    
+    # Backend kmeans selalu fitting penuh
+    third = uploaded.post('/segmentasi', data={'n_clusters': '3'}, follow_redirects=True).get_data(as_text=True)
+    assert 'inkremental' not in third
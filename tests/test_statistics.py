@@ -0,0 +1,41 @@
+"""Ringkasan statistik inkremental tetap sama dengan hitung ulang penuh setelah upload dan hapus"""
+from conftest import transactions_csv
+
+from models.transaksi import Transaksi
+from controllers.data_controller import delete_transaction
+from controllers.statistics_controller import check_statistics, get_statistics
+
+def _upload(client, extra):
+    response = client.post('/upload', data={'file': (transactions_csv(0, extra=extra), 'tambahan.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+
+def test_statistics_after_upload_and_delete(app, uploaded):
+    with app.app_context():
+        assert check_statistics() == {}
+        before = get_statistics()
+    
+    # Pelanggan/produk lama dan baru, serta baris tambahan untuk transaction_id yang sudah ada
+    _upload(uploaded, 'T0,2024-01-01,C0,Roti,1,5000\n'
+                      'N1,2024-07-01,C0,Kopi,1,5000\n'
+                      'N2,2024-07-01,BARU,Madu,2,7000\n')
+    with app.app_context():
+        assert check_statistics() == {}
+        stats = get_statistics()
+        assert stats['total_transactions'] == before['total_transactions'] + 2
+        assert stats['total_customers'] == before['total_customers'] + 1
+        assert stats['total_products'] == before['total_products'] + 2
+        
+        # Baris terakhir pelanggan/produk/transaksi mengurangi nilai distinct
+        row = Transaksi.query.filter_by(transaction_id='N2').one()
+        assert 'success' in delete_transaction(row.id)
+        assert check_statistics() == {}
+        assert get_statistics()['total_customers'] == before['total_customers']
+        
+        # Baris yang bukan terakhir untuk transaction_id-nya, tetapi terakhir untuk produknya
+        row = Transaksi.query.filter_by(transaction_id='T0', product='Roti').one()
+        assert 'success' in delete_transaction(row.id)
+        assert check_statistics() == {}
+        stats = get_statistics()
+        assert stats['total_transactions'] == before['total_transactions'] + 1
+        assert stats['total_products'] == before['total_products']
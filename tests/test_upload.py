@@ -0,0 +1,20 @@
+"""Test validasi dan upload data transaksi"""
+import pandas as pd
+
+from controllers.data_controller import prepare_transactions
+
+def test_prepare_rejects_fractional_quantity():
+    df = pd.DataFrame({
+        'transaction_id': ['T1', 'T2', 'T3'],
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'customer_id': ['C1', 'C2', 'C3'],
+        'product': ['Kopi', 'Teh', 'Gula'],
+        'quantity': ['2', '2.7', '3.0'],
+        'price': [1000, 2000, 3000]
+    })
+    
+    clean, errors = prepare_transactions(df)
+    
+    assert clean['transaction_id'].tolist() == ['T1', 'T3']
+    assert clean['quantity'].tolist() == [2, 3]
+    assert errors == [{'row': 3, 'error': 'quantity harus bilangan bulat'}]
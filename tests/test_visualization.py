@@ -0,0 +1,63 @@
+"""Grafik 3D segmentasi: batas jumlah titik per mode dan centroid dari pusat model"""
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import pytest
+
+from utils.clustering import SegmentModel, kmeans_clustering, update_clustering
+from utils.visualization import create_3d_cluster_plot
+
+def _rfm(n_customers=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'customer_id': [f'C{i}' for i in range(n_customers)],
+        'Recency': rng.integers(1, 365, n_customers),
+        'Frequency': rng.integers(1, 30, n_customers),
+        'Monetary': rng.gamma(2.0, 50000.0, n_customers)
+    })
+
+def _clustered(n_customers=3000):
+    return kmeans_clustering(_rfm(n_customers), 3, backend='minibatch')
+
+def _traces(figure):
+    fig = pio.from_json(figure)
+    points = sum(len(trace.x) for trace in fig.data if trace.name != 'Centroid')
+    centroids = [trace for trace in fig.data if trace.name == 'Centroid']
+    return points, centroids
+
+@pytest.mark.parametrize('mode', ['sample', 'density', 'auto'])
+@pytest.mark.parametrize('max_points', [50, 500, 2000])
+def test_point_count_within_cap(mode, max_points):
+    rfm_clustered, model = _clustered()
+    points, centroids = _traces(create_3d_cluster_plot(rfm_clustered, mode, max_points,
+                                                       SegmentModel.from_pipeline(model).centroids()))
+    assert 0 < points <= max_points
+    assert len(centroids) == 1
+    if mode == 'sample':
+        # Sampel bertingkat: setiap segmen tetap terlihat
+        fig = pio.from_json(create_3d_cluster_plot(rfm_clustered, mode, max_points))
+        assert {trace.name for trace in fig.data} >= set(rfm_clustered['Cluster_Label'])
+
+def test_full_mode_keeps_every_customer():
+    rfm_clustered, _ = _clustered(n_customers=400)
+    points, centroids = _traces(create_3d_cluster_plot(rfm_clustered, 'full', 50))
+    assert points == len(rfm_clustered)
+    assert centroids == []
+
+def test_centroids_are_model_centers():
+    _, model = _clustered()
+    base = SegmentModel.from_pipeline(model)
+    
+    # Setelah update dengan pelanggan identik, dua cluster tidak punya anggota
+    rfm = _rfm().iloc[[0, 0, 0]].assign(customer_id=['A', 'B', 'C'])
+    rfm_clustered, updated = update_clustering(base.to_pipeline(), rfm)
+    expected = SegmentModel.from_pipeline(updated).centroids()
+    
+    _, (centroids,) = _traces(create_3d_cluster_plot(rfm_clustered, 'sample', 100, expected))
+    assert len(centroids.x) == len(expected) == 3
+    np.testing.assert_allclose(centroids.x, expected['Recency'])
+    np.testing.assert_allclose(centroids.y, expected['Frequency'])
+    np.testing.assert_allclose(centroids.z, expected['Monetary'])
+    np.testing.assert_allclose(expected[['Recency', 'Frequency', 'Monetary']].values,
+                               updated.named_steps['scaler'].inverse_transform(
+                                   updated.named_steps['kmeans'].cluster_centers_))
@@ -1,11 +1,20 @@
 """
 Implementasi sederhana algoritma Apriori untuk Market Basket Analysis
+
+Rules dibentuk langsung dari frequent itemset (consequent tumbuh per level
+seperti ap-genrules, dipangkas saat confidence tidak terpenuhi). Dengan
+top_k dan/atau max_per_antecedent, hanya rules terbaik yang disimpan di heap
+berukuran terbatas, sehingga memori tidak bergantung pada jumlah kandidat rules.
 """
-from mlxtend.frequent_patterns import apriori, association_rules
-from mlxtend.preprocessing import TransactionEncoder
+import heapq
+from utils.frequent_itemsets import mine_frequent_itemsets, DEFAULT_ALGORITHM
 import pandas as pd
 
-def run_apriori(transactions, min_support=0.01, min_confidence=0.3):
+RULE_METRICS = ('lift', 'confidence', 'leverage')
+DEFAULT_RULE_METRIC = 'lift'
+
+def run_apriori(transactions, min_support=0.01, min_confidence=0.3, algorithm=DEFAULT_ALGORITHM, n_jobs=1,
+                max_len=None, top_k=None, metric=DEFAULT_RULE_METRIC, max_per_antecedent=None):
     """
     Menjalankan algoritma Apriori untuk Market Basket Analysis
     
@@ -13,6 +22,11 @@ def run_apriori(transactions, min_support=0.01, min_confidence=0.3):
         transactions: List of transactions [[item1, item2], [item3, item4], ...]
         min_support: Minimum support threshold (default 0.01)
         min_confidence: Minimum confidence threshold (default 0.3)
+        algorithm: Engine frequent itemset: 'eclat' (default), 'fpgrowth',
+            atau 'apriori' (one-hot dense, cara lama)
+        n_jobs: Jumlah proses mining terpartisi (1 = serial, None = jumlah core)
+        max_len: Jumlah produk maksimal per rule (antecedent + consequent)
+        top_k, metric, max_per_antecedent: Batas rules, lihat generate_rules
     
     Returns:
         DataFrame berisi association rules dengan kolom:
@@ -25,46 +39,150 @@ def run_apriori(transactions, min_support=0.01, min_confidence=0.3):
     if not transactions or len(transactions) == 0:
         return pd.DataFrame()
     
-    # Step 1: Encode transactions ke format binary matrix
-    te = TransactionEncoder()
-    te_ary = te.fit(transactions).transform(transactions)
-    df = pd.DataFrame(te_ary, columns=te.columns_)
+    # Step 1-2: Encode transaksi ke matriks sparse lalu generate frequent itemsets
+    frequent_itemsets = mine_frequent_itemsets(transactions, min_support, algorithm, max_len, n_jobs)
+    
+    return generate_rules(frequent_itemsets, min_confidence, top_k, metric, max_per_antecedent, max_len)
+
+def _iter_rules(supports, min_confidence, max_len=None):
+    """
+    Rules (antecedents, consequents, support, confidence, lift, leverage) dengan
+    confidence >= min_confidence dan lift > 1
     
-    # Step 2: Generate frequent itemsets menggunakan Apriori
-    frequent_itemsets = apriori(df, min_support=min_support, use_colnames=True)
+    Untuk setiap itemset I, consequent H ditumbuhkan per level: jika
+    I - H => H tidak memenuhi confidence, superset H juga tidak, sehingga
+    tidak perlu dicoba.
+    """
+    for itemset, support in supports.items():
+        if len(itemset) < 2 or (max_len is not None and len(itemset) > max_len):
+            continue
+        
+        # Consequent berupa tuple terurut agar kandidat bisa dibentuk seperti apriori-gen
+        consequents = [(item,) for item in sorted(itemset)]
+        while consequents:
+            passed = []
+            for consequent in consequents:
+                consequent_set = frozenset(consequent)
+                antecedent = itemset - consequent_set
+                confidence = support / supports[antecedent]
+                if confidence < min_confidence:
+                    continue
+                passed.append(consequent)
+                consequent_support = supports[consequent_set]
+                lift = confidence / consequent_support
+                if lift > 1.0:
+                    leverage = support - supports[antecedent] * consequent_support
+                    yield antecedent, consequent_set, support, confidence, lift, leverage
+            
+            # Kandidat level berikutnya: dua consequent lolos dengan prefix sama,
+            # semua subset-nya juga lolos, dan antecedent tidak kosong
+            if len(consequents[0]) + 1 >= len(itemset):
+                break
+            passed_set = set(passed)
+            consequents = []
+            for i, first in enumerate(passed):
+                for second in passed[i + 1:]:
+                    if first[:-1] != second[:-1]:
+                        break
+                    candidate = first + second[-1:]
+                    if all(candidate[:j] + candidate[j + 1:] in passed_set for j in range(len(candidate) - 2)):
+                        consequents.append(candidate)
+
+def generate_rules(frequent_itemsets, min_confidence=0.3, top_k=None, metric=DEFAULT_RULE_METRIC,
+                   max_per_antecedent=None, max_len=None):
+    """
+    Bentuk association rules dari frequent itemsets
+    
+    Args:
+        frequent_itemsets: DataFrame dengan kolom ['support', 'itemsets']
+        min_confidence: Minimum confidence threshold (default 0.3)
+        top_k: Jumlah rules terbaik yang diambil menurut metric (None = semua)
+        metric: Urutan pemilihan rules terbaik, salah satu RULE_METRICS
+        max_per_antecedent: Jumlah rules terbaik maksimal per antecedent (None = tanpa batas)
+        max_len: Jumlah produk maksimal per rule (None = tanpa batas)
+    
+    Returns:
+        DataFrame rules dengan format yang sama seperti run_apriori
+    """
+    if metric not in RULE_METRICS:
+        raise ValueError(f"Metric tidak dikenal: {metric}. Pilihan: {', '.join(RULE_METRICS)}")
     
     if frequent_itemsets.empty:
         return pd.DataFrame()
     
-    # Step 3: Generate association rules
-    rules = association_rules(
-        frequent_itemsets, 
-        metric="confidence", 
-        min_threshold=min_confidence
-    )
+    supports = dict(zip(frequent_itemsets['itemsets'], frequent_itemsets['support']))
+    rules = _iter_rules(supports, min_confidence, max_len)
+    
+    if top_k is not None or max_per_antecedent is not None:
+        rules = _select_rules(rules, top_k, metric, max_per_antecedent)
     
+    rules = pd.DataFrame(list(rules), columns=['antecedents', 'consequents', 'support', 'confidence', 'lift', 'leverage'])
     if rules.empty:
         return pd.DataFrame()
     
-    # Step 4: Filter rules dengan lift > 1 (positive association)
-    rules = rules[rules['lift'] > 1.0]
+    # Sort by confidence descending
+    rules = rules.sort_values('confidence', ascending=False, kind='stable')
     
-    # Step 5: Sort by confidence descending
-    rules = rules.sort_values('confidence', ascending=False)
+    return rules[['antecedents', 'consequents', 'support', 'confidence', 'lift']].reset_index(drop=True)
+
+def _select_rules(rules, top_k, metric, max_per_antecedent):
+    """
+    Ambil rules terbaik dengan min-heap berukuran tetap
+    
+    Tanpa max_per_antecedent memori dibatasi top_k. Dengan max_per_antecedent,
+    setiap antecedent punya heap sendiri (paling banyak max_per_antecedent
+    rules), lalu top_k diambil dari gabungannya.
+    """
+    column = {'confidence': 3, 'lift': 4, 'leverage': 5}[metric]
     
-    # Step 6: Select only required columns
-    result = rules[['antecedents', 'consequents', 'support', 'confidence', 'lift']].copy()
+    def push(heap, limit, entry):
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
     
-    return result
+    # Seri dipecah dengan confidence, lift, lalu urutan rule (yang lebih awal menang)
+    entries = (((rule[column], rule[3], rule[4], -number), rule) for number, rule in enumerate(rules))
+    
+    if max_per_antecedent is not None:
+        by_antecedent = {}
+        for entry in entries:
+            push(by_antecedent.setdefault(entry[1][0], []), max_per_antecedent, entry)
+        entries = (entry for heap in by_antecedent.values() for entry in heap)
+    
+    if top_k is not None:
+        heap = []
+        for entry in entries:
+            push(heap, top_k, entry)
+        entries = heap
+    
+    return [rule for _, rule in sorted(entries, key=lambda entry: entry[0], reverse=True)]
 
 def format_itemset(itemset):
     """
     Format frozenset to readable string
     
     Args:
-        itemset: frozenset of items
+        itemset: frozenset of items (string yang sudah diformat dikembalikan apa adanya)
     
     Returns:
         Comma-separated string
     """
+    if isinstance(itemset, str):
+        return itemset
     return ', '.join(list(itemset))
+
+def parse_itemset(text):
+    """
+    Kebalikan format_itemset: string dipisah koma menjadi frozenset
+    
+    Hanya untuk rules lama; nama produk yang memuat koma tidak bisa
+    dipulihkan (rules baru disimpan per item di tabel item_aturan).
+    
+    Args:
+        text: String seperti 'Produk A, Produk B'
+    
+    Returns:
+        frozenset item
+    """
+    return frozenset(item.strip() for item in text.split(',') if item.strip())
@@ -1,11 +1,36 @@
 """
 Implementasi sederhana RFM dan K-Means Clustering
+
+Backend clustering yang tersedia:
+- 'kmeans': KMeans penuh (Lloyd, n_init=10), hasil paling stabil (default)
+- 'minibatch': MiniBatchKMeans, jauh lebih cepat untuk pelanggan besar dan
+  bisa diperbarui inkremental dengan partial_fit (lihat update_clustering),
+  juga dari model tersimpan (SegmentModel.to_pipeline)
+
+Model hasil clustering bisa diekspor sebagai artefak JSON (SegmentModel)
+untuk menilai pelanggan baru tanpa clustering ulang.
 """
-from sklearn.cluster import KMeans
+import copy
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
 import pandas as pd
 from datetime import datetime
 
+RFM_COLUMNS = ['Recency', 'Frequency', 'Monetary']
+DEFAULT_BACKEND = 'kmeans'
+MINIBATCH_SIZE = 4096  # Ukuran mini-batch; lebih besar = lebih akurat, lebih lambat
+SILHOUETTE_SAMPLE = 5000  # Silhouette O(n^2), jadi dihitung pada sampel pelanggan
+SWEEP_PARALLEL_MIN_ROWS = 20000  # Di bawah ini biaya start process pool lebih besar dari fitting
+
 def calculate_rfm(transactions_df, current_date=None):
     """
     Menghitung nilai RFM untuk setiap pelanggan
@@ -17,62 +42,349 @@ def calculate_rfm(transactions_df, current_date=None):
     Returns:
         DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary']
     """
-    if current_date is None:
-        current_date = datetime.now()
-    
     # Convert date column to datetime jika belum
     transactions_df['date'] = pd.to_datetime(transactions_df['date'])
     
-    # Hitung RFM
-    rfm = transactions_df.groupby('customer_id').agg({
-        'date': lambda x: (current_date - x.max()).days,  # Recency: hari sejak transaksi terakhir
-        'transaction_id': 'nunique',                       # Frequency: jumlah transaksi unik
-        'total': 'sum'                                     # Monetary: total pembelian
-    })
-    
-    # Rename columns
-    rfm.columns = ['Recency', 'Frequency', 'Monetary']
+    # Hitung agregat per pelanggan
+    summary = transactions_df.groupby('customer_id', observed=True).agg(
+        last_date=('date', 'max'),               # Tanggal transaksi terakhir
+        Frequency=('transaction_id', 'nunique'), # Frequency: jumlah transaksi unik
+        Monetary=('total', 'sum')                # Monetary: total pembelian
+    )
     
     # Reset index untuk customer_id jadi kolom
-    rfm = rfm.reset_index()
+    summary = summary.reset_index()
+    
+    return rfm_from_summary(summary, current_date)
+
+def rfm_from_summary(summary_df, current_date=None):
+    """
+    Menghitung nilai RFM dari agregat per pelanggan
+    
+    Args:
+        summary_df: DataFrame dengan kolom ['customer_id', 'last_date', 'Frequency', 'Monetary']
+        current_date: Tanggal referensi untuk hitung recency (default: today)
+    
+    Returns:
+        DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary']
+    """
+    if current_date is None:
+        current_date = datetime.now()
+    
+    # Recency: hari sejak transaksi terakhir
+    recency = (pd.Timestamp(current_date) - pd.to_datetime(summary_df['last_date'], format='ISO8601')).dt.days
     
-    return rfm
+    return pd.DataFrame({
+        'customer_id': summary_df['customer_id'].astype(object).values,
+        'Recency': recency.values,
+        'Frequency': summary_df['Frequency'].values,
+        'Monetary': summary_df['Monetary'].values
+    })
+
+def _kmeans(n_clusters):
+    return KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+
+def _minibatch(n_clusters):
+    return MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3,
+                           batch_size=MINIBATCH_SIZE, max_no_improvement=10)
 
-def kmeans_clustering(rfm_df, n_clusters=3):
+CLUSTERING_BACKENDS = {
+    'kmeans': _kmeans,
+    'minibatch': _minibatch
+}
+
+def kmeans_clustering(rfm_df, n_clusters=3, backend=DEFAULT_BACKEND, n_threads=None):
     """
     Melakukan K-Means clustering pada data RFM
     
     Args:
         rfm_df: DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary']
         n_clusters: Jumlah cluster (default 3)
+        backend: Salah satu CLUSTERING_BACKENDS
+        n_threads: Batas thread OpenMP/BLAS selama fitting (None = semua core)
     
     Returns:
-        Tuple (rfm_clustered_df, kmeans_model)
+        Tuple (rfm_clustered_df, model)
         - rfm_clustered_df: DataFrame dengan tambahan kolom 'Cluster' dan 'Cluster_Label'
-        - kmeans_model: Model K-Means yang sudah difit
+        - model: Pipeline (StandardScaler + K-Means) yang sudah difit
     """
-    # Copy dataframe
-    rfm_result = rfm_df.copy()
+    if backend not in CLUSTERING_BACKENDS:
+        raise ValueError(f"Backend clustering tidak dikenal: {backend}. Pilihan: {', '.join(CLUSTERING_BACKENDS)}")
+    
+    # Step 1: Normalisasi data menggunakan StandardScaler, lalu Step 2: K-Means
+    model = Pipeline([
+        ('scaler', StandardScaler()),
+        ('kmeans', CLUSTERING_BACKENDS[backend](n_clusters))
+    ])
+    with threadpool_limits(limits=n_threads):
+        clusters = model.fit_predict(rfm_df[RFM_COLUMNS].values)
+    
+    return _label_clusters(rfm_df, clusters, model), model
+
+def update_clustering(model, rfm_df, n_threads=None):
+    """
+    Perbarui model MiniBatchKMeans dengan data RFM terbaru tanpa fitting ulang
+    
+    Scaler lama tetap dipakai agar pusat cluster berada di ruang yang sama;
+    pusat cluster digeser dengan partial_fit per mini-batch, lalu semua
+    pelanggan di-assign ulang.
+    
+    Args:
+        model: Pipeline hasil kmeans_clustering(backend='minibatch') atau
+            SegmentModel.to_pipeline()
+        rfm_df: DataFrame RFM terbaru (pelanggan lama dan baru)
+        n_threads: Batas thread OpenMP/BLAS
+    
+    Returns:
+        Tuple (rfm_clustered_df, model baru); model lama tidak diubah
+    """
+    if not isinstance(model.named_steps['kmeans'], MiniBatchKMeans):
+        raise ValueError('Update inkremental hanya tersedia untuk backend minibatch')
+    
+    model = copy.deepcopy(model)
+    estimator = model.named_steps['kmeans']
     
-    # Ambil hanya kolom RFM untuk clustering
-    rfm_values = rfm_df[['Recency', 'Frequency', 'Monetary']].values
+    with threadpool_limits(limits=n_threads):
+        scaled = model.named_steps['scaler'].transform(rfm_df[RFM_COLUMNS].values)
+        for start in range(0, len(scaled), MINIBATCH_SIZE):
+            estimator.partial_fit(scaled[start:start + MINIBATCH_SIZE])
+        clusters = estimator.predict(scaled)
     
-    # Step 1: Normalisasi data menggunakan StandardScaler
-    scaler = StandardScaler()
-    rfm_scaled = scaler.fit_transform(rfm_values)
+    return _label_clusters(rfm_df, clusters, model), model
+
+def sweep_k(rfm_df, k_values=range(2, 11), backend=DEFAULT_BACKEND, n_jobs=None, on_result=None):
+    """
+    Fit beberapa nilai K sekaligus untuk memilih jumlah cluster
     
-    # Step 2: K-Means clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    clusters = kmeans.fit_predict(rfm_scaled)
+    Data RFM dinormalisasi sekali lalu dipakai semua fit. Jika n_jobs > 1 dan
+    data cukup besar, setiap K difit di process pool terpisah; matriks
+    ternormalisasi dibagikan lewat file .npy yang di-memory-map oleh worker,
+    bukan dikirim ulang per K.
     
+    Args:
+        rfm_df: DataFrame dengan kolom ['Recency', 'Frequency', 'Monetary']
+        k_values: Nilai K yang dicoba (masing-masing >= 2 dan < jumlah pelanggan)
+        backend: Salah satu CLUSTERING_BACKENDS
+        n_jobs: Jumlah proses (None = jumlah core)
+        on_result: Callback opsional (k, selesai, total) setiap satu K selesai
+    
+    Returns:
+        Dictionary dengan key:
+        - k_values, inertia, silhouette: list per K (urut K)
+        - elbow_k: K pada titik siku kurva inertia
+        - recommended_k: K dengan silhouette tertinggi
+    """
+    if backend not in CLUSTERING_BACKENDS:
+        raise ValueError(f"Backend clustering tidak dikenal: {backend}. Pilihan: {', '.join(CLUSTERING_BACKENDS)}")
+    
+    k_values = sorted(set(k_values))
+    scaled = StandardScaler().fit_transform(rfm_df[RFM_COLUMNS].values)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(k_values))
+    
+    results = {}
+    def collect(k, scores):
+        results[k] = scores
+        if on_result is not None:
+            on_result(k, len(results), len(k_values))
+    
+    if n_jobs <= 1 or len(scaled) < SWEEP_PARALLEL_MIN_ROWS:
+        for k in k_values:
+            collect(k, _score_k(scaled, k, backend))
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='natura_sweep_')
+        try:
+            matrix_path = os.path.join(temp_dir, 'rfm_scaled.npy')
+            np.save(matrix_path, scaled)
+            
+            # spawn: aman dipanggil dari worker job maupun server web
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_sweep_worker, initargs=(matrix_path,)) as executor:
+                futures = {executor.submit(_score_k_worker, k, backend): k for k in k_values}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    inertia = [results[k][0] for k in k_values]
+    silhouette = [results[k][1] for k in k_values]
+    return {
+        'k_values': k_values,
+        'inertia': inertia,
+        'silhouette': silhouette,
+        'elbow_k': _elbow_k(k_values, inertia),
+        'recommended_k': k_values[int(np.argmax(silhouette))]
+    }
+
+def _score_k(scaled, k, backend, n_threads=None):
+    """Inertia dan silhouette (sampel) satu nilai K"""
+    with threadpool_limits(limits=n_threads):
+        estimator = CLUSTERING_BACKENDS[backend](k)
+        labels = estimator.fit_predict(scaled)
+        # random_state tetap: semua K dinilai pada sampel pelanggan yang sama
+        sample_size = min(SILHOUETTE_SAMPLE, len(scaled))
+        silhouette = silhouette_score(scaled, labels, sample_size=sample_size, random_state=42)
+    return float(estimator.inertia_), float(silhouette)
+
+_sweep_matrix = None
+
+def _init_sweep_worker(matrix_path):
+    global _sweep_matrix
+    _sweep_matrix = np.load(matrix_path, mmap_mode='r')
+
+def _score_k_worker(k, backend):
+    # Satu thread per proses agar proses paralel tidak berebut core
+    return _score_k(_sweep_matrix, k, backend, n_threads=1)
+
+def _elbow_k(k_values, inertia):
+    """K dengan jarak terjauh dari garis lurus antara titik inertia pertama dan terakhir"""
+    if len(k_values) < 3:
+        return k_values[0]
+    
+    # Normalisasi kedua sumbu ke 0..1 agar skala inertia tidak mendominasi
+    x = (np.array(k_values) - k_values[0]) / (k_values[-1] - k_values[0])
+    y = np.array(inertia)
+    y = (y - y.min()) / ((y.max() - y.min()) or 1)
+    distance = np.abs((y[-1] - y[0]) * x - (x[-1] - x[0]) * y + x[-1] * y[0] - y[-1] * x[0])
+    return k_values[int(np.argmax(distance))]
+
+def cluster_centers(model):
+    """Pusat cluster Pipeline (StandardScaler + K-Means) pada skala RFM asli, baris ke-i = cluster i"""
+    return model.named_steps['scaler'].inverse_transform(model.named_steps['kmeans'].cluster_centers_)
+
+def _label_clusters(rfm_df, clusters, model):
+    """Salin rfm_df dengan kolom Cluster dan Cluster_Label"""
     # Step 3: Tambahkan cluster ke dataframe
+    rfm_result = rfm_df.copy()
     rfm_result['Cluster'] = clusters
     
-    # Step 4: Label cluster berdasarkan karakteristik RFM
-    cluster_labels = assign_cluster_labels(rfm_result, n_clusters)
+    # Step 4: Label cluster berdasarkan karakteristik RFM pusat cluster
+    # (pusat hasil partial_fit bisa tidak punya anggota, tetapi tetap diberi label)
+    cluster_labels = label_centers(cluster_centers(model))
     rfm_result['Cluster_Label'] = rfm_result['Cluster'].map(cluster_labels)
     
-    return rfm_result, kmeans
+    return rfm_result
+
+class SegmentModel:
+    """
+    Model segmentasi siap pakai: StandardScaler + pusat K-Means + label segmen
+    
+    Disimpan sebagai artefak JSON berisi array biasa (bukan pickle), sehingga
+    aman dimuat dan tidak bergantung versi scikit-learn. Penilaian cukup
+    normalisasi lalu mencari pusat terdekat, tanpa overhead validasi sklearn.
+    """
+    ARTIFACT_VERSION = 1
+    
+    def __init__(self, mean, scale, centers, labels):
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        # Pusat cluster dalam ruang ternormalisasi, baris ke-i = cluster i
+        self.centers = np.asarray(centers, dtype=float)
+        self.labels = {int(cluster): label for cluster, label in labels.items()}
+        self._center_rows = [tuple(row) for row in self.centers.tolist()]
+    
+    @classmethod
+    def from_pipeline(cls, model):
+        """
+        Buat dari model hasil kmeans_clustering / update_clustering
+        
+        Label diambil dari semua pusat cluster dengan aturan yang sama seperti
+        kolom Cluster_Label hasil clustering, termasuk cluster tanpa anggota.
+        
+        Args:
+            model: Pipeline (StandardScaler + K-Means) yang sudah difit
+        """
+        scaler = model.named_steps['scaler']
+        labels = label_centers(cluster_centers(model))
+        return cls(scaler.mean_, scaler.scale_, model.named_steps['kmeans'].cluster_centers_, labels)
+    
+    def to_pipeline(self):
+        """
+        Pipeline StandardScaler + MiniBatchKMeans yang dimulai dari model ini
+        
+        Scaler memakai mean/scale tersimpan, dan MiniBatchKMeans (belum difit)
+        memakai pusat cluster model ini sebagai init, sehingga update_clustering
+        melanjutkan dari pusat yang sama dengan nomor cluster yang sama.
+        """
+        scaler = StandardScaler()
+        scaler.mean_ = self.mean.copy()
+        scaler.scale_ = self.scale.copy()
+        scaler.var_ = self.scale ** 2
+        scaler.n_features_in_ = len(self.mean)
+        scaler.n_samples_seen_ = 0
+        
+        estimator = MiniBatchKMeans(n_clusters=len(self.centers), init=self.centers.copy(), n_init=1,
+                                    random_state=42, batch_size=MINIBATCH_SIZE)
+        return Pipeline([('scaler', scaler), ('kmeans', estimator)])
+    
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Muat dari dictionary hasil to_artifact()"""
+        if artifact.get('version') != cls.ARTIFACT_VERSION:
+            raise ValueError(f"Versi artefak model tidak didukung: {artifact.get('version')}")
+        return cls(artifact['mean'], artifact['scale'], artifact['centers'], artifact['labels'])
+    
+    def to_artifact(self):
+        """Dictionary yang bisa disimpan sebagai JSON"""
+        return {
+            'version': self.ARTIFACT_VERSION,
+            'features': RFM_COLUMNS,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'centers': self.centers.tolist(),
+            'labels': {str(cluster): label for cluster, label in self.labels.items()}
+        }
+    
+    def centroids(self):
+        """
+        Pusat cluster pada skala RFM asli
+        
+        Returns:
+            DataFrame dengan kolom ['Cluster', 'Cluster_Label', 'Recency', 'Frequency', 'Monetary'],
+            satu baris per cluster (termasuk cluster tanpa anggota)
+        """
+        centroids = pd.DataFrame(self.centers * self.scale + self.mean, columns=RFM_COLUMNS)
+        centroids.insert(0, 'Cluster', range(len(self.centers)))
+        centroids.insert(1, 'Cluster_Label', [self.labels.get(cluster) for cluster in range(len(self.centers))])
+        return centroids
+    
+    def score(self, recency, frequency, monetary):
+        """
+        Segmen satu pelanggan
+        
+        Returns:
+            Tuple (cluster, cluster_label)
+        """
+        r = (recency - self.mean[0]) / self.scale[0]
+        f = (frequency - self.mean[1]) / self.scale[1]
+        m = (monetary - self.mean[2]) / self.scale[2]
+        
+        # Python murni: untuk satu baris lebih cepat daripada membuat array NumPy
+        best, best_distance = 0, float('inf')
+        for cluster, (cr, cf, cm) in enumerate(self._center_rows):
+            distance = (r - cr) ** 2 + (f - cf) ** 2 + (m - cm) ** 2
+            if distance < best_distance:
+                best, best_distance = cluster, distance
+        return best, self.labels.get(best)
+    
+    def score_batch(self, rfm_df):
+        """
+        Segmen banyak pelanggan sekaligus
+        
+        Args:
+            rfm_df: DataFrame dengan kolom ['Recency', 'Frequency', 'Monetary']
+        
+        Returns:
+            Salinan rfm_df dengan tambahan kolom 'Cluster' dan 'Cluster_Label'
+        """
+        scaled = (rfm_df[RFM_COLUMNS].to_numpy(dtype=float) - self.mean) / self.scale
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2; |x|^2 sama untuk semua pusat sehingga bisa diabaikan
+        distances = (self.centers ** 2).sum(axis=1) - 2 * scaled @ self.centers.T
+        clusters = distances.argmin(axis=1)
+        
+        result = rfm_df.copy()
+        result['Cluster'] = clusters
+        result['Cluster_Label'] = [self.labels.get(cluster) for cluster in clusters.tolist()]
+        return result
 
 def assign_cluster_labels(rfm_df, n_clusters):
     """
@@ -90,8 +402,25 @@ def assign_cluster_labels(rfm_df, n_clusters):
     Returns:
         Dictionary mapping cluster number to label
     """
-    # Hitung rata-rata RFM per cluster
+    # Hitung rata-rata RFM per cluster; cluster tanpa anggota diurutkan terakhir
     cluster_means = rfm_df.groupby('Cluster')[['Recency', 'Frequency', 'Monetary']].mean()
+    return _rank_clusters(cluster_means.reindex(range(n_clusters)), n_clusters)
+
+def label_centers(centers):
+    """
+    Label setiap cluster dari pusat cluster-nya (skala RFM asli)
+    
+    Args:
+        centers: Array (n_clusters, 3) kolom Recency, Frequency, Monetary
+    
+    Returns:
+        Dictionary mapping cluster number to label
+    """
+    return _rank_clusters(pd.DataFrame(centers, columns=['Recency', 'Frequency', 'Monetary']), len(centers))
+
+def _rank_clusters(cluster_means, n_clusters):
+    """Label cluster dari RFM per cluster (index = nomor cluster)"""
+    cluster_means = cluster_means.copy()
     
     # Hitung score untuk setiap cluster
     # Score tinggi = pelanggan bagus
@@ -0,0 +1,428 @@
+"""
+Engine frequent itemset dengan representasi sparse
+
+Transaksi di-encode sekali menjadi matriks CSR (transaksi x produk) tanpa
+membuat one-hot DataFrame dense, baik dari list nama produk
+(encode_transactions) maupun langsung dari kode integer kamus produk
+(encode_codes). Algoritma yang tersedia:
+- 'eclat': Eclat dengan tid-list berupa bitset per produk (default)
+- 'fpgrowth': FP-Growth (mlxtend) di atas sparse DataFrame
+- 'apriori': Apriori mlxtend dengan one-hot dense (cara lama, untuk pembanding)
+
+Semua engine mengembalikan DataFrame berkolom ['support', 'itemsets'] dengan
+format yang sama seperti mlxtend, sehingga bisa langsung dipakai oleh
+association_rules.
+
+Dengan n_jobs > 1, engine mana pun dijalankan secara terpartisi (SON):
+setiap proses menambang satu partisi transaksi, lalu gabungan kandidatnya
+dihitung ulang pada seluruh transaksi. Matriks CSR dibagikan ke proses
+lewat shared memory, sehingga hasilnya sama persis dengan mining serial.
+"""
+import math
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+DEFAULT_ALGORITHM = 'eclat'
+PARALLEL_MIN_TRANSACTIONS = 200000  # Di bawah ini biaya start process pool lebih besar dari mining
+
+def encode_transactions(transactions):
+    """
+    Encode list transaksi menjadi matriks CSR boolean
+    
+    Args:
+        transactions: List of transactions [[item1, item2], [item3, item4], ...]
+    
+    Returns:
+        Tuple (matrix, items)
+        - matrix: scipy.sparse.csr_matrix bool (n_transaksi x n_produk)
+        - items: Array nama produk sesuai urutan kolom (terurut)
+    """
+    lengths = np.fromiter((len(t) for t in transactions), dtype=np.int64, count=len(transactions))
+    flat = [item for t in transactions for item in t]
+    
+    codes, items = pd.factorize(pd.Series(flat, dtype=object), sort=True)
+    rows = np.repeat(np.arange(len(transactions)), lengths)
+    
+    # Produk ganda dalam satu transaksi cukup dihitung sekali
+    matrix = csr_matrix(
+        (np.ones(len(codes), dtype=bool), (rows, codes)),
+        shape=(len(transactions), len(items))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = True
+    
+    return matrix, np.asarray(items, dtype=object)
+
+def encode_codes(transaction_keys, item_codes, item_names):
+    """
+    Encode pasangan (transaksi, kode produk) menjadi matriks CSR boolean
+    
+    Setara dengan encode_transactions, tetapi bekerja langsung pada kode
+    integer kamus produk sehingga tidak perlu membuat list nama per transaksi.
+    
+    Args:
+        transaction_keys: Array kunci transaksi per baris
+        item_codes: Array kode produk (integer) per baris
+        item_names: Array nama produk dengan index = kode produk
+    
+    Returns:
+        Tuple (matrix, items) seperti encode_transactions (kolom terurut nama)
+    """
+    rows, transaction_index = pd.factorize(transaction_keys)
+    used, columns = np.unique(item_codes, return_inverse=True)
+    
+    # Urutkan kolom berdasarkan nama produk, sama seperti encode_transactions
+    items = np.asarray(item_names[used], dtype=object)
+    order = np.argsort(items, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    
+    matrix = csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, rank[columns])),
+        shape=(len(transaction_index), len(items))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = True
+    
+    return matrix, items[order]
+
+def min_support_count(min_support, n_transactions):
+    """Jumlah transaksi minimal agar itemset memenuhi min_support"""
+    # Toleransi kecil agar mis. 0.01 * 3000 (= 30.000000000000004) tetap 30
+    return max(1, math.ceil(min_support * n_transactions - 1e-9))
+
+def _to_frame(itemset_counts, items, n_transactions):
+    """Ubah list (tuple kode produk, count) menjadi DataFrame format mlxtend"""
+    if not itemset_counts:
+        return pd.DataFrame(columns=['support', 'itemsets'])
+    
+    return pd.DataFrame({
+        'support': [count / n_transactions for _, count in itemset_counts],
+        'itemsets': [frozenset(items[list(codes)]) for codes, _ in itemset_counts]
+    })
+
+def _mine_apriori(matrix, items, min_support, max_len):
+    from mlxtend.frequent_patterns import apriori
+    
+    dense = pd.DataFrame(matrix.toarray(), columns=items)
+    return apriori(dense, min_support=min_support, use_colnames=True, max_len=max_len)
+
+def _mine_fpgrowth(matrix, items, min_support, max_len):
+    from mlxtend.frequent_patterns import fpgrowth
+    
+    with warnings.catch_warnings():
+        # pandas memperingatkan fill_value 0 untuk SparseDtype bool; nilainya tetap False
+        warnings.simplefilter('ignore', FutureWarning)
+        sparse_df = pd.DataFrame.sparse.from_spmatrix(matrix, columns=items)
+    return fpgrowth(sparse_df, min_support=min_support, use_colnames=True, max_len=max_len)
+
+def build_item_bitsets(matrix, item_codes):
+    """
+    Buat tid-list bitset (int Python) untuk produk tertentu
+    
+    Bit ke-i bernilai 1 jika transaksi ke-i mengandung produk tersebut.
+    
+    Args:
+        matrix: Matriks CSR hasil encode_transactions
+        item_codes: Kode kolom produk yang dibuatkan bitset
+    
+    Returns:
+        Dictionary kode produk -> bitset
+    """
+    csc = matrix.tocsc()
+    n_bytes = (matrix.shape[0] + 7) // 8
+    bitsets = {}
+    
+    for code in item_codes:
+        tids = csc.indices[csc.indptr[code]:csc.indptr[code + 1]]
+        buffer = np.zeros(n_bytes, dtype=np.uint8)
+        np.bitwise_or.at(buffer, tids >> 3, (1 << (tids & 7)).astype(np.uint8))
+        bitsets[code] = int.from_bytes(buffer.tobytes(), 'little')
+    
+    return bitsets
+
+def _mine_eclat(matrix, items, min_support, max_len):
+    n_transactions = matrix.shape[0]
+    min_count = min_support_count(min_support, n_transactions)
+    
+    # Hanya produk yang frequent yang dibuatkan bitset
+    item_counts = np.bincount(matrix.indices, minlength=len(items))
+    frequent = [int(code) for code in np.flatnonzero(item_counts >= min_count)]
+    bitsets = build_item_bitsets(matrix, frequent)
+    
+    results = []
+    # Stack DFS: (prefix, kandidat ekstensi [(kode, bitset prefix + kode)])
+    stack = [((), [(code, bitsets[code]) for code in frequent])]
+    
+    while stack:
+        prefix, candidates = stack.pop()
+        for i, (code, bitset) in enumerate(candidates):
+            itemset = prefix + (code,)
+            results.append((itemset, bitset.bit_count()))
+            
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            
+            extensions = []
+            for other_code, other_bitset in candidates[i + 1:]:
+                joined = bitset & other_bitset
+                if joined.bit_count() >= min_count:
+                    extensions.append((other_code, joined))
+            
+            if extensions:
+                stack.append((itemset, extensions))
+    
+    return _to_frame(results, items, n_transactions)
+
+def count_itemsets(transactions, itemsets):
+    """
+    Hitung jumlah transaksi yang memuat setiap itemset
+    
+    Args:
+        transactions: List of transactions [[item1, item2], ...]
+        itemsets: List itemset (iterable nama produk)
+    
+    Returns:
+        List count dengan urutan sama seperti itemsets
+    """
+    if not transactions or not itemsets:
+        return [0] * len(itemsets)
+    
+    matrix, items = encode_transactions(transactions)
+    codes = {item: code for code, item in enumerate(items)}
+    bitsets = build_item_bitsets(matrix, range(len(items)))
+    all_transactions = (1 << len(transactions)) - 1
+    
+    counts = []
+    for itemset in itemsets:
+        bitset = all_transactions
+        for item in itemset:
+            code = codes.get(item)
+            if code is None:
+                bitset = 0
+                break
+            bitset &= bitsets[code]
+        counts.append(bitset.bit_count())
+    
+    return counts
+
+def negative_border(matrix, frequent, max_len=None):
+    """
+    Negative border kumpulan itemset frequent beserta count-nya
+    
+    Negative border adalah itemset yang tidak frequent tetapi semua subset-nya
+    frequent, termasuk produk tunggal yang tidak frequent. Setiap itemset di
+    luar frequent dan negative border memuat salah satu itemset border (subset
+    minimalnya yang tidak frequent), sehingga count-nya tidak melebihi count
+    itemset border tersebut.
+    
+    Args:
+        matrix: Matriks CSR bool (n_transaksi x n_produk)
+        frequent: Iterable tuple kode kolom itemset frequent (tertutup ke bawah)
+        max_len: Panjang itemset maksimal saat mining (None = tanpa batas);
+            kandidat yang lebih panjang tidak dihitung
+    
+    Returns:
+        List (tuple kode kolom terurut naik, count)
+    """
+    frequent = {tuple(sorted(itemset)) for itemset in frequent}
+    item_counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    border = [((code,), int(item_counts[code])) for code in range(matrix.shape[1]) if (code,) not in frequent]
+    
+    # Kandidat panjang k+1 = dua itemset frequent panjang k dengan prefix sama (apriori-gen)
+    extensions = {}
+    for itemset in frequent:
+        extensions.setdefault(itemset[:-1], []).append(itemset[-1])
+    bitsets = build_item_bitsets(matrix, sorted({code for itemset in frequent for code in itemset}))
+    
+    for prefix, codes in extensions.items():
+        if max_len is not None and len(prefix) + 2 > max_len:
+            continue
+        
+        codes.sort()
+        prefix_bitset = (1 << matrix.shape[0]) - 1
+        for code in prefix:
+            prefix_bitset &= bitsets[code]
+        
+        for i, code in enumerate(codes):
+            bitset = prefix_bitset & bitsets[code]
+            for other_code in codes[i + 1:]:
+                candidate = prefix + (code, other_code)
+                if candidate in frequent:
+                    continue
+                # Subset tanpa salah satu produk prefix juga harus frequent
+                if any(candidate[:j] + candidate[j + 1:] not in frequent for j in range(len(prefix))):
+                    continue
+                border.append((candidate, (bitset & bitsets[other_code]).bit_count()))
+    
+    return border
+
+ALGORITHMS = {
+    'fpgrowth': _mine_fpgrowth,
+    'eclat': _mine_eclat,
+    'apriori': _mine_apriori
+}
+
+def mine_frequent_itemsets(transactions, min_support=0.01, algorithm=DEFAULT_ALGORITHM, max_len=None, n_jobs=1):
+    """
+    Cari frequent itemset dengan engine yang dipilih
+    
+    Args:
+        transactions: List of transactions [[item1, item2], ...]
+        min_support: Minimum support threshold
+        algorithm: 'fpgrowth', 'eclat', atau 'apriori'
+        max_len: Panjang itemset maksimal (None = tanpa batas)
+        n_jobs: Jumlah proses mining terpartisi (1 = serial, None = jumlah core)
+    
+    Returns:
+        DataFrame dengan kolom ['support', 'itemsets'] (itemsets berupa frozenset)
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritma tidak dikenal: {algorithm}. Pilihan: {', '.join(ALGORITHMS)}")
+    
+    if not transactions:
+        return pd.DataFrame(columns=['support', 'itemsets'])
+    
+    matrix, items = encode_transactions(transactions)
+    return mine_encoded_itemsets(matrix, items, min_support, algorithm, max_len, n_jobs)
+
+def mine_encoded_itemsets(matrix, items, min_support=0.01, algorithm=DEFAULT_ALGORITHM, max_len=None, n_jobs=1):
+    """
+    Cari frequent itemset dari matriks hasil encode_transactions/encode_codes
+    
+    Args:
+        matrix: Matriks CSR bool (n_transaksi x n_produk)
+        items: Array nama produk sesuai urutan kolom
+        min_support: Minimum support threshold
+        algorithm: 'fpgrowth', 'eclat', atau 'apriori'
+        max_len: Panjang itemset maksimal (None = tanpa batas)
+        n_jobs: Jumlah proses mining terpartisi (1 = serial, None = jumlah core)
+    
+    Returns:
+        DataFrame dengan kolom ['support', 'itemsets'] (itemsets berupa frozenset)
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritma tidak dikenal: {algorithm}. Pilihan: {', '.join(ALGORITHMS)}")
+    
+    if matrix.shape[0] == 0:
+        return pd.DataFrame(columns=['support', 'itemsets'])
+    
+    n_jobs = min(n_jobs or os.cpu_count() or 1, matrix.shape[0])
+    if n_jobs > 1 and matrix.shape[0] >= PARALLEL_MIN_TRANSACTIONS:
+        return _mine_partitioned(matrix, items, min_support, algorithm, max_len, n_jobs)
+    return ALGORITHMS[algorithm](matrix, items, min_support, max_len)
+
+def count_encoded_itemsets(matrix, itemsets):
+    """
+    Hitung jumlah transaksi yang memuat setiap itemset (tuple kode kolom)
+    
+    Itemset ditelusuri urut leksikografis sehingga bitset prefix dipakai
+    ulang dan hanya satu jalur prefix yang disimpan di memori.
+    
+    Args:
+        matrix: Matriks CSR bool (n_transaksi x n_produk)
+        itemsets: List tuple kode kolom yang terurut naik
+    
+    Returns:
+        List count dengan urutan sama seperti itemsets
+    """
+    bitsets = build_item_bitsets(matrix, sorted({code for itemset in itemsets for code in itemset}))
+    counts = [0] * len(itemsets)
+    stack = [((), (1 << matrix.shape[0]) - 1)]
+    
+    for i in sorted(range(len(itemsets)), key=itemsets.__getitem__):
+        itemset = itemsets[i]
+        # Buang prefix di stack yang bukan prefix itemset ini
+        while len(stack[-1][0]) >= len(itemset) or itemset[:len(stack[-1][0])] != stack[-1][0]:
+            stack.pop()
+        
+        prefix, bitset = stack[-1]
+        for code in itemset[len(prefix):]:
+            prefix = prefix + (code,)
+            bitset &= bitsets[code]
+            stack.append((prefix, bitset))
+        counts[i] = bitset.bit_count()
+    
+    return counts
+
+def _mine_partitioned(matrix, items, min_support, algorithm, max_len, n_jobs):
+    """
+    Mining SON: kandidat dari setiap partisi, lalu count global per partisi
+    
+    Itemset yang frequent secara global pasti frequent (dengan min_support
+    yang sama) di minimal satu partisi, sehingga gabungan itemset frequent
+    lokal memuat semua hasil; count global lalu menyaring sisanya.
+    """
+    n_transactions = matrix.shape[0]
+    bounds = np.linspace(0, n_transactions, n_jobs + 1).astype(np.int64)
+    partitions = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+    
+    blocks = []
+    try:
+        # indptr dan indices CSR disalin sekali ke shared memory, bukan dikirim per tugas
+        arrays = {}
+        for name in ('indptr', 'indices'):
+            array = getattr(matrix, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            arrays[name] = (block.name, array.dtype.str, array.shape)
+        
+        # spawn: aman dipanggil dari worker job maupun server web
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_partition_worker, initargs=(arrays, matrix.shape[1], items)) as executor:
+            futures = [executor.submit(_mine_partition_worker, start, stop, min_support, algorithm, max_len)
+                       for start, stop in partitions]
+            candidates = set()
+            for future in futures:
+                candidates.update(future.result())
+            
+            candidates = sorted(candidates)
+            futures = [executor.submit(_count_partition_worker, start, stop, candidates)
+                       for start, stop in partitions]
+            counts = np.zeros(len(candidates), dtype=np.int64)
+            for future in futures:
+                counts += future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    
+    min_count = min_support_count(min_support, n_transactions)
+    results = [(itemset, int(count)) for itemset, count in zip(candidates, counts) if count >= min_count]
+    return _to_frame(results, items, n_transactions)
+
+_partition_state = None
+
+def _init_partition_worker(arrays, n_items, items):
+    global _partition_state
+    blocks, views = [], {}
+    for name, (block_name, dtype, shape) in arrays.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        views[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _partition_state = (blocks, views['indptr'], views['indices'], n_items, items)
+
+def _partition_rows(start, stop):
+    """Matriks CSR baris start..stop dari shared memory (indices tidak disalin)"""
+    _, indptr, indices, n_items, _ = _partition_state
+    begin, end = indptr[start], indptr[stop]
+    return csr_matrix(
+        (np.ones(end - begin, dtype=bool), indices[begin:end], indptr[start:stop + 1] - begin),
+        shape=(stop - start, n_items)
+    )
+
+def _mine_partition_worker(start, stop, min_support, algorithm, max_len):
+    items = _partition_state[4]
+    local = ALGORITHMS[algorithm](_partition_rows(start, stop), items, min_support, max_len)
+    code_of = {item: code for code, item in enumerate(items)}
+    return [tuple(sorted(code_of[item] for item in itemset)) for itemset in local['itemsets']]
+
+def _count_partition_worker(start, stop, candidates):
+    return count_encoded_itemsets(_partition_rows(start, stop), candidates)
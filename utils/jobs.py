@@ -0,0 +1,202 @@
+"""
+Job runner lokal untuk analisis yang berat (MBA, segmentasi)
+
+Job dijalankan di process pool (tanpa broker eksternal), sehingga request
+web langsung mendapat job id dan halaman cukup melakukan polling status.
+Status, progres, dan hasil job disimpan lewat store (lihat
+controllers/job_controller), sehingga polling boleh dilayani proses web mana
+pun. Job dengan jenis, parameter, dan fingerprint data yang sama digabung
+menjadi satu job selama job tersebut belum selesai.
+"""
+import hashlib
+import json
+import queue
+import threading
+import traceback
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+# Diisi di proses worker (lihat _init_worker)
+_progress_queue = None
+_current_job_id = None
+
+def report_progress(percent, message=''):
+    """
+    Laporkan progres job yang sedang berjalan
+    
+    Aman dipanggil di luar job (tidak melakukan apa-apa), sehingga fungsi
+    analisis tetap bisa dipakai secara sinkron. Job inline tidak melaporkan
+    progres karena pemanggilnya baru mendapat job id setelah job selesai.
+    
+    Args:
+        percent: Progres 0-100
+        message: Keterangan tahap yang sedang dikerjakan
+    """
+    if _current_job_id is None or _progress_queue is None:
+        return
+    
+    _progress_queue.put((_current_job_id, percent, message))
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+def _run_job(job_id, fn, args, kwargs):
+    """Pembungkus fungsi job di proses worker"""
+    global _current_job_id
+    _current_job_id = job_id
+    report_progress(0, 'Memulai')
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_job_id = None
+
+def job_key(kind, params, fingerprint):
+    """Kunci deduplikasi job: hash jenis, parameter, dan fingerprint data"""
+    payload = json.dumps([kind, params, fingerprint], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+class Job:
+    """Status satu job analisis (salinan baris store, tidak diperbarui otomatis)"""
+    
+    def __init__(self, job_id, kind, params, status=PENDING, progress=0, message='Menunggu antrian',
+                 result=None, error=None, created_at=None, finished_at=None):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = status
+        self.progress = progress
+        self.message = message
+        self.result = result
+        self.error = error
+        self.created_at = created_at
+        self.finished_at = finished_at
+    
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+class JobManager:
+    """
+    Antrian job analisis berbasis ProcessPoolExecutor
+    
+    Args:
+        store: Penyimpanan status job (create, get, update_progress, finish),
+            dipakai bersama oleh semua proses web
+        max_workers: Jumlah proses worker. 0 = jalankan job secara inline
+            di proses pemanggil (misalnya di Vercel yang tidak mendukung
+            proses latar belakang)
+    """
+    
+    def __init__(self, store, max_workers=2):
+        self.store = store
+        self.max_workers = max_workers
+        self._executor = None
+        self._progress_queue = None
+    
+    def _ensure_executor(self):
+        if self._executor is None:
+            # spawn: worker tidak mewarisi koneksi database dan thread milik server
+            context = multiprocessing.get_context('spawn')
+            self._progress_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._progress_queue,)
+            )
+            threading.Thread(target=self._drain_progress, daemon=True).start()
+        return self._executor
+    
+    def _drain_progress(self):
+        """Teruskan laporan progres dari worker ke store"""
+        while True:
+            try:
+                job_id, percent, message = self._progress_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self.store.update_progress(job_id, percent, message)
+    
+    def submit(self, kind, params, fingerprint, fn, *args, **kwargs):
+        """
+        Masukkan job ke antrian
+        
+        Args:
+            kind: Jenis job (mis. 'analisis_mba', 'segmentasi')
+            params: Dictionary parameter analisis (harus JSON-serializable)
+            fingerprint: Fingerprint data saat ini, untuk deduplikasi
+            fn: Fungsi top-level yang dijalankan di worker
+            *args, **kwargs: Argumen untuk fn
+        
+        Returns:
+            Objek Job (bisa berupa job lama jika ada job identik yang belum
+            selesai, juga yang dibuat proses web lain)
+        """
+        job, created = self.store.create(new_job_id(), kind, params, fingerprint,
+                                         job_key(kind, params, fingerprint))
+        if not created:
+            return job
+        
+        if self.max_workers <= 0:
+            self._run_inline(job, fn, args, kwargs)
+            return self.store.get(job.id)
+        
+        try:
+            future = self._ensure_executor().submit(_run_job, job.id, fn, args, kwargs)
+        except BrokenProcessPool:
+            # Worker mati mendadak (mis. kehabisan memori): buat pool baru
+            self.shutdown()
+            future = self._ensure_executor().submit(_run_job, job.id, fn, args, kwargs)
+        future.add_done_callback(lambda f, job_id=job.id: self._on_done(job_id, f))
+        return job
+    
+    def _run_inline(self, job, fn, args, kwargs):
+        try:
+            result = _run_job(job.id, fn, args, kwargs)
+        except Exception:
+            self.store.finish(job.id, error=traceback.format_exc(limit=3))
+        else:
+            self.store.finish(job.id, result=result)
+    
+    def _on_done(self, job_id, future):
+        try:
+            result = future.result()
+        except Exception:
+            self.store.finish(job_id, error=traceback.format_exc(limit=3))
+        else:
+            self.store.finish(job_id, result=result)
+    
+    def get(self, job_id):
+        """Ambil Job berdasarkan id, atau None jika tidak ada"""
+        return self.store.get(job_id)
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,96 @@
+"""
+Index association rules di memori untuk rekomendasi keranjang belanja
+
+Setiap rule didaftarkan di bawah satu item antecedent-nya (item kunci, yaitu
+item yang paling jarang muncul di antecedent rules lain). Untuk keranjang B
+hanya rule dengan item kunci di B yang diperiksa, dan rule cocok jika seluruh
+antecedent-nya ada di B (subset matching).
+
+Daftar rule per item diurutkan berdasarkan lift lalu confidence, sehingga
+pencarian bisa berhenti begitu jumlah produk rekomendasi sudah terpenuhi.
+"""
+import heapq
+from utils.apriori import parse_itemset
+
+class RuleIndex:
+    """Index rules (antecedent -> consequent) yang tidak berubah setelah dibuat"""
+    
+    def __init__(self, rules):
+        """
+        Args:
+            rules: Iterable tuple (antecedents, consequents, support, confidence, lift);
+                   antecedents/consequents berupa string terformat atau set item
+        """
+        self._rules = []
+        for antecedents, consequents, support, confidence, lift in rules:
+            if isinstance(antecedents, str):
+                antecedents = parse_itemset(antecedents)
+            if isinstance(consequents, str):
+                consequents = parse_itemset(consequents)
+            if antecedents and consequents:
+                self._rules.append((frozenset(antecedents), tuple(sorted(consequents)),
+                                    float(support), float(confidence), float(lift)))
+        
+        item_counts = {}
+        for antecedents, *_ in self._rules:
+            for item in antecedents:
+                item_counts[item] = item_counts.get(item, 0) + 1
+        
+        # Kunci urut (-lift, -confidence, nomor rule) agar heapq.merge menghasilkan rule terbaik lebih dulu
+        self._by_item = {}
+        for number, (antecedents, _, _, confidence, lift) in enumerate(self._rules):
+            key_item = min(antecedents, key=lambda item: (item_counts[item], item))
+            self._by_item.setdefault(key_item, []).append((-lift, -confidence, number))
+        for entries in self._by_item.values():
+            entries.sort()
+    
+    def __len__(self):
+        return len(self._rules)
+    
+    def recommend(self, basket, limit=10):
+        """
+        Produk yang direkomendasikan untuk sebuah keranjang
+        
+        Setiap produk diwakili rule terbaiknya (lift tertinggi, lalu
+        confidence); produk yang sudah ada di keranjang dilewati.
+        
+        Args:
+            basket: Iterable nama produk di keranjang
+            limit: Jumlah maksimal produk rekomendasi
+        
+        Returns:
+            List dictionary product, antecedents, support, confidence, lift,
+            urut dari lift tertinggi
+        """
+        basket = frozenset(basket)
+        streams = [self._by_item[item] for item in basket if item in self._by_item]
+        
+        best = {}
+        last_key = None
+        for neg_lift, neg_confidence, number in heapq.merge(*streams):
+            key = (neg_lift, neg_confidence)
+            # Semua rule berikutnya tidak lebih baik dari produk yang sudah terkumpul
+            if len(best) >= limit and key > last_key:
+                break
+            
+            antecedents, consequents, support, confidence, lift = self._rules[number]
+            if not antecedents <= basket:
+                continue
+            
+            for product in consequents:
+                if product not in basket and product not in best:
+                    best[product] = (key, number)
+                    last_key = key
+        
+        ranked = sorted(best.items(), key=lambda entry: (entry[1][0], entry[0]))[:limit]
+        results = []
+        for product, (_, number) in ranked:
+            antecedents, _, support, confidence, lift = self._rules[number]
+            results.append({
+                'product': product,
+                'antecedents': sorted(antecedents),
+                'support': support,
+                'confidence': confidence,
+                'lift': lift
+            })
+        return results
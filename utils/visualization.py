@@ -1,11 +1,48 @@
 """
 Modul visualisasi menggunakan Plotly
+
+Setiap fungsi mengembalikan figure sebagai JSON ringkas yang dirender di
+browser oleh plotly.js (lihat static/js/charts.js), bukan potongan HTML.
 """
+import os
+import plotly
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+import numpy as np
 import pandas as pd
 from utils.apriori import format_itemset
 
+# plotly.js dilayani dari paket plotly yang terpasang (tanpa CDN), versinya
+# dipakai di URL agar browser boleh menyimpan file tersebut selamanya
+PLOTLY_JS_DIR = os.path.join(os.path.dirname(plotly.__file__), 'package_data')
+PLOTLY_VERSION = plotly.__version__
+
+# Warna setiap segmen pelanggan
+SEGMENT_COLORS = {
+    'Best Customers': '#00CC96',
+    'Potential Customers': '#FFA15A',
+    'Lost Customers': '#EF553B'
+}
+
+# Mode grafik 3D (lihat create_3d_cluster_plot) dan batas titik default
+PLOT_3D_MODES = ('auto', 'sample', 'density', 'full')
+PLOT_3D_MAX_POINTS = 5000
+
+def figure_json(fig):
+    """
+    Serialisasi figure ke JSON ringkas yang aman disematkan di tag <script>
+    
+    Args:
+        fig: plotly.graph_objects.Figure
+    
+    Returns:
+        String JSON
+    """
+    payload = pio.to_json(fig, validate=False, pretty=False)
+    # Escape karakter HTML agar isi label tidak bisa menutup tag <script>
+    return payload.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
 def create_association_heatmap(rules_df):
     """
     Membuat heatmap untuk visualisasi association rules
@@ -14,10 +51,10 @@ def create_association_heatmap(rules_df):
         rules_df: DataFrame hasil dari run_apriori
     
     Returns:
-        HTML string dari Plotly heatmap
+        JSON figure Plotly heatmap, atau None jika data kosong
     """
     if rules_df.empty:
-        return "<p>Tidak ada data untuk divisualisasikan</p>"
+        return None
     
     # Convert frozenset to string
     rules_df = rules_df.copy()
@@ -65,7 +102,7 @@ def create_association_heatmap(rules_df):
         font=dict(size=11)
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return figure_json(fig)
 
 def create_simple_bar_chart(rules_df):
     """
@@ -75,10 +112,10 @@ def create_simple_bar_chart(rules_df):
         rules_df: DataFrame hasil dari run_apriori
     
     Returns:
-        HTML string dari Plotly bar chart
+        JSON figure Plotly bar chart, atau None jika data kosong
     """
     if rules_df.empty:
-        return "<p>Tidak ada data untuk divisualisasikan</p>"
+        return None
     
     # Ambil top 15 rules
     rules_top = rules_df.head(15).copy()
@@ -108,54 +145,165 @@ def create_simple_bar_chart(rules_df):
         yaxis={'categoryorder': 'total ascending'}
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return figure_json(fig)
 
-def create_3d_cluster_plot(rfm_df):
+def create_3d_cluster_plot(rfm_df, mode='auto', max_points=PLOT_3D_MAX_POINTS, centroids=None):
     """
     Membuat grafik 3D untuk visualisasi cluster pelanggan
     
+    Jumlah titik dibatasi max_points agar ukuran halaman tetap kecil berapa
+    pun jumlah pelanggannya:
+    - 'full': semua pelanggan (tanpa batas)
+    - 'sample': sampel acak bertingkat per segmen
+    - 'density': pelanggan dikelompokkan ke grid 3D, satu titik per sel
+      (ukuran titik = jumlah pelanggan di sel)
+    - 'auto': 'full' jika pelanggan <= max_points, selain itu 'sample'
+    Mode selain 'full' juga menampilkan centroid setiap cluster.
+    
     Args:
         rfm_df: DataFrame dengan kolom ['customer_id', 'Recency', 'Frequency', 'Monetary', 'Cluster', 'Cluster_Label']
+        mode: Salah satu PLOT_3D_MODES
+        max_points: Batas jumlah titik pelanggan
+        centroids: DataFrame pusat cluster model (SegmentModel.centroids());
+            None = rata-rata RFM anggota setiap cluster
     
     Returns:
-        HTML string dari Plotly 3D scatter plot
+        JSON figure Plotly 3D scatter plot, atau None jika data kosong
     """
     if rfm_df.empty:
-        return "<p>Tidak ada data untuk divisualisasikan</p>"
-    
-    fig = px.scatter_3d(
-        rfm_df, 
-        x='Recency', 
-        y='Frequency', 
-        z='Monetary',
-        color='Cluster_Label',
-        hover_data=['customer_id'],
-        title='Visualisasi 3D Segmentasi Pelanggan (RFM + K-Means)',
-        labels={
-            'Recency': 'Recency (hari)',
-            'Frequency': 'Frequency (transaksi)',
-            'Monetary': 'Monetary (Rp)',
-            'Cluster_Label': 'Segmen'
-        },
-        color_discrete_map={
-            'Best Customers': '#00CC96',
-            'Potential Customers': '#FFA15A',
-            'Lost Customers': '#EF553B'
-        }
-    )
+        return None
+    if mode not in PLOT_3D_MODES:
+        raise ValueError(f'Mode grafik 3D tidak dikenal: {mode}')
     
-    fig.update_traces(marker=dict(size=6))
+    if mode == 'auto':
+        mode = 'full' if len(rfm_df) <= max_points else 'sample'
+    
+    title = 'Visualisasi 3D Segmentasi Pelanggan (RFM + K-Means)'
+    if mode == 'density':
+        fig = _density_scatter_3d(rfm_df, max_points)
+        title += f'<br><sup>Kepadatan {len(rfm_df):,} pelanggan (ukuran titik = jumlah pelanggan)</sup>'
+    else:
+        points = rfm_df if mode == 'full' else _stratified_sample(rfm_df, max_points)
+        fig = px.scatter_3d(
+            points, 
+            x='Recency', 
+            y='Frequency', 
+            z='Monetary',
+            color='Cluster_Label',
+            hover_data=['customer_id'],
+            labels={
+                'Recency': 'Recency (hari)',
+                'Frequency': 'Frequency (transaksi)',
+                'Monetary': 'Monetary (Rp)',
+                'Cluster_Label': 'Segmen'
+            },
+            color_discrete_map=SEGMENT_COLORS
+        )
+        fig.update_traces(marker=dict(size=6))
+        if len(points) < len(rfm_df):
+            title += f'<br><sup>Sampel {len(points):,} dari {len(rfm_df):,} pelanggan</sup>'
+    
+    if mode != 'full':
+        _add_centroids(fig, rfm_df, centroids)
     
     fig.update_layout(
+        title=title,
         scene=dict(
             xaxis_title='Recency (hari sejak transaksi terakhir)',
             yaxis_title='Frequency (jumlah transaksi)',
             zaxis_title='Monetary (total pembelian Rp)'
         ),
+        legend_title_text='Segmen',
         height=700
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return figure_json(fig)
+
+def _stratified_sample(rfm_df, max_points):
+    """
+    Sampel maksimal max_points baris, proporsional per Cluster_Label
+    
+    Setiap segmen mendapat minimal max_points / (4 x jumlah segmen) titik
+    (atau seluruh anggotanya), supaya segmen kecil tetap terlihat.
+    """
+    counts = rfm_df['Cluster_Label'].value_counts()
+    
+    # Jatah minimal dulu, sisa kuota dibagi proporsional terhadap anggota yang belum terambil
+    quota = np.minimum(counts, max_points // (4 * len(counts)))
+    remaining = counts - quota
+    if remaining.sum() > 0:
+        quota += (remaining * (max_points - quota.sum()) // remaining.sum()).clip(upper=remaining)
+    
+    # random_state tetap agar figure yang sama selalu menampilkan titik yang sama
+    return pd.concat([
+        rfm_df[rfm_df['Cluster_Label'] == label].sample(n=int(n), random_state=42)
+        for label, n in quota.items()
+    ])
+
+def _density_scatter_3d(rfm_df, max_points):
+    """Satu titik per sel grid RFM per segmen, diletakkan di rata-rata anggotanya"""
+    n_labels = rfm_df['Cluster_Label'].nunique()
+    # Jumlah sel maksimal (segmen x bins^3) tidak melebihi max_points
+    bins = max(2, int((max_points / n_labels) ** (1 / 3)))
+    
+    cells = rfm_df[['Cluster_Label', 'Recency', 'Frequency', 'Monetary']].copy()
+    keys = ['Cluster_Label']
+    for column in ('Recency', 'Frequency', 'Monetary'):
+        cells[f'{column}_bin'] = pd.cut(cells[column], bins=bins, labels=False, include_lowest=True)
+        keys.append(f'{column}_bin')
+    
+    grid = cells.groupby(keys, observed=True).agg(
+        Recency=('Recency', 'mean'),
+        Frequency=('Frequency', 'mean'),
+        Monetary=('Monetary', 'mean'),
+        Pelanggan=('Recency', 'size')
+    ).reset_index()
+    
+    # Luas titik sebanding jumlah pelanggan di sel
+    sizes = 4 + 20 * np.sqrt(grid['Pelanggan'] / grid['Pelanggan'].max())
+    
+    fig = go.Figure()
+    for label, group in grid.groupby('Cluster_Label', sort=False):
+        fig.add_trace(go.Scatter3d(
+            x=group['Recency'].round(1),
+            y=group['Frequency'].round(2),
+            z=group['Monetary'].round(0),
+            mode='markers',
+            name=label,
+            marker=dict(size=sizes[group.index], color=SEGMENT_COLORS.get(label), opacity=0.7),
+            customdata=group['Pelanggan'],
+            hovertemplate=(f'{label}<br>Pelanggan: %{{customdata:,}}<br>Recency: %{{x}}'
+                           '<br>Frequency: %{y}<br>Monetary: Rp %{z:,.0f}<extra></extra>')
+        ))
+    return fig
+
+def _add_centroids(fig, rfm_df, centroids=None):
+    """
+    Tambahkan centroid tiap cluster sebagai penanda berlian
+    
+    Pusat cluster model dipakai jika ada (cluster tanpa anggota tetap
+    tampil); hasil lama tanpa model memakai rata-rata RFM anggota.
+    """
+    if centroids is None:
+        centroids = rfm_df.groupby(['Cluster', 'Cluster_Label'], observed=True)[
+            ['Recency', 'Frequency', 'Monetary']
+        ].mean().reset_index()
+    
+    fig.add_trace(go.Scatter3d(
+        x=centroids['Recency'],
+        y=centroids['Frequency'],
+        z=centroids['Monetary'],
+        mode='markers',
+        name='Centroid',
+        marker=dict(
+            size=12, symbol='diamond',
+            color=[SEGMENT_COLORS.get(label) for label in centroids['Cluster_Label']],
+            line=dict(color='black', width=2)
+        ),
+        text=[f'Centroid cluster {cluster} ({label})'
+              for cluster, label in zip(centroids['Cluster'], centroids['Cluster_Label'])],
+        hovertemplate='%{text}<br>Recency: %{x:.1f}<br>Frequency: %{y:.2f}<br>Monetary: Rp %{z:,.0f}<extra></extra>'
+    ))
 
 def create_cluster_summary_chart(rfm_df):
     """
@@ -165,10 +313,10 @@ def create_cluster_summary_chart(rfm_df):
         rfm_df: DataFrame dengan kolom Cluster_Label
     
     Returns:
-        HTML string dari Plotly pie chart
+        JSON figure Plotly pie chart, atau None jika data kosong
     """
     if rfm_df.empty:
-        return "<p>Tidak ada data untuk divisualisasikan</p>"
+        return None
     
     cluster_counts = rfm_df['Cluster_Label'].value_counts()
     
@@ -187,4 +335,41 @@ def create_cluster_summary_chart(rfm_df):
         height=400
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return figure_json(fig)
+
+def create_k_sweep_chart(sweep):
+    """
+    Membuat grafik inertia (elbow) dan silhouette untuk setiap nilai K
+    
+    Args:
+        sweep: Dictionary hasil utils.clustering.sweep_k
+    
+    Returns:
+        JSON figure Plotly line chart dua sumbu
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=sweep['k_values'], y=sweep['inertia'],
+        mode='lines+markers', name='Inertia (elbow)', yaxis='y'
+    ))
+    fig.add_trace(go.Scatter(
+        x=sweep['k_values'], y=sweep['silhouette'],
+        mode='lines+markers', name='Silhouette', yaxis='y2'
+    ))
+    
+    fig.add_vline(x=sweep['recommended_k'], line_dash='dash', line_color='#00CC96',
+                  annotation_text=f"Rekomendasi K={sweep['recommended_k']}")
+    if sweep['elbow_k'] != sweep['recommended_k']:
+        fig.add_vline(x=sweep['elbow_k'], line_dash='dot', line_color='#FFA15A',
+                      annotation_text=f"Elbow K={sweep['elbow_k']}", annotation_position='bottom right')
+    
+    fig.update_layout(
+        title='Pemilihan Jumlah Cluster (K)',
+        xaxis=dict(title='Jumlah cluster (K)', dtick=1),
+        yaxis=dict(title='Inertia (makin kecil makin rapat)'),
+        yaxis2=dict(title='Silhouette (makin besar makin baik)', overlaying='y', side='right'),
+        legend=dict(orientation='h', y=-0.2),
+        height=450
+    )
+    
+    return figure_json(fig)